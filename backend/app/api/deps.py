@@ -1,22 +1,23 @@
 import logging
-from typing import List
-from fastapi import Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import Cookie, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from app.database import get_db
 from app.config import settings
-from app.models.user import User, UserRole # Fixed Import
+from app.models.user import UserRole # Fixed Import
+from app.services.principal_cache import Principal, principal_cache
 
 logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
+EVENTS_TOKEN_COOKIE = "praja_events_token"
 
-async def get_current_user(
-        db: AsyncSession = Depends(get_db),
-        token: str = Depends(oauth2_scheme)
-):
+async def _principal_from_token(token: str, complaint_id: int = None) -> Principal:
+    """
+    Decodes a JWT and loads its cached Principal. With `complaint_id`, only an events
+    token minted for that complaint is accepted; without it, events tokens are refused.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -28,18 +29,47 @@ async def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    if complaint_id is not None:
+        if payload.get("scope") != "events" or payload.get("cid") != complaint_id:
+            raise credentials_exception
+    elif payload.get("scope") == "events":
+        raise credentials_exception  # Travels in URLs: never good for anything but its own stream
 
-    result = await db.execute(select(User).filter(User.email == email))
-    user = result.scalar_one_or_none()
+    user = await principal_cache.load(email)
     if user is None:
         raise credentials_exception
     return user
 
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Resolves the bearer token to a cached Principal (id, email, role, department_id,
+    is_active). The users table is only queried on a cache miss.
+    """
+    return await _principal_from_token(token)
+
+async def get_events_user(
+    complaint_id: int,
+    bearer: Optional[str] = Depends(optional_oauth2_scheme),
+    token: Optional[str] = Query(None),
+    cookie_token: Optional[str] = Cookie(None, alias=EVENTS_TOKEN_COOKIE),
+) -> Principal:
+    """
+    Auth for the SSE progress stream. EventSource can't send an Authorization header, so
+    besides the bearer token it accepts a short-lived events token (from
+    POST /complaints/{id}/events/token) in ?token= or a cookie, valid for that complaint only.
+    """
+    if bearer:
+        return await _principal_from_token(bearer)
+    events_token = token or cookie_token
+    if not events_token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return await _principal_from_token(events_token, complaint_id=complaint_id)
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[UserRole]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)):
+    def __call__(self, current_user: Principal = Depends(get_current_user)):
         if current_user.role not in self.allowed_roles:
             logger.warning(f"User {current_user.email} attempted unauthorized access. Role: {current_user.role}")
             raise HTTPException(
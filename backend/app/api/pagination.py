@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.complaint import Complaint
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(filed_at: datetime, complaint_id: int) -> str:
+    raw = json.dumps([filed_at.isoformat(), complaint_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        filed_at, complaint_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(filed_at), int(complaint_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate_complaints(db: AsyncSession, query, response: Response, cursor: str = None, limit: int = 100):
+    """
+    Keyset pagination, newest first: each page continues strictly after the (filed_at, id)
+    of the previous page's last row, so page 10,000 costs the same index range scan as
+    page 1. The opaque cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    query = query.order_by(Complaint.filed_at.desc(), Complaint.id.desc())
+    if cursor:
+        filed_at, complaint_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Complaint.filed_at, Complaint.id) < tuple_(filed_at, complaint_id))
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.scalars().all()
+    page = rows[:limit]
+    if len(rows) > limit:
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.filed_at, last.id)
+    return page
@@ -1,21 +1,84 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from pydantic import BaseModel
+from typing import List, Optional
+from app.config import settings
 from app.database import get_db
 from app.services.audit_service import audit_service
+from app.services.cache_service import ai_cache
 from app.api.deps import require_admin  # Import our RBAC gatekeeper
-from app.models.user import User
+from app.services.principal_cache import Principal
+from app.models.complaint import Complaint
+from app.core.queue import enqueue
 
 router = APIRouter()
 
+
+class BatchReanalysis(BaseModel):
+    complaint_ids: Optional[List[int]] = None
+    analysis_status: Optional[str] = None  # e.g. "processing" for complaints stuck after an outage
+    department_id: Optional[int] = None
+    limit: int = 10000
+
 @router.get("/system-audit")
 async def run_full_system_audit(
+    full: bool = False,
     db: AsyncSession = Depends(get_db),
     # This single line secures the entire endpoint for SUPER_ADMIN only
-    current_admin: User = Depends(require_admin)
+    current_admin: Principal = Depends(require_admin)
 ):
     """
     The Anti-Corruption 'Watchdog' Endpoint:
     Only accessible by Super Admins.
     Compares Blockchain events vs Database rows to find illegal deletions.
+    Scans only blocks since the last run; pass ?full=true to rescan from block 0.
+    """
+    return await audit_service.run_integrity_audit(db, full=full)
+
+
+@router.post("/reanalyze")
+async def queue_batch_reanalysis(
+    batch_in: BatchReanalysis,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Principal = Depends(require_admin)
+):
+    """
+    Backlog Recovery: re-queues complaints (explicit IDs and/or a filter) as
+    analyze_complaints_batch tasks of ANALYSIS_BATCH_SIZE instead of one task each.
     """
-    return await audit_service.run_integrity_audit(db)
\ No newline at end of file
+    if not batch_in.complaint_ids and not batch_in.analysis_status and batch_in.department_id is None:
+        raise HTTPException(status_code=400, detail="Provide complaint_ids or at least one filter.")
+
+    query = select(Complaint.id).filter(Complaint.is_deleted == False)
+    if batch_in.complaint_ids:
+        query = query.filter(Complaint.id.in_(batch_in.complaint_ids))
+    if batch_in.analysis_status:
+        query = query.filter(Complaint.analysis_status == batch_in.analysis_status)
+    if batch_in.department_id is not None:
+        query = query.filter(Complaint.department_id == batch_in.department_id)
+
+    result = await db.execute(query.order_by(Complaint.id).limit(batch_in.limit))
+    complaint_ids = result.scalars().all()
+
+    if complaint_ids:
+        await db.execute(
+            update(Complaint).where(Complaint.id.in_(complaint_ids)).values(analysis_status="processing"))
+        await db.commit()
+
+    batch_size = settings.ANALYSIS_BATCH_SIZE
+    batches = [complaint_ids[i:i + batch_size] for i in range(0, len(complaint_ids), batch_size)]
+    for batch in batches:
+        enqueue("analyze_complaints_batch", batch)
+
+    return {
+        "status": "Accepted",
+        "queued_complaints": len(complaint_ids),
+        "batches": len(batches)
+    }
+
+
+@router.get("/ai-cache/stats")
+async def get_ai_cache_stats(current_admin: Principal = Depends(require_admin)):
+    """Hit/miss counters of the triage + vision result cache, summed over the API and every worker."""
+    return await ai_cache.shared_stats()
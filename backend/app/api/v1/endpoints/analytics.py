@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from app.database import get_db
 from app.models.complaint import Complaint
-from app.models.department import Department
-from app.models.user import User  # FIXED: Added this import
+from app.services.principal_cache import Principal
 from app.api.deps import require_official
+from app.config import settings
+from app.services.analytics_service import analytics_service
+from app.services.map_service import map_service
+from app.utils.geo import tile_bounds
 
 router = APIRouter()
 
@@ -13,36 +17,15 @@ router = APIRouter()
 @router.get("/stats/summary")
 async def get_system_stats(
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(require_official)  # Now Python knows what User is
+        current_user: Principal = Depends(require_official)
 ):
-    """Returns data for Pie Charts and Top-level stats."""
-
-    # 1. Complaints by Department (Pie Chart Data)
-    dept_query = await db.execute(
-        select(Department.name, func.count(Complaint.id))
-        .join(Complaint, Complaint.department_id == Department.id)
-        .group_by(Department.name)
-    )
-    dept_distribution = {name: count for name, count in dept_query.all()}
-
-    # 2. Complaints by Status (Bar Chart Data)
-    status_query = await db.execute(
-        select(Complaint.status, func.count(Complaint.id))
-        .group_by(Complaint.status)
-    )
-    # status.value is used because status is an Enum
-    status_distribution = {status.value: count for status, count in status_query.all()}
-
-    return {
-        "department_pie": dept_distribution,
-        "status_bar": status_distribution,
-        "total_active": sum(status_distribution.values())
-    }
+    """Returns data for Pie Charts and Top-level stats (from the rollups, briefly cached)."""
+    return await analytics_service.get_summary(db)
 
 
 @router.get("/map-data")
 async def get_map_points(db: AsyncSession = Depends(get_db)):
-    """Simplified data for the Severity Heatmap."""
+    """Simplified data for the Severity Heatmap (full dump; new clients should use /map/tiles)."""
     result = await db.execute(
         select(Complaint.id, Complaint.location, Complaint.severity_score, Complaint.complaint_type)
         .filter(Complaint.is_deleted == False)
@@ -55,4 +38,44 @@ async def get_map_points(db: AsyncSession = Depends(get_db)):
             "severity": r.severity_score,
             "type": r.complaint_type
         } for r in result.all()
-    ]
\ No newline at end of file
+    ]
+
+
+def _tile_response(request: Request, tile: dict, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.MAP_TILE_CACHE_TTL_SECONDS}"}
+    client_etags = {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}
+    if etag in client_etags:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(tile, headers=headers)
+
+
+@router.get("/map/tiles/{z}/{x}/{y}")
+async def get_map_tile(
+        request: Request,
+        z: int = Path(ge=0, le=22),
+        x: int = Path(ge=0),
+        y: int = Path(ge=0),
+        db: AsyncSession = Depends(get_db)
+):
+    """Slippy-map tile: aggregated geohash cells at low zoom, individual points at street level."""
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=400, detail="Tile coordinates out of range for this zoom")
+    tile, etag = await map_service.get_tile(db, tile_bounds(z, x, y), z)
+    return _tile_response(request, tile, etag)
+
+
+@router.get("/map/bbox")
+async def get_map_bbox(
+        request: Request,
+        min_lat: float = Query(ge=-90, le=90),
+        min_lon: float = Query(ge=-180, le=180),
+        max_lat: float = Query(ge=-90, le=90),
+        max_lon: float = Query(ge=-180, le=180),
+        zoom: int = Query(ge=0, le=22),
+        db: AsyncSession = Depends(get_db)
+):
+    """Same as a tile, for an arbitrary viewport."""
+    if min_lat >= max_lat or min_lon >= max_lon:
+        raise HTTPException(status_code=400, detail="Bounding box must have min < max")
+    tile, etag = await map_service.get_tile(db, (min_lat, min_lon, max_lat, max_lon), zoom)
+    return _tile_response(request, tile, etag)
@@ -1,20 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 from app.database import get_db
 from app.models.complaint import Complaint, ComplaintType, ComplaintStatus
 from app.schemas.complaint import ComplaintCreate, ComplaintResponse
-from fastapi import File, UploadFile
-from app.utils.file_handler import save_upload_file, get_file_hash
+from app.utils.file_handler import StagedUpload, EVIDENCE_MIME_PREFIXES, VOICE_MIME_PREFIXES, upload_openapi
 from app.models.evidence import Evidence, FileType
 from app.schemas.complaint import ComplaintUpdate
 from app.services.ai_service import ai_service
-from app.worker import analyze_complaint_task
+from app.core.queue import enqueue
 from app.services.blockchain_service import blockchain_service
-from app.services.stt_service import stt_service
-from app.api.deps import get_current_user
-from app.models.user import User, UserRole # Fixed Import
+from app.services.auth_service import auth_service
+from app.api.deps import get_current_user, get_events_user
+from app.api.pagination import paginate_complaints
+from app.services.evidence_index import evidence_index
+from app.services.progress_service import progress_service
+from app.utils.image_hash import dhash
+from app.utils.derived_images import prepare_derivatives
+from app.core.cpu_pool import run_cpu_bound
+from app.config import settings
+from app.models.user import UserRole # Fixed Import
+from app.services.principal_cache import Principal
 from app.models.social import Upvote
 from sqlalchemy import func
 
@@ -25,7 +35,7 @@ router = APIRouter()
 async def create_complaint(
     complaint_in: ComplaintCreate, 
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user) # PROTECTED
+    current_user: Principal = Depends(get_current_user) # PROTECTED
 ):
     db_complaint = Complaint(
         **complaint_in.model_dump(),
@@ -39,10 +49,11 @@ async def create_complaint(
 
 @router.get("/", response_model=List[ComplaintResponse])
 async def list_complaints(
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        cursor: str = None,
+        limit: int = Query(100, ge=1, le=500),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)  # Added Auth
+        current_user: Principal = Depends(get_current_user)  # Added Auth
 ):
     # CITIZENS only see their own records. OFFICIALS see all.
     if current_user.role == UserRole.CITIZEN:
@@ -50,15 +61,15 @@ async def list_complaints(
     else:
         query = select(Complaint).filter(Complaint.is_deleted == False)
 
-    result = await db.execute(query.offset(skip).limit(limit))
-    return result.scalars().all()
+    # Newest first; the next page's cursor comes back in X-Next-Cursor
+    return await paginate_complaints(db, query, response, cursor, limit)
 
 
 @router.get("/{complaint_id}", response_model=ComplaintResponse)
 async def get_complaint(
         complaint_id: int,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)  # Added Auth
+        current_user: Principal = Depends(get_current_user)  # Added Auth
 ):
     result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id, Complaint.is_deleted == False))
     db_complaint = result.scalar_one_or_none()
@@ -72,12 +83,63 @@ async def get_complaint(
 
     return db_complaint
 
-@router.post("/{complaint_id}/evidence")
+async def _streamable_complaint(db: AsyncSession, complaint_id: int, current_user: Principal) -> Complaint:
+    result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id, Complaint.is_deleted == False))
+    db_complaint = result.scalar_one_or_none()
+
+    if not db_complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+
+    # SECURITY CHECK: Is the user an official or the owner?
+    if current_user.role == UserRole.CITIZEN and db_complaint.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this complaint")
+    return db_complaint
+
+
+@router.post("/{complaint_id}/events/token")
+async def create_events_token(
+        complaint_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)
+):
+    """
+    Short-lived token for EventSource, which can't send an Authorization header:
+    new EventSource(`.../complaints/${id}/events?token=${token}`).
+    """
+    await _streamable_complaint(db, complaint_id, current_user)
+    return {
+        "token": auth_service.create_events_token(current_user.email, complaint_id),
+        "expires_in": settings.PROGRESS_TOKEN_EXPIRE_SECONDS
+    }
+
+
+@router.get("/{complaint_id}/events")
+async def stream_complaint_events(
+        complaint_id: int,
+        request: Request,
+        last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_events_user)  # Bearer header, or ?token= / cookie events token
+):
+    """
+    Server-Sent Events: analysis progress for one complaint, pushed as the worker reaches
+    each stage. Reconnecting clients send Last-Event-ID and receive what they missed.
+    """
+    db_complaint = await _streamable_complaint(db, complaint_id, current_user)
+
+    return StreamingResponse(
+        progress_service.event_stream(complaint_id, db_complaint.analysis_status, last_event_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # No proxy buffering
+    )
+
+
+@router.post("/{complaint_id}/evidence", openapi_extra=upload_openapi())
 async def upload_evidence(
     complaint_id: int,
-    file: UploadFile = File(...),
+    request: Request,  # Multipart body (field "file"), streamed by StagedUpload
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user) # Added Auth
+    current_user: Principal = Depends(get_current_user) # Added Auth
 ):
     # 1. Verify complaint exists
     result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
@@ -90,46 +152,121 @@ async def upload_evidence(
     if db_complaint.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="You can only add evidence to your own complaints")
 
-    # 1. Generate Hash
-    f_hash = await get_file_hash(file)
-
-    # 2. FEATURE 4: Check if this file has EVER been uploaded before
-    existing_ev = await db.execute(select(Evidence).filter(Evidence.file_hash == f_hash))
-    if existing_ev.scalar_one_or_none():
-        raise HTTPException(
-            status_code=400,
-            detail="Duplicate Evidence: This file has already been submitted in another report."
-        )
+    # 1. Stream the body to disk once: SHA-256, sniffed type and size limit in the same pass
+    async with StagedUpload(request, EVIDENCE_MIME_PREFIXES) as staged:
+        # 2. FEATURE 4: Check if this file (or, for photos, a near-identical copy) has EVER been uploaded before
+        await ensure_new_evidence(db, staged.sha256)
+        perceptual_hash = None
+        if staged.file_type == FileType.IMAGE:
+            perceptual_hash = await image_fingerprint(staged.temp_path)
+            await ensure_not_near_duplicate(db, perceptual_hash)
 
-    # 2. Save file to disk
-    file_path = await save_upload_file(file)
-
-    # 3. Determine file type
-    mime_type = file.content_type
-    f_type = FileType.DOCUMENT
-    if "image" in mime_type: f_type = FileType.IMAGE
-    elif "audio" in mime_type: f_type = FileType.AUDIO
-    elif "video" in mime_type: f_type = FileType.VIDEO
+        # 3. Move into place (content-addressed, atomic rename)
+        file_path = await staged.commit()
 
     # 4. Save metadata to DB
     new_evidence = Evidence(
         complaint_id=complaint_id,
-        file_type=f_type,
+        file_type=staged.file_type,
         file_url=file_path,
-        file_hash=f_hash  # Store the hash
+        file_hash=staged.sha256,  # Store the hash
+        perceptual_hash=perceptual_hash
     )
     db.add(new_evidence)
-    await db.commit()
-    
+    await commit_evidence(db)
+    evidence_index.add(new_evidence.id, perceptual_hash, new_evidence.file_hash)
+
+    # 5. Analysis copy + thumbnail, built once per file hash in the process pool
+    if perceptual_hash:
+        try:
+            await prepare_derivatives(file_path, staged.sha256)
+        except Exception:
+            pass  # Rebuilt on demand by the worker / thumbnail endpoint
+
     return {"status": "success", "file_path": file_path}
 
 
+async def ensure_new_evidence(db: AsyncSession, file_hash: str):
+    existing_ev = await db.execute(select(Evidence.id).filter(Evidence.file_hash == file_hash))
+    if existing_ev.first():
+        raise HTTPException(
+            status_code=400,
+            detail="Duplicate Evidence: This file has already been submitted in another report."
+        )
+
+
+@router.get("/{complaint_id}/evidence/{evidence_id}/thumbnail")
+async def get_evidence_thumbnail(
+        complaint_id: int,
+        evidence_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)
+):
+    """Small JPEG preview of image evidence (same visibility rules as the complaint)."""
+    result = await db.execute(
+        select(Evidence, Complaint.user_id)
+        .join(Complaint, Complaint.id == Evidence.complaint_id)
+        .filter(Evidence.id == evidence_id, Evidence.complaint_id == complaint_id, Complaint.is_deleted == False)
+    )
+    row = result.first()
+    if not row or row[0].file_type != FileType.IMAGE:
+        raise HTTPException(status_code=404, detail="Image evidence not found")
+    ev, owner_id = row
+
+    if current_user.role == UserRole.CITIZEN and owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this complaint")
+
+    # Derived files never change for a given content hash
+    etag = f'"{ev.file_hash or ev.id}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if etag in {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        _, thumbnail_path = await prepare_derivatives(ev.file_url, ev.file_hash or f"evidence-{ev.id}")
+    except Exception:
+        raise HTTPException(status_code=422, detail="Evidence image could not be decoded")
+    return FileResponse(thumbnail_path, media_type="image/jpeg", headers=headers)
+
+
+async def image_fingerprint(file_path) -> str:
+    try:
+        return await run_cpu_bound(dhash, str(file_path))
+    except Exception:
+        # Sniffed as an image but PIL can't decode it (e.g. HEIC): exact-hash dedup only
+        return None
+
+
+async def ensure_not_near_duplicate(db: AsyncSession, perceptual_hash: str):
+    if not perceptual_hash or not settings.EVIDENCE_REJECT_NEAR_DUPLICATES:
+        return
+    await evidence_index.refresh(db)  # Pick up uploads handled by other API workers
+    if evidence_index.near(perceptual_hash):
+        raise HTTPException(
+            status_code=400,
+            detail="Duplicate Evidence: A near-identical photo has already been submitted in another report."
+        )
+
+
+async def commit_evidence(db: AsyncSession):
+    # Two identical uploads racing past the duplicate check: the unique file_hash decides
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Duplicate Evidence: This file has already been submitted in another report."
+        )
+
+
 @router.patch("/{complaint_id}", response_model=ComplaintResponse)
 async def update_complaint(
         complaint_id: int,
         complaint_update: ComplaintUpdate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)  # Added Auth
+        current_user: Principal = Depends(get_current_user)  # Added Auth
 ):
     result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
     db_complaint = result.scalar_one_or_none()
@@ -154,7 +291,7 @@ async def update_complaint(
 async def delete_complaint(
     complaint_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user) # Added Auth
+    current_user: Principal = Depends(get_current_user) # Added Auth
 ):
     result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
     db_complaint = result.scalar_one_or_none()
@@ -209,7 +346,7 @@ async def delete_complaint(
 async def trigger_analysis(
         complaint_id: int,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)  # Added Auth
+        current_user: Principal = Depends(get_current_user)  # Added Auth
 ):
     result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
     db_complaint = result.scalar_one_or_none()
@@ -223,7 +360,7 @@ async def trigger_analysis(
 
     db_complaint.analysis_status = "processing"
     await db.commit()
-    analyze_complaint_task.delay(complaint_id)
+    enqueue("analyze_complaint_task", complaint_id)
     
     return {
         "status": "Accepted",
@@ -236,7 +373,7 @@ async def trigger_analysis(
 async def verify_complaint_integrity(
     complaint_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user) # FIXED: Added Auth Gate
+    current_user: Principal = Depends(get_current_user) # FIXED: Added Auth Gate
 ):
     # 1. Fetch current data from SQL
     result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
@@ -267,8 +404,13 @@ async def verify_complaint_integrity(
         evidence_hashes=evidence_hashes
     )
 
-    # 4. Compare with On-Chain Data
-    is_valid = await blockchain_service.verify_integrity(complaint_id, current_hash)
+    # 4. Compare with On-Chain Data (per-complaint anchor, or Merkle proof against a batch root)
+    if db_complaint.merkle_root:
+        is_valid = await blockchain_service.verify_batch_inclusion(
+            current_hash, json.loads(db_complaint.merkle_proof or "[]"), db_complaint.merkle_root
+        )
+    else:
+        is_valid = await blockchain_service.verify_integrity(complaint_id, current_hash)
 
     return {
         "complaint_id": complaint_id,
@@ -278,50 +420,48 @@ async def verify_complaint_integrity(
     }
 
 
-@router.post("/voice-submit")
+@router.post("/voice-submit", status_code=202, openapi_extra=upload_openapi())
 async def create_complaint_via_voice(
         location: str,
-        file: UploadFile = File(...),
+        request: Request,  # Multipart body (field "file"), streamed by StagedUpload
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)  # PROTECTED: Requires JWT
+        current_user: Principal = Depends(get_current_user)  # PROTECTED: Requires JWT
 ):
-    temp_path = await save_upload_file(file)
-    transcript = await stt_service.transcribe_audio(temp_path)
-
-    if not transcript:
-        raise HTTPException(status_code=500, detail="Transcription failed.")
-
-    generated_title = transcript[:50] + "..." if len(transcript) > 50 else transcript
+    async with StagedUpload(request, VOICE_MIME_PREFIXES) as staged:
+        await ensure_new_evidence(db, staged.sha256)
+        audio_path = await staged.commit()
 
-    # Attach user_id to the voice report
+    # Attach user_id to the voice report; title and description are filled in by the
+    # transcription task, which then chains into the analysis task
     new_complaint = Complaint(
-        title=f"Voice Report: {generated_title}",
-        description=transcript,
+        title="Voice Report (transcribing...)",
+        description="",
         complaint_type=ComplaintType.OTHERS,
         location=location,
         status=ComplaintStatus.SUBMITTED,
+        analysis_status="transcribing",
         user_id=current_user.id
     )
 
     db.add(new_complaint)
-    await db.commit()
-    await db.refresh(new_complaint)
+    await db.flush()  # Secure the ID
 
-    # 5. Link audio as evidence
-    f_hash = await get_file_hash(file)
-    new_evidence = Evidence(
+    # The recording is the complaint's evidence from the start, in the same transaction
+    # (a concurrent upload of the same file loses on the unique file_hash)
+    db.add(Evidence(
         complaint_id=new_complaint.id,
         file_type=FileType.AUDIO,
-        file_url=temp_path,
-        file_hash=f_hash
-    )
-    db.add(new_evidence)
-    await db.commit()
+        file_url=audio_path,
+        file_hash=staged.sha256
+    ))
+    await commit_evidence(db)
+
+    enqueue("transcribe_voice_complaint", new_complaint.id, audio_path, staged.sha256)
 
     return {
-        "status": "success",
+        "status": "Accepted",
         "complaint_id": new_complaint.id,
-        "transcript": transcript
+        "analysis_status": new_complaint.analysis_status
     }
 
 
@@ -329,7 +469,7 @@ async def create_complaint_via_voice(
 async def upvote_complaint(
         complaint_id: int,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user)
 ):
     """Allows a citizen to upvote a complaint to increase its visibility."""
     # 1. Check if already upvoted
@@ -356,8 +496,9 @@ async def upvote_complaint(
 
 @router.get("/feed/public", response_model=List[ComplaintResponse])
 async def get_public_feed(
-        skip: int = 0,
-        limit: int = 20,
+        response: Response,
+        cursor: str = None,
+        limit: int = Query(20, ge=1, le=100),
         db: AsyncSession = Depends(get_db)
 ):
     """Get recent public complaints for the 'Global Feed' page."""
@@ -365,7 +506,5 @@ async def get_public_feed(
     query = select(Complaint).filter(
         Complaint.is_anonymous == False,
         Complaint.is_deleted == False
-    ).order_by(Complaint.filed_at.desc())
-
-    result = await db.execute(query.offset(skip).limit(limit))
-    return result.scalars().all()
\ No newline at end of file
+    )
+    return await paginate_complaints(db, query, response, cursor, limit)
\ No newline at end of file
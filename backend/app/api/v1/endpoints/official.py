@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
 from app.database import get_db
 from app.models.complaint import Complaint, ComplaintStatus
 from app.models.notes import InternalNote
-from app.models.user import User, UserRole
+from app.models.user import UserRole
+from app.services.principal_cache import Principal
 from app.api.deps import get_current_user, require_official
+from app.api.pagination import paginate_complaints
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -24,7 +26,7 @@ async def update_complaint_status(
     complaint_id: int,
     status_update: StatusUpdate,
     db: AsyncSession = Depends(get_db),
-    current_official: User = Depends(require_official)
+    current_official: Principal = Depends(require_official)
 ):
     result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
     db_complaint = result.scalar_one_or_none()
@@ -46,7 +48,7 @@ async def add_internal_note(
     complaint_id: int,
     note_in: NoteCreate,
     db: AsyncSession = Depends(get_db),
-    current_official: User = Depends(require_official)
+    current_official: Principal = Depends(require_official)
 ):
     """Private notes for officials to discuss evidence or investigation progress."""
     new_note = InternalNote(
@@ -63,7 +65,7 @@ async def add_internal_note(
 async def get_internal_notes(
     complaint_id: int,
     db: AsyncSession = Depends(get_db),
-    current_official: User = Depends(require_official)
+    current_official: Principal = Depends(require_official)
 ):
     result = await db.execute(
         select(InternalNote).filter(InternalNote.complaint_id == complaint_id).order_by(InternalNote.created_at.desc())
@@ -74,7 +76,10 @@ async def get_internal_notes(
 # FIX: Update the dependency name to match your imported name
 @router.get("/complaints")
 async def get_assigned_complaints(
-        current_user: User = Depends(get_current_user), # Changed from get_current_active_user
+        response: Response,
+        cursor: str = None,
+        limit: int = Query(100, ge=1, le=500),
+        current_user: Principal = Depends(get_current_user), # Changed from get_current_active_user
         db: AsyncSession = Depends(get_db)
 ):
     if current_user.role != UserRole.OFFICIAL:
@@ -82,5 +87,4 @@ async def get_assigned_complaints(
 
     # This logic is now correct assuming your SQL update was successful
     query = select(Complaint).where(Complaint.department_id == current_user.department_id)
-    result = await db.execute(query)
-    return result.scalars().all()
\ No newline at end of file
+    return await paginate_complaints(db, query, response, cursor, limit)
\ No newline at end of file
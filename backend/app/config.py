@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     REDIS_URL: str = "redis://localhost:6379/0"
+    CELERY_BROKER_URL: str = "redis://127.0.0.1:6379/0"  # Broker + result backend
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
     
     # AI Keys
     GROQ_API_KEY: str
@@ -18,6 +21,13 @@ class Settings(BaseSettings):
     BLOCKCHAIN_RPC_URL: str = "http://127.0.0.1:7545"
     BLOCKCHAIN_PRIVATE_KEY: str
     CONTRACT_ADDRESS: str
+    BLOCKCHAIN_ANCHOR_MODE: str = "single"  # single: one tx per complaint | batch: periodic Merkle root
+    BLOCKCHAIN_BATCH_INTERVAL_SECONDS: int = 60
+    BLOCKCHAIN_BATCH_MAX_SIZE: int = 10000
+    BLOCKCHAIN_SENDER_INTERVAL_SECONDS: int = 2  # How often the single sender drains the tx queue
+    BLOCKCHAIN_RECEIPT_POLL_SECONDS: int = 5
+    BLOCKCHAIN_PENDING_TX_TIMEOUT_SECONDS: int = 300  # Unmined this long: re-broadcast the signed tx
+    AUDIT_BLOCK_PAGE_SIZE: int = 5000  # Blocks per eth_getLogs request during integrity audits
     
     # Security
     SECRET_KEY: str = "change_me_in_production" # Generate a random string for this
@@ -30,6 +40,98 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     MAIL_FROM: str = "no-reply@prajanetra.gov.in"
+    SMTP_STARTTLS: bool = True
+    SMTP_USE_AUTH: bool = True  # Set False for a local aiosmtpd stand-in
+    SMTP_POOL_SIZE: int = 3  # Persistent authenticated connections per worker process
+
+    # Notification Outbox
+    NOTIFY_DELIVERY_INTERVAL_SECONDS: int = 10
+    NOTIFY_BATCH_SIZE: int = 50
+    NOTIFY_MAX_ATTEMPTS: int = 6
+    NOTIFY_RETRY_BASE_SECONDS: int = 30  # Doubles on every failed attempt
+    NOTIFY_DIGEST_MAX_SEVERITY: int = 0  # Severity <= this goes into the digest (0 disables digests)
+    NOTIFY_DIGEST_INTERVAL_SECONDS: int = 60 * 60
+
+    # Analysis Pipeline Concurrency
+    ANALYSIS_EVIDENCE_CONCURRENCY: int = 4  # Evidence checks in flight per complaint
+    GROQ_MAX_CONCURRENCY: int = 8  # Groq calls in flight per worker process
+    GEMINI_MAX_CONCURRENCY: int = 4  # Gemini vision calls in flight per worker process
+
+    # AI Result Cache (LLM triage + vision verdicts)
+    AI_CACHE_BACKEND: str = "memory"  # memory | redis | sqlite
+    AI_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    AI_CACHE_MAX_ENTRIES: int = 10000
+    AI_CACHE_SQLITE_PATH: str = "ai_cache.sqlite3"
+
+    # Department Routing: min cosine-similarity gap between the top-2 departments
+    # before the embedding router trusts itself instead of asking the LLM
+    DEPARTMENT_ROUTER_MARGIN: float = 0.05
+
+    # Case Clustering: similar complaints only count as "local" within this distance
+    CLUSTER_RADIUS_KM: float = 2.0
+    CLUSTER_DISTANCE_THRESHOLD: float = 0.45  # Max cosine distance between related complaints
+
+    # Offline re-clustering (app.jobs.recluster)
+    RECLUSTER_MIN_SAMPLES: int = 2  # DBSCAN core point: itself + at least one neighbour
+    RECLUSTER_BLOCK_SIZE: int = 2048  # Query rows per similarity tile
+    RECLUSTER_PAGE_SIZE: int = 5000  # Vectors per Chroma page during export
+    RECLUSTER_WORKERS: int = 0  # Parallel cells (0 = one per CPU core)
+
+    # Analytics Dashboard
+    ANALYTICS_CACHE_TTL_SECONDS: int = 15  # Summary is served from memory for this long
+    ANALYTICS_RECONCILE_HOUR: int = 3  # Nightly rollup reconcile (server local time, 0-23)
+
+    # Map Tiles
+    MAP_POINTS_MIN_ZOOM: int = 15  # Below this zoom tiles carry aggregated cells, not points
+    MAP_TILE_MAX_POINTS: int = 2000  # Per point tile (highest severity first)
+    MAP_TILE_CACHE_TTL_SECONDS: int = 30
+    MAP_TILE_CACHE_MAX_ENTRIES: int = 4096
+    MAP_CELLS_REFRESH_SECONDS: int = 60  # Rebuild of the pre-aggregated low-zoom cells
+    MAP_TILE_MAX_CELLS: int = 4096  # Larger viewports are served from coarser cells
+    MAP_ANONYMOUS_SNAP_PRECISION: int = 6  # Anonymous points are shown at their ~1 km geohash cell centre
+
+    # Uploads: per-type size limits, enforced while the upload streams in
+    UPLOAD_MAX_IMAGE_MB: int = 15
+    UPLOAD_MAX_AUDIO_MB: int = 25
+    UPLOAD_MAX_VIDEO_MB: int = 200
+    UPLOAD_MAX_DOCUMENT_MB: int = 20
+
+    # Near-duplicate image evidence (perceptual dHash, app.services.evidence_index)
+    EVIDENCE_NEAR_DUPLICATE_DISTANCE: int = 6  # Max differing bits out of 64
+    EVIDENCE_REJECT_NEAR_DUPLICATES: bool = True  # Off: accept them, but share one vision verdict
+
+    # Derived evidence images (app.utils.derived_images), built in the CPU process pool
+    EVIDENCE_ANALYSIS_MAX_PX: int = 1600  # Longest side of the copy sent to the vision model
+    EVIDENCE_THUMBNAIL_PX: int = 320
+    EVIDENCE_DERIVED_JPEG_QUALITY: int = 85
+    CPU_POOL_WORKERS: int = 2  # Image decode/encode processes per API/worker process (0 = one per core)
+
+    # EXIF capture times without an offset tag (or GPS time) are read in this zone
+    EXIF_DEFAULT_TIMEZONE: str = "Asia/Kolkata"
+
+    # Voice transcription (app.services.stt_service): recordings are split at pauses
+    STT_CHUNK_TARGET_SECONDS: int = 60
+    STT_CHUNK_MAX_SECONDS: int = 120  # Hard cut when no pause is found (stays far below the 25 MB limit)
+    STT_MAX_CONCURRENCY: int = 4  # Whisper chunk requests in flight per process
+    STT_MAX_RETRIES: int = 3  # transcribe_voice_complaint retries before the complaint is marked failed
+    STT_RETRY_DELAY_SECONDS: int = 30  # Multiplied by the attempt number
+
+    # Analysis progress events (Redis Streams + pub/sub, served as SSE)
+    PROGRESS_STREAM_MAXLEN: int = 100  # Events kept per complaint for Last-Event-ID resume
+    PROGRESS_STREAM_TTL_SECONDS: int = 60 * 60 * 24
+    PROGRESS_HEARTBEAT_SECONDS: int = 15
+    PROGRESS_RETRY_MS: int = 3000  # EventSource reconnect delay
+    PROGRESS_TOKEN_EXPIRE_SECONDS: int = 300  # Signed ?token= for EventSource (it can't send headers)
+
+    # Authenticated-user (principal) cache used by deps.get_current_user
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_REDIS: bool = False  # Share principals across API workers
+    AUTH_CACHE_LOCAL_TTL_SECONDS: int = 10  # In-process tier TTL when the Redis tier is on
+
+    # Worker Runtime
+    WORKER_CONCURRENCY: int = 16  # process_analysis pipelines in flight per worker process
+    ANALYSIS_BATCH_SIZE: int = 200  # Complaints per analyze_complaints_batch task
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
 
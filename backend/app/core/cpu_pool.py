@@ -0,0 +1,28 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from app.config import settings
+from app.core.registry import registry, lazy_service
+
+
+def _build_pool():
+    # spawn, not fork: the parent runs an event loop and client threads that must not be cloned
+    return ProcessPoolExecutor(
+        max_workers=settings.CPU_POOL_WORKERS or None,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+# Process pool for CPU-bound work (image decoding/re-encoding) that would stall an event loop
+cpu_pool = lazy_service("cpu_pool", _build_pool)
+
+
+async def run_cpu_bound(fn, *args):
+    """Runs a picklable top-level function in the process pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(registry.get("cpu_pool"), fn, *args)
+
+
+def shutdown_cpu_pool():
+    if registry.is_built("cpu_pool"):
+        cpu_pool.shutdown(wait=True, cancel_futures=True)
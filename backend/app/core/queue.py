@@ -0,0 +1,15 @@
+from celery import Celery
+from app.config import settings
+
+# The Celery app on its own, without any task code. The API imports this to enqueue
+# work by task name; only the worker process imports app.worker (and the AI stack).
+celery_app = Celery(
+    "worker",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_BROKER_URL
+)
+
+
+def enqueue(task_name: str, *args):
+    """Publishes a task by its registered name; never imports the task's module."""
+    return celery_app.send_task(task_name, args=list(args))
@@ -0,0 +1,16 @@
+from functools import lru_cache
+import redis
+import redis.asyncio
+from app.config import settings
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """Process-wide Redis client (connection pooled, thread-safe, str responses)."""
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+@lru_cache
+def get_async_redis() -> redis.asyncio.Redis:
+    """asyncio Redis client for the API process's event loop (pub/sub fan-out, streams)."""
+    return redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
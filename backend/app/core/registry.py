@@ -0,0 +1,72 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """
+    Builds heavy clients (embedding model, Chroma, web3, LLM SDKs) on first use instead
+    of at import time, so the API process only pays for what its requests actually touch.
+    Each factory runs at most once per process, even when first used from several threads.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory):
+        self._factories[name] = factory
+
+    def get(self, name: str):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                logger.info(f"⚙️ Initializing service: {name}")
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def built(self) -> list:
+        return list(self._instances)
+
+    def build_all(self):
+        """Eagerly builds every registered service (worker warm-up)."""
+        for name in list(self._factories):
+            self.get(name)
+
+
+registry = ServiceRegistry()
+
+
+class LazyService:
+    """Stands in for a registered service and builds it on first attribute access or call."""
+
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr):
+        return getattr(registry.get(self._name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(registry.get(self._name), attr, value)
+
+    def __call__(self, *args, **kwargs):
+        return registry.get(self._name)(*args, **kwargs)
+
+    def __repr__(self):
+        state = "built" if registry.is_built(self._name) else "lazy"
+        return f"<LazyService {self._name} ({state})>"
+
+
+def lazy_service(name: str, factory) -> LazyService:
+    """Registers `factory` under `name` and returns a proxy that builds it on demand."""
+    registry.register(name, factory)
+    return LazyService(name)
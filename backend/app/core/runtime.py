@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    A long-lived event loop for a worker process, running in a background thread.
+
+    Celery pool threads hand their coroutines to this loop and wait for the result,
+    so a process with N pool threads keeps N analysis pipelines in flight while
+    sharing one DB engine and one set of warmed service clients.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.loop = None
+        self._thread = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._started = threading.Event()  # Set once the startup hooks have finished
+        self._startup_hooks = []
+        self._shutdown_hooks = []
+
+    def on_startup(self, hook):
+        """Registers a coroutine function to run once the loop is up (e.g. client warm-up)."""
+        self._startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook):
+        """Registers a coroutine function to run before the loop is closed (e.g. engine.dispose)."""
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    def start(self):
+        with self._lock:
+            if self._started.is_set():
+                return
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run_forever():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run_forever, name="async-runtime", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self.loop = loop
+
+            try:
+                # The semaphore must be created on the loop that will use it
+                self._slots = self._call(self._create_slots())
+                for hook in self._startup_hooks:
+                    self._call(hook())
+            except Exception:
+                self._close_loop()  # The next run() starts over
+                raise
+
+            self._started.set()
+            logger.info(f"🔁 Async runtime started (max {self.concurrency} concurrent pipelines)")
+
+    def run(self, coro):
+        """Runs a coroutine on the shared loop and blocks the calling thread until it finishes."""
+        if not self._started.is_set():
+            try:
+                self.start()  # Other threads block on the lock until startup has finished
+            except Exception:
+                coro.close()
+                raise
+        return self._call(self._guarded(coro))
+
+    def stop(self):
+        with self._lock:
+            if not self._started.is_set():
+                return
+            self._started.clear()
+
+            for hook in self._shutdown_hooks:
+                try:
+                    self._call(hook())
+                except Exception as e:
+                    logger.error(f"Runtime shutdown hook failed: {e}")
+
+            self._close_loop()
+            logger.info("🛑 Async runtime stopped")
+
+    def _close_loop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.loop = None
+        self._thread = None
+        self._slots = None
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _create_slots(self):
+        return asyncio.Semaphore(self.concurrency)
+
+    async def _guarded(self, coro):
+        async with self._slots:
+            return await coro
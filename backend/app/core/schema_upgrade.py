@@ -0,0 +1,79 @@
+from sqlalchemy import text
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _degrees(column: str) -> str:
+    """
+    SQL turning the old string coordinates into decimal degrees: plain numbers as-is,
+    stringified (deg, min, sec) tuples converted, anything else ('', 'None') NULL.
+    """
+    parts = f"string_to_array(btrim({column}, '() '), ',')::float[]"
+    return (f"CASE WHEN btrim({column}) ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN btrim({column})::float "
+            f"WHEN {column} ~ '^\\(\\s*[0-9.]+\\s*,\\s*[0-9.]+\\s*,\\s*[0-9.]+\\s*\\)$' "
+            f"THEN ({parts})[1] + ({parts})[2] / 60 + ({parts})[3] / 3600 END")
+
+
+def _retype(table: str, column: str, from_type: str, to_type: str, using: str) -> str:
+    """ALTER COLUMN ... TYPE, skipped once the column already has the new type."""
+    return (
+        "DO $$ BEGIN "
+        f"IF (SELECT data_type FROM information_schema.columns "
+        f"WHERE table_name = '{table}' AND column_name = '{column}') = '{from_type}' THEN "
+        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {to_type} USING {using}; "
+        "END IF; END $$"
+    )
+
+
+# create_all only creates missing tables: columns and indexes added to existing tables
+# are applied here. Every statement is idempotent, so this runs on each startup.
+UPGRADE_STATEMENTS = [
+    # Complaints: anchoring, location, keyset pagination
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS manifest_hash VARCHAR(66)",
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS merkle_root VARCHAR(66)",
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS merkle_proof TEXT",
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION",
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION",
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS geohash VARCHAR(12)",
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS locality_key VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_merkle_root ON complaints (merkle_root)",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_geohash ON complaints (geohash)",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_locality_key ON complaints (locality_key)",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_lat_lon ON complaints (latitude, longitude)",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_live_filed ON complaints (filed_at, id) WHERE is_deleted = false",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_user_live_filed ON complaints (user_id, filed_at, id) "
+    "WHERE is_deleted = false",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_public_feed ON complaints (filed_at, id) "
+    "WHERE is_deleted = false AND is_anonymous = false",
+    "CREATE INDEX IF NOT EXISTS ix_complaints_department_filed ON complaints (department_id, filed_at, id)",
+
+    # Case clusters: O(1) averages, union-find merges
+    # Backfilled from the stored average, so existing clusters keep their severity
+    "ALTER TABLE case_clusters ADD COLUMN IF NOT EXISTS severity_sum DOUBLE PRECISION",
+    "UPDATE case_clusters SET severity_sum = COALESCE(avg_severity, 0) * COALESCE(complaint_count, 0) "
+    "WHERE severity_sum IS NULL",
+    "ALTER TABLE case_clusters ALTER COLUMN severity_sum SET DEFAULT 0",
+    "ALTER TABLE case_clusters ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE case_clusters ADD COLUMN IF NOT EXISTS parent_id INTEGER REFERENCES case_clusters (id)",
+    "ALTER TABLE case_clusters ADD COLUMN IF NOT EXISTS merged_at TIMESTAMP WITH TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_case_clusters_parent_id ON case_clusters (parent_id)",
+
+    # Evidence: near-duplicate detection
+    "ALTER TABLE evidence ADD COLUMN IF NOT EXISTS perceptual_hash VARCHAR(16)",
+
+    # Evidence: EXIF columns typed (were strings and a naive camera-local timestamp)
+    _retype("evidence", "latitude", "character varying", "double precision", _degrees("latitude")),
+    _retype("evidence", "longitude", "character varying", "double precision", _degrees("longitude")),
+    _retype("evidence", "captured_at", "timestamp without time zone", "timestamp with time zone",
+            f"captured_at AT TIME ZONE '{settings.EXIF_DEFAULT_TIMEZONE}'"),
+    "CREATE INDEX IF NOT EXISTS ix_evidence_lat_lon ON evidence (latitude, longitude)",
+    "CREATE INDEX IF NOT EXISTS ix_evidence_captured_at ON evidence (captured_at)",
+]
+
+
+def upgrade_schema(conn):
+    """Run inside engine.begin() via run_sync, right after Base.metadata.create_all."""
+    for statement in UPGRADE_STATEMENTS:
+        conn.execute(text(statement))
+    logger.info(f"🗄️ Schema upgrade checked ({len(UPGRADE_STATEMENTS)} statements)")
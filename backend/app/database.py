@@ -6,7 +6,10 @@ from app.config import settings
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=True, # Set to False in production to avoid logging every SQL query
-    future=True
+    future=True,
+    # Sized for the worker runtime, where many pipelines share one engine
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
 )
 
 SessionLocal = async_sessionmaker(
@@ -0,0 +1,403 @@
+"""
+Corpus-wide re-clustering.
+
+Rebuilds `case_clusters` from scratch, independent of the order complaints arrived in:
+  1. export  - every vector in the `corruption_complaints` collection is paged out of
+               Chroma into an L2-normalized float16 memmap (1M x 384 = ~730 MB on disk,
+               only one page in RAM)
+  2. graph   - complaints are grouped by geohash cell; each cell is compared against its
+               own and its 8 neighbouring cells with blocked float32 matrix multiplies,
+               cells running in parallel threads (BLAS releases the GIL)
+  3. cluster - DBSCAN over that graph: eps = the cosine distance threshold, plus the exact
+               haversine radius, with core points joined through a union-find
+  4. rebuild - clusters are replaced in one transaction and their aggregates recomputed
+               with a single set-based UPDATE
+
+Usage (from backend/):
+    python -m app.jobs.recluster --distance-threshold 0.40 --dry-run
+or enqueue the `recluster_corpus` Celery task.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from sqlalchemy import select, update, delete, insert, func, cast, text, Integer
+from app.config import settings
+from app.database import SessionLocal
+from app.models.cluster import CaseCluster
+from app.models.complaint import Complaint
+from app.utils.geo import geohash_neighbors, precision_for_radius
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+_EARTH_RADIUS_KM = 6371.0088
+
+
+class UnionFind:
+    """Array-backed union-find (path halving + union by size) over row indices."""
+
+    def __init__(self, n: int):
+        self.parent = np.arange(n, dtype=np.int64)
+        self.size = np.ones(n, dtype=np.int64)
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+
+class Corpus:
+    """The exported vectors (memmap) plus the per-row keys the clustering needs."""
+
+    def __init__(self, path: str, ids, lats, lons, groups, categories):
+        self.path = path
+        if len(ids):
+            self.matrix = np.memmap(path, dtype=np.float16, mode="r", shape=(len(ids), EMBEDDING_DIM))
+        else:
+            self.matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float16)
+        self.ids = ids
+        self.lats = lats
+        self.lons = lons
+        self.groups = groups  # Spatial group key per row ("gh5:tek3x", "loc:baner", "place:..." or None)
+        self.categories = categories
+
+    def close(self):
+        del self.matrix
+        os.remove(self.path)
+
+
+class ReclusterJob:
+    def __init__(self, distance_threshold: float, radius_km: float, min_samples: int,
+                 block_size: int, workers: int, page_size: int, scratch_dir: str = None):
+        self.distance_threshold = distance_threshold
+        self.radius_km = radius_km
+        self.min_samples = min_samples
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count()
+        self.page_size = page_size
+        self.scratch_dir = scratch_dir or tempfile.gettempdir()
+
+    # --- 1. Export
+    def export(self, live_ids: set) -> Corpus:
+        from app.services.embedding_service import collection
+
+        total = collection.count()
+        fd, path = tempfile.mkstemp(prefix="recluster-", suffix=".f16", dir=self.scratch_dir)
+        os.close(fd)
+        matrix = np.memmap(path, dtype=np.float16, mode="w+", shape=(max(total, 1), EMBEDDING_DIM))
+
+        ids, lats, lons, metadatas = [], [], [], []
+        row = 0
+        for offset in range(0, total, self.page_size):
+            page = collection.get(include=["embeddings", "metadatas"], limit=self.page_size, offset=offset)
+            keep = [i for i, cid in enumerate(page["ids"]) if int(cid) in live_ids]
+            if not keep:
+                continue
+            vectors = np.asarray([page["embeddings"][i] for i in keep], dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            matrix[row:row + len(keep)] = vectors.astype(np.float16)
+            row += len(keep)
+
+            for i in keep:
+                metadata = page["metadatas"][i] or {}
+                ids.append(int(page["ids"][i]))
+                lats.append(metadata.get("lat", np.nan))
+                lons.append(metadata.get("lon", np.nan))
+                metadatas.append(metadata)
+        matrix.flush()
+        del matrix
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        reference_lat = float(np.nanmedian(lats)) if np.isfinite(lats).any() else 0.0
+        precision = precision_for_radius(self.radius_km, reference_lat)
+
+        groups = []
+        for metadata in metadatas:
+            if f"gh{precision}" in metadata:
+                groups.append(f"gh{precision}:{metadata[f'gh{precision}']}")
+            elif metadata.get("locality"):
+                groups.append(f"loc:{metadata['locality']}")
+            elif metadata.get("place"):
+                groups.append(f"place:{metadata['place']}")  # Same fallback as the live pipeline
+            else:
+                groups.append(None)  # No spatial key -> can't be "local" to anything
+
+        # Only the first `row` rows were written (deleted complaints were skipped)
+        return Corpus(path, np.asarray(ids, dtype=np.int64), lats, lons, groups,
+                      [metadata.get("category") for metadata in metadatas])
+
+    # --- 2. Neighbourhood graph
+    @staticmethod
+    def _group_rows(corpus: Corpus) -> dict:
+        rows_by_group = {}
+        for row, group in enumerate(corpus.groups):
+            if group is not None:
+                rows_by_group.setdefault(group, []).append(row)
+        return {group: np.asarray(rows, dtype=np.int64) for group, rows in rows_by_group.items()}
+
+    @staticmethod
+    def _candidates(group: str, rows_by_group: dict) -> np.ndarray:
+        kind, key = group.split(":", 1)
+        if kind in ("loc", "place"):
+            return rows_by_group[group]  # Named areas have no neighbouring cells
+        prefix = kind + ":"
+        cells = [rows_by_group.get(prefix + cell) for cell in geohash_neighbors(key)]
+        return np.concatenate([c for c in cells if c is not None])
+
+    def _pairs(self, corpus: Corpus, query_rows: np.ndarray, candidate_rows: np.ndarray):
+        """
+        Yields (query_position, query_row, candidate_row) for every pair within eps and the
+        radius. Only one (block_size x 4*block_size) similarity tile is in memory at a time.
+        """
+        min_similarity = 1.0 - self.distance_threshold
+        for q_start in range(0, len(query_rows), self.block_size):
+            q_rows = query_rows[q_start:q_start + self.block_size]
+            q = np.asarray(corpus.matrix[q_rows], dtype=np.float32)
+            for c_start in range(0, len(candidate_rows), self.block_size * 4):
+                c_rows = candidate_rows[c_start:c_start + self.block_size * 4]
+                c = np.asarray(corpus.matrix[c_rows], dtype=np.float32)
+                qi, ci = np.nonzero(q @ c.T >= min_similarity)
+                if not len(qi):
+                    continue
+                a, b = q_rows[qi], c_rows[ci]
+
+                # Exact radius on the surviving pairs (rows placed by locality have no lat/lon)
+                lat1, lon1 = np.radians(corpus.lats[a]), np.radians(corpus.lons[a])
+                lat2, lon2 = np.radians(corpus.lats[b]), np.radians(corpus.lons[b])
+                h = (np.sin((lat2 - lat1) / 2) ** 2
+                     + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+                distance_km = 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+                close = np.isnan(distance_km) | (distance_km <= self.radius_km)
+                yield q_start + qi[close], a[close], b[close]
+
+    def _degree(self, corpus: Corpus, group: str, rows_by_group: dict):
+        query_rows = rows_by_group[group]
+        candidates = self._candidates(group, rows_by_group)
+        degree = np.zeros(len(query_rows), dtype=np.int32)
+        for positions, _, _ in self._pairs(corpus, query_rows, candidates):
+            degree += np.bincount(positions, minlength=len(query_rows)).astype(np.int32)
+        return query_rows, degree  # Includes the row itself, as DBSCAN counts it
+
+    @staticmethod
+    def _components(a: np.ndarray, b: np.ndarray):
+        """
+        Collapses an edge list to one (node, representative) pair per node with vectorized
+        min-label propagation + pointer jumping, so the caller's union-find sees O(nodes)
+        links per cell instead of O(edges).
+        """
+        nodes, inverse = np.unique(np.concatenate([a, b]), return_inverse=True)
+        u, v = inverse[:len(a)], inverse[len(a):]
+        label = np.arange(len(nodes))
+        while True:
+            previous = label.copy()
+            np.minimum.at(label, u, label[v])
+            np.minimum.at(label, v, label[u])
+            label = label[label]
+            if np.array_equal(label, previous):
+                return nodes, nodes[label]
+
+    def _core_links(self, corpus: Corpus, group: str, rows_by_group: dict, is_core: np.ndarray):
+        query_rows = rows_by_group[group]
+        candidates = self._candidates(group, rows_by_group)
+        core_a, core_b, border_a, border_b = [], [], [], []
+        for _, a, b in self._pairs(corpus, query_rows, candidates):
+            to_core = is_core[b]
+            a, b = a[to_core], b[to_core]
+            from_core = is_core[a]
+            core_a.append(a[from_core])
+            core_b.append(b[from_core])
+            border_a.append(a[~from_core])
+            border_b.append(b[~from_core])
+
+        empty = np.empty(0, dtype=np.int64)
+        nodes, reps = self._components(np.concatenate(core_a), np.concatenate(core_b)) if core_a else (empty, empty)
+        if border_a:
+            # A border row joins the first core it touches
+            border_rows, first = np.unique(np.concatenate(border_a), return_index=True)
+            border_cores = np.concatenate(border_b)[first]
+        else:
+            border_rows, border_cores = empty, empty
+        return nodes, reps, border_rows, border_cores
+
+    # --- 3. DBSCAN
+    def cluster(self, corpus: Corpus) -> np.ndarray:
+        """Returns one label per row (-1 = noise / unplaceable)."""
+        rows_by_group = self._group_rows(corpus)
+        n = len(corpus.ids)
+
+        degree = np.zeros(n, dtype=np.int32)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="recluster") as pool:
+            futures = [pool.submit(self._degree, corpus, group, rows_by_group) for group in rows_by_group]
+            for future in as_completed(futures):
+                rows, counts = future.result()
+                degree[rows] = counts
+        is_core = degree >= self.min_samples
+
+        uf = UnionFind(n)
+        border_of = np.full(n, -1, dtype=np.int64)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="recluster") as pool:
+            futures = [pool.submit(self._core_links, corpus, group, rows_by_group, is_core)
+                       for group in rows_by_group]
+            for future in as_completed(futures):
+                nodes, reps, border_rows, border_cores = future.result()
+                for x, y in zip(nodes.tolist(), reps.tolist()):
+                    uf.union(x, y)
+                unattached = border_of[border_rows] < 0
+                border_of[border_rows[unattached]] = border_cores[unattached]
+
+        labels = np.full(n, -1, dtype=np.int64)
+        for row in np.nonzero(is_core)[0].tolist():
+            labels[row] = uf.find(row)
+        for row in np.nonzero(border_of >= 0)[0].tolist():
+            labels[row] = uf.find(int(border_of[row]))
+        return labels
+
+    # --- 4. Atomic rebuild
+    @staticmethod
+    async def live_complaint_ids() -> set:
+        async with SessionLocal() as db:
+            result = await db.execute(select(Complaint.id).filter(Complaint.is_deleted == False))
+            return set(result.scalars().all())
+
+    @staticmethod
+    async def rebuild(corpus: Corpus, labels: np.ndarray) -> int:
+        groups = {}
+        for row, label in enumerate(labels.tolist()):
+            if label >= 0:
+                groups.setdefault(label, []).append(row)
+
+        async with SessionLocal() as db:
+            # Writers (the analysis pipeline) wait until the new clusters are committed
+            await db.execute(text("LOCK TABLE case_clusters IN EXCLUSIVE MODE"))
+
+            first_ids = [int(corpus.ids[rows[0]]) for rows in groups.values()]
+            locations = dict((await db.execute(
+                select(Complaint.id, Complaint.location).filter(Complaint.id.in_(first_ids)))).all())
+
+            cluster_rows = []
+            for rows in groups.values():
+                category = Counter(c for c in (corpus.categories[r] for r in rows) if c).most_common(1)
+                zone = Counter(corpus.groups[r].split(":", 1)[1] for r in rows).most_common(1)[0][0]
+                category = category[0][0] if category else None
+                cluster_rows.append({
+                    "cluster_name": f"Hotspot: {locations.get(int(corpus.ids[rows[0]]))} - {category or 'General'}",
+                    "category": category,
+                    "location_zone": zone,
+                })
+
+            await db.execute(update(Complaint).where(Complaint.cluster_id != None).values(cluster_id=None))
+            await db.execute(update(CaseCluster).values(parent_id=None))
+            await db.execute(delete(CaseCluster))
+
+            new_ids = []
+            if cluster_rows:
+                result = await db.execute(
+                    insert(CaseCluster).returning(CaseCluster.id, sort_by_parameter_order=True), cluster_rows)
+                new_ids = result.scalars().all()
+
+            assignments = [
+                {"id": int(corpus.ids[row]), "cluster_id": cluster_id}
+                for cluster_id, rows in zip(new_ids, groups.values())
+                for row in rows
+            ]
+            for i in range(0, len(assignments), 10000):
+                await db.execute(update(Complaint), assignments[i:i + 10000])
+
+            # Aggregates for every new cluster in one set-based statement
+            stats = (
+                select(Complaint.cluster_id.label("cluster_id"),
+                       func.count().label("n"),
+                       func.sum(Complaint.severity_score).label("severity_sum"),
+                       func.max(Complaint.filed_at).label("last_seen"))
+                .filter(Complaint.cluster_id != None)
+                .group_by(Complaint.cluster_id)
+                .subquery()
+            )
+            await db.execute(
+                update(CaseCluster)
+                .where(CaseCluster.id == stats.c.cluster_id)
+                .values(
+                    complaint_count=stats.c.n,
+                    severity_sum=stats.c.severity_sum,
+                    avg_severity=cast(func.round(stats.c.severity_sum * 1.0 / stats.c.n), Integer),
+                    last_seen_at=stats.c.last_seen
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return len(new_ids)
+
+    # --- Orchestration
+    def run(self, run_coroutine=asyncio.run, dry_run: bool = False) -> dict:
+        """Runs all phases; DB work goes through `run_coroutine` (the worker passes its runtime)."""
+        timings = {}
+        started = time.perf_counter()
+
+        live_ids = run_coroutine(self.live_complaint_ids())
+        t = time.perf_counter()
+        corpus = self.export(live_ids)
+        timings["export_s"] = time.perf_counter() - t
+        try:
+            t = time.perf_counter()
+            labels = self.cluster(corpus)
+            timings["cluster_s"] = time.perf_counter() - t
+
+            clustered = int((labels >= 0).sum())
+            cluster_count = len(set(labels[labels >= 0].tolist()))
+            if not dry_run:
+                t = time.perf_counter()
+                run_coroutine(self.rebuild(corpus, labels))
+                timings["rebuild_s"] = time.perf_counter() - t
+            report = {
+                "complaints": len(corpus.ids),
+                "clustered_complaints": clustered,
+                "clusters": cluster_count,
+                "matrix_mb": round(len(corpus.ids) * EMBEDDING_DIM * 2 / 2 ** 20, 1),
+                "dry_run": dry_run,
+                **{k: round(v, 2) for k, v in timings.items()},
+                "total_s": round(time.perf_counter() - started, 2),
+            }
+        finally:
+            corpus.close()
+
+        logger.info(f"🧮 Re-clustering finished: {report}")
+        return report
+
+
+def build_job(distance_threshold: float = None) -> ReclusterJob:
+    return ReclusterJob(
+        distance_threshold=distance_threshold if distance_threshold is not None else settings.CLUSTER_DISTANCE_THRESHOLD,
+        radius_km=settings.CLUSTER_RADIUS_KM,
+        min_samples=settings.RECLUSTER_MIN_SAMPLES,
+        block_size=settings.RECLUSTER_BLOCK_SIZE,
+        workers=settings.RECLUSTER_WORKERS,
+        page_size=settings.RECLUSTER_PAGE_SIZE,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--distance-threshold", type=float, default=None,
+                        help="Cosine distance eps (default CLUSTER_DISTANCE_THRESHOLD)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute clusters and report, but don't write")
+    args = parser.parse_args()
+    print(build_job(args.distance_threshold).run(dry_run=args.dry_run))
@@ -1,15 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware  # Import this
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
 from app.api.v1.endpoints import complaints, admin, auth, official, analytics
+from app.services.analytics_service import analytics_service
+from app.services.evidence_index import evidence_index
+from app.core.cpu_pool import shutdown_cpu_pool
+from app.core.schema_upgrade import upgrade_schema
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)  # Columns/indexes added to existing tables
+    async with SessionLocal() as db:
+        await analytics_service.ensure_seeded(db)
+        await evidence_index.refresh(db)  # Near-duplicate image lookup for uploads
     yield
+    shutdown_cpu_pool()
     await engine.dispose()
 
 app = FastAPI(
@@ -26,6 +35,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allow all methods (GET, POST, OPTIONS, etc.)
     allow_headers=["*"], # Allow all headers
+    expose_headers=["X-Next-Cursor", "ETag"],  # Readable by the SPA: list pagination, map tiles
 )
 # -----------------------------------
 
@@ -4,4 +4,7 @@ from .evidence import Evidence
 from .cluster import CaseCluster
 from .user import User
 from .social import Upvote
-from .notes import InternalNote
\ No newline at end of file
+from .notes import InternalNote
+from .notification import NotificationOutbox
+from .audit import AuditCheckpoint, AnchoredManifest
+from .analytics import ComplaintRollup, MapCell
\ No newline at end of file
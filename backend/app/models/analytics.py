@@ -0,0 +1,122 @@
+from collections import Counter
+from sqlalchemy import Column, Integer, String, DateTime, Float, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.complaint import Complaint, ComplaintStatus
+
+UNASSIGNED_DEPARTMENT = 0  # Rollup key for complaints not routed yet (PK columns can't be NULL)
+
+
+class ComplaintRollup(Base):
+    """Live (non-deleted) complaint counts per department x status x category."""
+    __tablename__ = "complaint_rollups"
+
+    department_id = Column(Integer, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    complaint_type = Column(String(20), primary_key=True)
+    complaint_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class MapCell(Base):
+    """
+    Pre-aggregated map cells (geohash prefix x complaint type) for low-zoom tiles, rebuilt
+    periodically by the refresh_map_cells task. The centroid sums only cover public
+    complaints, so a cell never reveals where an anonymous complaint was filed.
+    """
+    __tablename__ = "map_cells"
+
+    precision = Column(Integer, primary_key=True)
+    cell = Column(String(12), primary_key=True)
+    complaint_type = Column(String(20), primary_key=True)
+    complaint_count = Column(Integer, nullable=False, default=0)
+    max_severity = Column(Integer, nullable=False, default=0)
+    public_count = Column(Integer, nullable=False, default=0)  # Members whose position may be shown
+    lat_sum = Column(Float, nullable=False, default=0.0)
+    lon_sum = Column(Float, nullable=False, default=0.0)
+
+
+def _value(obj, name: str, old: bool):
+    """Current value, or the value before this flush when `old` is set."""
+    if old:
+        history = attributes.get_history(obj, name)
+        if history.deleted:
+            return history.deleted[0]
+    return getattr(obj, name)
+
+
+def _rollup_key(obj: Complaint, old: bool = False):
+    status = _value(obj, "status", old) or ComplaintStatus.SUBMITTED
+    complaint_type = _value(obj, "complaint_type", old)
+    return (
+        _value(obj, "department_id", old) or UNASSIGNED_DEPARTMENT,
+        getattr(status, "value", status),
+        getattr(complaint_type, "value", complaint_type),
+    )
+
+
+def _is_live(obj: Complaint, old: bool = False) -> bool:
+    return not _value(obj, "is_deleted", old)
+
+
+_PENDING_KEY = "complaint_rollup_deltas"
+
+
+@event.listens_for(Session, "before_flush")
+def track_complaint_rollups(session, flush_context, instances):
+    """
+    Turns complaint creations, status changes, routing and (soft) deletes into rollup deltas.
+    Nothing is written here: deltas accumulate on the session and are applied once at
+    commit, so the hot counter rows are locked for the commit only, not for the whole
+    transaction (the batch pipeline flushes early and then waits on LLM calls).
+    """
+    deltas = session.info.setdefault(_PENDING_KEY, Counter())
+    for obj in session.new:
+        if isinstance(obj, Complaint) and _is_live(obj):
+            deltas[_rollup_key(obj)] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Complaint) or not session.is_modified(obj):
+            continue
+        old_key, new_key = _rollup_key(obj, old=True), _rollup_key(obj)
+        was_live, is_live = _is_live(obj, old=True), _is_live(obj)
+        if (old_key, was_live) == (new_key, is_live):
+            continue
+        if was_live:
+            deltas[old_key] -= 1
+        if is_live:
+            deltas[new_key] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Complaint) and _is_live(obj, old=True):
+            deltas[_rollup_key(obj, old=True)] -= 1
+
+
+@event.listens_for(Session, "before_commit")
+def apply_complaint_rollups(session):
+    """One upsert per transaction, in the same transaction, so counters commit or roll back with it."""
+    session.flush()  # before_commit runs ahead of commit's own final flush
+    deltas = session.info.pop(_PENDING_KEY, None)
+    rows = [
+        {"department_id": key[0], "status": key[1], "complaint_type": key[2], "complaint_count": delta}
+        for key, delta in sorted(deltas.items(), key=repr) if delta  # Fixed lock order across transactions
+    ] if deltas else []
+    if not rows:
+        return
+
+    table = ComplaintRollup.__table__
+    stmt = pg_insert(table).values(rows)
+    # Core statement on the transaction's connection: no ORM autoflush re-entry
+    session.connection().execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.department_id, table.c.status, table.c.complaint_type],
+        set_={"complaint_count": table.c.complaint_count + stmt.excluded.complaint_count, "updated_at": func.now()}
+    ))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def discard_complaint_rollups(session, transaction):
+    # Rolled back or closed without commit: the flushed changes are gone, so are their deltas
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class AuditCheckpoint(Base):
+    __tablename__ = "audit_checkpoints"
+
+    id = Column(Integer, primary_key=True)  # Single row (id=1)
+    last_scanned_block = Column(BigInteger, default=-1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class AnchoredManifest(Base):
+    """Local mirror of ManifestAnchored events. No FK on purpose: it must outlive hard deletes."""
+    __tablename__ = "anchored_manifests"
+
+    complaint_id = Column(BigInteger, primary_key=True)
+    manifest_hash = Column(String(66))
+    block_number = Column(BigInteger, index=True)
+    missing_since = Column(DateTime(timezone=True), nullable=True)  # Set when first reported as deleted
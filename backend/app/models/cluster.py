@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -11,5 +11,12 @@ class CaseCluster(Base):
     location_zone = Column(String(100), index=True) # The "Pune Proximity" key
     avg_severity = Column(Integer, default=1)
     complaint_count = Column(Integer, default=1)
+    severity_sum = Column(Float, default=0)  # Maintained with complaint_count so avg is O(1)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)  # Latest member joined
+
+    # Union-find: a merged cluster points at the cluster it was absorbed into (NULL = root)
+    parent_id = Column(Integer, ForeignKey("case_clusters.id"), nullable=True, index=True)
+    merged_at = Column(DateTime(timezone=True), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,6 +1,6 @@
 import enum
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Boolean, Float, Index
+from sqlalchemy.sql import func, text
 from app.database import Base
 
 class ComplaintType(str, enum.Enum):
@@ -19,6 +19,16 @@ class ComplaintStatus(str, enum.Enum):
 
 class Complaint(Base):
     __tablename__ = "complaints"
+    __table_args__ = (
+        Index("ix_complaints_lat_lon", "latitude", "longitude"),  # Map tiles: bbox range scans
+        # Keyset pagination (filed_at, id), newest first; Postgres scans these backwards
+        Index("ix_complaints_live_filed", "filed_at", "id", postgresql_where=text("is_deleted = false")),
+        Index("ix_complaints_user_live_filed", "user_id", "filed_at", "id",
+              postgresql_where=text("is_deleted = false")),
+        Index("ix_complaints_public_feed", "filed_at", "id",
+              postgresql_where=text("is_deleted = false AND is_anonymous = false")),
+        Index("ix_complaints_department_filed", "department_id", "filed_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -29,13 +39,20 @@ class Complaint(Base):
     status = Column(Enum(ComplaintStatus), default=ComplaintStatus.SUBMITTED)
     severity_score = Column(Integer, default=1)
     location = Column(String(255))
+    latitude = Column(Float, nullable=True)  # Signed decimal degrees (evidence GPS or gazetteer centroid)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True, index=True)  # Prefix range scans = spatial cell lookups
+    locality_key = Column(String(64), nullable=True, index=True)  # Gazetteer key, e.g. "viman_nagar"
     filed_at = Column(DateTime(timezone=True), server_default=func.now())
     blockchain_hash = Column(String(255), nullable=True)
+    manifest_hash = Column(String(66), nullable=True)  # Set once analysis completes
+    merkle_root = Column(String(66), nullable=True, index=True)  # Batch anchoring: root on-chain
+    merkle_proof = Column(Text, nullable=True)  # Batch anchoring: JSON list of sibling hashes
     is_anonymous = Column(Boolean, default=False)
     
     # department_id will be linked once we create the department model
     department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
-    analysis_status = Column(String(20), default="pending") # pending, processing, completed, failed
+    analysis_status = Column(String(20), default="pending") # transcribing (voice), pending, processing, completed, failed
     cluster_id = Column(Integer, ForeignKey("case_clusters.id"), nullable=True)
 
     is_deleted = Column(Boolean, default=False)
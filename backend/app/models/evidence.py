@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Boolean, Text # Added Boolean and Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Boolean, Text, Float, Index # Added Boolean and Text
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -11,17 +11,21 @@ class FileType(str, enum.Enum):
 
 class Evidence(Base):
     __tablename__ = "evidence"
+    __table_args__ = (
+        Index("ix_evidence_lat_lon", "latitude", "longitude"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"))
     file_type = Column(Enum(FileType), nullable=False)
     file_url = Column(String, nullable=False) # Local path or Cloud URL
     file_hash = Column(String(255), unique=True, index=True, nullable=True)
+    perceptual_hash = Column(String(16), nullable=True)  # 64-bit dHash (hex) of image evidence
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # New Production-Grade Columns
-    latitude = Column(String(50), nullable=True)
-    longitude = Column(String(50), nullable=True)
-    captured_at = Column(DateTime, nullable=True)
+    latitude = Column(Float, nullable=True)  # Signed decimal degrees from the EXIF GPS block
+    longitude = Column(Float, nullable=True)
+    captured_at = Column(DateTime(timezone=True), nullable=True, index=True)  # Staleness checks
     is_valid_evidence = Column(Boolean, default=True) # For the "Truth Engine"
     validation_remarks = Column(Text, nullable=True)
\ No newline at end of file
@@ -0,0 +1,29 @@
+import enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Boolean
+from sqlalchemy.sql import func
+from app.database import Base
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    DIGESTED = "digested"  # Delivered as part of a department digest
+    FAILED = "failed"      # Gave up after NOTIFY_MAX_ATTEMPTS
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"))
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+    recipient = Column(String(100), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    severity = Column(Integer, default=1)
+    is_digest = Column(Boolean, default=False)  # Low severity: rolled into the periodic digest
+
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, index=True)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
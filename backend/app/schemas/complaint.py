@@ -25,5 +25,6 @@ class ComplaintResponse(ComplaintBase):
     summary_en: Optional[str] = None
     filed_at: datetime
     blockchain_hash: Optional[str] = None
+    analysis_status: Optional[str] = None  # transcribing, pending, processing, completed, failed
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,5 +1,29 @@
-from app.services.groq_service import analyze_complaint_text, groq_client # Import client
-from app.services.gemini_service import analyze_evidence_image
+import asyncio
+import weakref
+from app.config import settings
+from app.services.groq_service import analyze_complaint_text, groq_client, TRIAGE_MODEL, TRIAGE_PROMPT_VERSION
+from app.services.gemini_service import analyze_evidence_image, VISION_MODEL, VISION_PROMPT_VERSION, VISION_FALLBACK
+from app.services.cache_service import ai_cache, hash_text, hash_file
+
+# Max in-flight calls per provider (shared by every complaint running in this process)
+PROVIDER_LIMITS = {
+    "groq": settings.GROQ_MAX_CONCURRENCY,
+    "gemini": settings.GEMINI_MAX_CONCURRENCY,
+    "groq_stt": settings.STT_MAX_CONCURRENCY,  # Whisper chunk uploads
+}
+
+# Semaphores are bound to an event loop, so we keep one set per running loop
+_provider_semaphores = weakref.WeakKeyDictionary()
+
+
+def provider_slot(provider: str) -> asyncio.Semaphore:
+    """Returns the concurrency gate for an external AI provider."""
+    loop = asyncio.get_running_loop()
+    semaphores = _provider_semaphores.setdefault(loop, {})
+    if provider not in semaphores:
+        semaphores[provider] = asyncio.Semaphore(PROVIDER_LIMITS[provider])
+    return semaphores[provider]
+
 
 class AIService:
     def __init__(self):
@@ -7,11 +31,31 @@ class AIService:
 
     @staticmethod
     async def triage_complaint(description: str):
-        return await analyze_complaint_text(description)
+        # Re-analysis of identical text is served from the cache (zero external calls)
+        cache_key = ai_cache.make_key(TRIAGE_PROMPT_VERSION, TRIAGE_MODEL, hash_text(description))
+        cached = await ai_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        async with provider_slot("groq"):
+            result = await analyze_complaint_text(description)
+        await ai_cache.set(cache_key, result)
+        return result
 
     @staticmethod
-    async def process_evidence(file_path: str, description: str):
-        return await analyze_evidence_image(file_path, description)
+    async def process_evidence(file_path: str, description: str, file_hash: str = None):
+        # The verdict depends on both the image bytes and the complaint text it is checked against
+        image_hash = file_hash or await asyncio.to_thread(hash_file, file_path)
+        cache_key = ai_cache.make_key(VISION_PROMPT_VERSION, VISION_MODEL, hash_text(f"{image_hash}:{description}"))
+        cached = await ai_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        async with provider_slot("gemini"):
+            result = await analyze_evidence_image(file_path, description)
+        if result != VISION_FALLBACK:
+            await ai_cache.set(cache_key, result)
+        return result
 
     async def predict_department(self, description_en: str, departments: list):
         # We convert the list of DB objects into a string for the LLM
@@ -25,10 +69,13 @@ class AIService:
         Respond ONLY with the Department ID (integer).
         """
 
-        response = self.groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        # The Groq SDK is blocking, so keep it off the event loop
+        async with provider_slot("groq"):
+            response = await asyncio.to_thread(
+                self.groq_client.chat.completions.create,
+                model="llama-3.3-70b-versatile",
+                messages=[{"role": "user", "content": prompt}]
+            )
 
         try:
             return int(response.choices[0].message.content.strip())
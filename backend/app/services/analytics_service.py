@@ -0,0 +1,103 @@
+from sqlalchemy import select, delete, func, text, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.analytics import ComplaintRollup, UNASSIGNED_DEPARTMENT
+from app.models.complaint import Complaint
+from app.models.department import Department
+from app.services.cache_service import MemoryBackend, ResultCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsService:
+    """
+    Dashboard numbers come from `complaint_rollups` (maintained by session hooks, see
+    app.models.analytics) instead of GROUP BY scans over `complaints`, and the
+    assembled summary is cached for a few seconds per process.
+    """
+    SUMMARY_KEY = "stats:summary"
+
+    def __init__(self, ttl_seconds: int):
+        self.cache = ResultCache(MemoryBackend(max_entries=16, ttl_seconds=ttl_seconds), namespace="analytics")
+
+    async def get_summary(self, db: AsyncSession) -> dict:
+        cached = await self.cache.get(self.SUMMARY_KEY)
+        if cached is not None:
+            return cached
+
+        # 1. Complaints by Department (Pie Chart Data)
+        dept_query = await db.execute(
+            select(Department.name, func.sum(ComplaintRollup.complaint_count))
+            .join(ComplaintRollup, ComplaintRollup.department_id == Department.id)
+            .group_by(Department.name)
+        )
+        dept_distribution = {name: int(count) for name, count in dept_query.all() if count}
+
+        # 2. Complaints by Status (Bar Chart Data)
+        status_query = await db.execute(
+            select(ComplaintRollup.status, func.sum(ComplaintRollup.complaint_count))
+            .group_by(ComplaintRollup.status)
+        )
+        status_distribution = {status: int(count) for status, count in status_query.all() if count}
+
+        summary = {
+            "department_pie": dept_distribution,
+            "status_bar": status_distribution,
+            "total_active": sum(status_distribution.values())
+        }
+        await self.cache.set(self.SUMMARY_KEY, summary)
+        return summary
+
+    async def ensure_seeded(self, db: AsyncSession):
+        """First start after the rollup table was introduced: build it from existing complaints."""
+        has_rollups = (await db.execute(select(ComplaintRollup.department_id).limit(1))).first()
+        if has_rollups is None:
+            await self.reconcile(db)
+
+    @staticmethod
+    async def reconcile(db: AsyncSession) -> int:
+        """
+        Rebuilds the rollups from the source rows in one transaction and returns how many
+        counters had drifted (anything written by bulk UPDATEs that bypass the session hooks).
+        """
+        await db.execute(text("LOCK TABLE complaint_rollups IN EXCLUSIVE MODE"))
+
+        before = {
+            (r.department_id, r.status, r.complaint_type): r.complaint_count
+            for r in (await db.execute(select(ComplaintRollup))).scalars().all()
+        }
+        source = await db.execute(
+            select(
+                func.coalesce(Complaint.department_id, literal(UNASSIGNED_DEPARTMENT)),
+                Complaint.status,
+                Complaint.complaint_type,
+                func.count(Complaint.id)
+            )
+            .filter(Complaint.is_deleted == False)
+            .group_by(Complaint.department_id, Complaint.status, Complaint.complaint_type)
+        )
+        after = {}
+        for department_id, status, complaint_type, count in source.all():
+            status = getattr(status, "value", status) or "submitted"
+            key = (department_id, status, complaint_type.value)
+            after[key] = after.get(key, 0) + count
+
+        drift = sum(1 for key in before.keys() | after.keys() if before.get(key, 0) != after.get(key, 0))
+
+        await db.execute(delete(ComplaintRollup))
+        if after:
+            await db.execute(ComplaintRollup.__table__.insert(), [
+                {"department_id": key[0], "status": key[1], "complaint_type": key[2], "complaint_count": count}
+                for key, count in after.items()
+            ])
+        await db.commit()
+
+        if drift:
+            logger.warning(f"📊 Analytics rollups reconciled: {drift} counter(s) had drifted")
+        else:
+            logger.info("📊 Analytics rollups reconciled: no drift")
+        return drift
+
+
+analytics_service = AnalyticsService(ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS)
@@ -1,7 +1,14 @@
+from app.config import settings
 from app.services.blockchain_service import blockchain_service
 from app.models.complaint import Complaint
-from sqlalchemy import select, func
+from app.models.evidence import Evidence
+from app.models.audit import AuditCheckpoint, AnchoredManifest
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,39 +16,180 @@ logger = logging.getLogger(__name__)
 
 class AuditService:
     @staticmethod
-    async def run_integrity_audit(db: AsyncSession):
+    def _fetch_anchor_page(from_block: int, to_block: int) -> list:
+        events = blockchain_service.contract.events.ManifestAnchored.get_logs(
+            fromBlock=from_block, toBlock=to_block)
+        return [
+            {
+                "complaint_id": event['args']['complaintId'],
+                "manifest_hash": "0x" + event['args']['manifestHash'].hex().removeprefix("0x"),
+                "block_number": event['blockNumber']
+            }
+            for event in events
+        ]
+
+    @staticmethod
+    def _fetch_batch_root_page(from_block: int, to_block: int) -> list:
+        events = blockchain_service.contract.events.BatchRootAnchored.get_logs(
+            fromBlock=from_block, toBlock=to_block)
+        return ["0x" + event['args']['merkleRoot'].hex().removeprefix("0x") for event in events]
+
+    @staticmethod
+    async def _lock_checkpoint(db: AsyncSession) -> AuditCheckpoint:
+        result = await db.execute(select(AuditCheckpoint).filter(AuditCheckpoint.id == 1).with_for_update())
+        checkpoint = result.scalar_one_or_none()
+        if checkpoint is None:
+            checkpoint = AuditCheckpoint(id=1, last_scanned_block=-1)
+            db.add(checkpoint)
+        return checkpoint
+
+    @staticmethod
+    async def _verify_batch_anchored(db: AsyncSession, merkle_roots: set = None, page_size: int = 1000) -> tuple:
+        """
+        Batch-anchored complaints have no ManifestAnchored event of their own: recompute each
+        manifest and check its Merkle proof against the (mined) root it was sealed under.
+        With `merkle_roots` only the complaints sealed under those roots are checked; without,
+        every sealed complaint is. Returns (checked count, tampered ids).
+        """
+        checked, tampered, last_id = 0, [], 0
+        if merkle_roots is None:
+            scope = [Complaint.merkle_root != None, Complaint.blockchain_hash != None]
+            anchored_roots = {}  # One verifyBatchRoot call per root, not per complaint
+        elif merkle_roots:
+            scope = [Complaint.merkle_root.in_(merkle_roots)]
+            anchored_roots = dict.fromkeys(merkle_roots, True)  # Seen in BatchRootAnchored events
+        else:
+            return checked, tampered
+
+        while True:
+            complaints = (await db.execute(
+                select(Complaint)
+                .filter(*scope, Complaint.id > last_id)
+                .order_by(Complaint.id)
+                .limit(page_size)
+            )).scalars().all()
+            if not complaints:
+                break
+            last_id = complaints[-1].id
+
+            evidence_hashes = {}
+            ev_rows = await db.execute(
+                select(Evidence.complaint_id, Evidence.file_hash)
+                .filter(Evidence.complaint_id.in_([c.id for c in complaints]), Evidence.file_hash != None)
+            )
+            for complaint_id, file_hash in ev_rows.all():
+                evidence_hashes.setdefault(complaint_id, []).append(file_hash)
+
+            for c in complaints:
+                current_hash = blockchain_service.generate_manifest_hash(
+                    complaint_data={
+                        "id": c.id,
+                        "description": c.description,
+                        "severity": c.severity_score,
+                        "filed_at": c.filed_at
+                    },
+                    evidence_hashes=evidence_hashes.get(c.id, [])
+                )
+                is_valid = await blockchain_service.verify_batch_inclusion(
+                    current_hash, json.loads(c.merkle_proof or "[]"), c.merkle_root, anchored_roots
+                )
+                if not is_valid:
+                    tampered.append(c.id)
+            checked += len(complaints)
+            db.expunge_all()  # Keep the identity map bounded across pages
+        return checked, tampered
+
+    @staticmethod
+    async def run_integrity_audit(db: AsyncSession, full: bool = False):
         """
-        Scans the blockchain for ALL anchored events and
-        compares them with the current SQL database.
+        Incremental audit: only blocks after the last checkpoint are scanned (in bounded
+        pages), new ManifestAnchored events are mirrored into `anchored_manifests`, and
+        deletions are found with a DB-side anti-join. Each page commits together with the
+        checkpoint, so an interrupted audit resumes where it stopped and no lock is held
+        across the scan. Batch-anchored complaints under roots anchored in the scanned blocks
+        are checked against their Merkle roots.
+        Only deltas since the previous run are reported; `full=True` rescans from block 0
+        and re-reports everything.
         """
-        # 1. Fetch all 'ManifestAnchored' events from the Blockchain
-        # We look from block 0 to the 'latest'
-        contract = blockchain_service.contract
-        event_filter = contract.events.ManifestAnchored.create_filter(fromBlock=0)
-        blockchain_events = event_filter.get_all_entries()
+        # 1. Load the checkpoint (a full rescan resets it first)
+        checkpoint = await AuditService._lock_checkpoint(db)
+        if full:
+            checkpoint.last_scanned_block = -1
+            await db.execute(update(AnchoredManifest).values(missing_since=None))
+        from_block = checkpoint.last_scanned_block + 1
+        await db.commit()
+
+        latest_block = await asyncio.to_thread(lambda: blockchain_service.w3.eth.block_number)
+
+        # 2. Page through new blocks and mirror their anchor events, one transaction per page
+        new_anchors, new_roots = 0, set()
+        page = settings.AUDIT_BLOCK_PAGE_SIZE
+        for start in range(from_block, latest_block + 1, page):
+            end = min(start + page - 1, latest_block)
+            rows = await asyncio.to_thread(AuditService._fetch_anchor_page, start, end)
+            roots = await asyncio.to_thread(AuditService._fetch_batch_root_page, start, end)
+
+            # Row lock for this page only; a concurrent audit may have passed us already
+            checkpoint = await AuditService._lock_checkpoint(db)
+            if checkpoint.last_scanned_block < end:
+                # Insert in slices to stay under the driver's bind-parameter limit
+                for i in range(0, len(rows), 1000):
+                    await db.execute(pg_insert(AnchoredManifest).values(rows[i:i + 1000]).on_conflict_do_nothing())
+                checkpoint.last_scanned_block = end
+                new_anchors += len(rows)
+                new_roots.update(roots)
+            await db.commit()
 
-        # Extract all Complaint IDs that exist on the blockchain
-        on_chain_ids = [event['args']['complaintId'] for event in blockchain_events]
+        # 3. IDENTIFY ANOMALIES (anti-join: anchored on-chain, but no row in SQL)
+        missing_query = (
+            select(AnchoredManifest.complaint_id)
+            .outerjoin(Complaint, Complaint.id == AnchoredManifest.complaint_id)
+            .filter(Complaint.id == None, AnchoredManifest.missing_since == None)
+        )
+        newly_missing = (await db.execute(missing_query)).scalars().all()
+        if newly_missing:
+            await db.execute(
+                update(AnchoredManifest)
+                .where(AnchoredManifest.complaint_id.in_(newly_missing))
+                .values(missing_since=datetime.now(timezone.utc))
+            )
+            await db.commit()
 
-        # 2. Fetch all Complaint IDs currently in our SQL Database
-        result = await db.execute(select(Complaint.id))
-        db_ids = result.scalars().all()
+        # Soft Deleted items that are still on-chain (only those anchored in this scan)
+        archived_query = (
+            select(Complaint.id)
+            .join(AnchoredManifest, AnchoredManifest.complaint_id == Complaint.id)
+            .filter(Complaint.is_deleted == True, AnchoredManifest.block_number >= from_block)
+        )
+        soft_deleted_ids = (await db.execute(archived_query)).scalars().all()
 
-        # 3. IDENTIFY ANOMALIES
-        missing_from_db = [cid for cid in on_chain_ids if cid not in db_ids]
+        # 4. Batch-anchored complaints: Merkle proof against their on-chain root. Incremental
+        # runs check the batches whose roots were anchored in the scanned blocks; a full run
+        # recomputes every sealed complaint
+        batch_checked, batch_tampered = await AuditService._verify_batch_anchored(
+            db, None if full else new_roots)
 
-        # Check for Soft Deleted items that are still on-chain
-        res_deleted = await db.execute(select(Complaint.id).filter(Complaint.is_deleted == True))
-        soft_deleted_ids = res_deleted.scalars().all()
+        total_anchored = (await db.execute(select(func.count()).select_from(AnchoredManifest))).scalar()
+        total_missing = (await db.execute(
+            select(func.count()).select_from(AnchoredManifest).filter(AnchoredManifest.missing_since != None)
+        )).scalar()
+        total_in_db = (await db.execute(select(func.count(Complaint.id)))).scalar()
 
+        passed = total_missing == 0 and not batch_tampered
         return {
-            "total_anchored_on_blockchain": len(on_chain_ids),
-            "total_records_in_db": len(db_ids),
-            "missing_records_count": len(missing_from_db),
-            "illegally_deleted_ids": missing_from_db,  # Hard deleted (BAD!)
+            "scan_mode": "full" if full else "incremental",
+            "scanned_blocks": [from_block, latest_block],
+            "new_anchors_since_last_run": new_anchors,
+            "new_batch_roots_since_last_run": len(new_roots),
+            "total_anchored_on_blockchain": total_anchored,
+            "total_records_in_db": total_in_db,
+            "missing_records_count": total_missing,
+            "illegally_deleted_ids": newly_missing,  # Hard deleted since the last run (BAD!)
             "archived_ids": soft_deleted_ids,  # Soft deleted (Intentional)
-            "audit_status": "PASS ✅" if len(missing_from_db) == 0 else "FAIL ❌"
+            "batch_anchored_checked": batch_checked,
+            "batch_tampered_ids": batch_tampered,  # Manifest no longer matches its Merkle proof/root (BAD!)
+            "audit_status": "PASS ✅" if passed else "FAIL ❌"
         }
 
 
-audit_service = AuditService()
\ No newline at end of file
+audit_service = AuditService()
@@ -28,6 +28,13 @@ class AuthService:
         to_encode.update({"exp": expire})
         return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
+    @staticmethod
+    def create_events_token(email: str, complaint_id: int):
+        """Short-lived token for one complaint's progress stream (sent as ?token=, so narrowly scoped)."""
+        expire = datetime.utcnow() + timedelta(seconds=settings.PROGRESS_TOKEN_EXPIRE_SECONDS)
+        return jwt.encode({"sub": email, "scope": "events", "cid": complaint_id, "exp": expire},
+                          settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
     @staticmethod
     def verify_google_token(token: str):
         try:
@@ -1,13 +1,213 @@
+import asyncio
 import json
 import hashlib
+import time
+from contextlib import contextmanager
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from app.config import settings
+from app.core.redis_client import get_redis
+from app.core.registry import lazy_service
+from app.utils.merkle import verify_merkle_proof
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class TransactionSubmitter:
+    """
+    Keeps chain I/O out of the analysis pipeline:
+      * nonces come from a Redis counter (INCR is atomic across every worker process)
+      * transactions are signed locally and pushed onto a Redis queue
+      * a single sender (guarded by a Redis lock) drains that queue onto the chain
+      * receipts are polled in the background and handed back for persistence
+
+    A signed nonce is never dropped: a transaction that keeps failing is replaced by a
+    zero-value self-transfer at the same nonce, so everything queued behind it still mines.
+    """
+    QUEUE_KEY = "blockchain:tx_queue"
+    PENDING_KEY = "blockchain:pending_tx"
+    MAX_SEND_ATTEMPTS = 5
+    FILLER_GAS = 21000
+
+    def __init__(self, service, redis_client):
+        self.service = service
+        self.redis = redis_client
+        self.nonce_key = f"blockchain:nonce:{service.account.address}"
+
+    # --- Nonce management
+    def allocate_nonce(self) -> int:
+        if not self.redis.exists(self.nonce_key):
+            # First allocation after a Redis flush: seed from the chain (first process wins)
+            self.redis.set(self.nonce_key, self._chain_nonce(), nx=True)
+        return self.redis.incr(self.nonce_key) - 1
+
+    def resync_nonce(self):
+        self.redis.set(self.nonce_key, self._chain_nonce())
+        logger.warning("🔁 Nonce counter re-synced from chain")
+
+    def _chain_nonce(self) -> int:
+        return self.service.w3.eth.get_transaction_count(self.service.account.address, 'pending')
+
+    # --- Producer side (called from the pipeline)
+    def enqueue(self, function_name: str, args: list, complaint_ids: list, kind: str, gas: int) -> str:
+        """Signs a contract call and queues it. Returns the tx hash it will be mined under."""
+        job = {
+            "function": function_name,
+            "args": args,
+            "gas": gas,
+            "complaint_ids": complaint_ids,
+            "kind": kind,
+            "attempts": 0
+        }
+        self._sign(job)
+        self.redis.rpush(self.QUEUE_KEY, json.dumps(job))
+        return job["tx_hash"]
+
+    def _sign(self, job: dict, nonce: int = None):
+        job["nonce"] = self.allocate_nonce() if nonce is None else nonce
+        params = {
+            'chainId': 1337,
+            'gas': job["gas"],
+            'gasPrice': self.service.w3.to_wei('50', 'gwei'),
+            'nonce': job["nonce"],
+        }
+        if job["kind"] == "filler":
+            txn = {**params, 'to': self.service.account.address, 'value': 0}
+        else:
+            args = [Web3.to_bytes(hexstr=a) if isinstance(a, str) and a.startswith("0x") else a for a in job["args"]]
+            txn = getattr(self.service.contract.functions, job["function"])(*args).build_transaction(params)
+        signed_txn = self.service.w3.eth.account.sign_transaction(txn, private_key=settings.BLOCKCHAIN_PRIVATE_KEY)
+        job["raw"] = self.service.w3.to_hex(signed_txn.rawTransaction)
+        job["tx_hash"] = self.service.w3.to_hex(signed_txn.hash)
+
+    def _filler_for(self, job: dict) -> dict:
+        """Zero-value self-transfer that consumes an abandoned job's nonce."""
+        filler = {"function": None, "args": [], "gas": self.FILLER_GAS, "complaint_ids": [],
+                  "kind": "filler", "attempts": 0}
+        self._sign(filler, nonce=job["nonce"])
+        return filler
+
+    def _resign_queue(self, failed_job: dict):
+        """
+        After a nonce resync every queued transaction carries a stale nonce: take the whole
+        queue (atomically) and re-sign it, in order, from the fresh counter. Fillers are
+        dropped; the resync already closed the gaps they were holding.
+        """
+        pipe = self.redis.pipeline()
+        pipe.lrange(self.QUEUE_KEY, 0, -1)
+        pipe.delete(self.QUEUE_KEY)
+        queued, _ = pipe.execute()
+
+        jobs = [failed_job] + [json.loads(raw) for raw in queued]
+        jobs = [job for job in jobs if job["kind"] != "filler"]
+        for job in jobs:
+            self._sign(job)
+        if jobs:
+            # Ahead of anything producers pushed meanwhile: their nonces are higher
+            self.redis.lpush(self.QUEUE_KEY, *[json.dumps(job) for job in reversed(jobs)])
+        logger.warning(f"🔁 Re-signed {len(jobs)} queued transaction(s)")
+
+    # --- Consumer side (periodic tasks)
+    @contextmanager
+    def exclusive(self, role: str, timeout: int = 60):
+        """Yields True only in the one process currently holding the role's Redis lock."""
+        lock = self.redis.lock(f"blockchain:lock:{role}", timeout=timeout)
+        acquired = lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+
+    def drain(self, max_items: int = 200) -> tuple:
+        """
+        Sends queued transactions in FIFO order. Only call while holding the 'sender' role.
+        Returns (sent count, abandoned jobs); the caller releases the abandoned jobs' complaints.
+        """
+        sent, abandoned = 0, []
+        for _ in range(max_items):
+            raw_job = self.redis.lpop(self.QUEUE_KEY)
+            if raw_job is None:
+                break
+            job = json.loads(raw_job)
+
+            try:
+                self.service.w3.eth.send_raw_transaction(job["raw"])
+            except Exception as e:
+                job["attempts"] += 1
+                if "nonce" in str(e).lower():
+                    # Someone else used the account (or Redis lost the counter): re-sign everything queued
+                    self.resync_nonce()
+                    self._resign_queue(job)
+                    break
+                if job["attempts"] >= self.MAX_SEND_ATTEMPTS and job["kind"] != "filler":
+                    logger.error(f"❌ Giving up on tx for complaints {job['complaint_ids'][:5]}..., "
+                                 f"nonce {job['nonce']} goes to a filler: {e}")
+                    abandoned.append(job)
+                    job = self._filler_for(job)
+                else:
+                    logger.warning(f"Send failed (attempt {job['attempts']}), requeued: {e}")
+                # Back at the head: later nonces can't mine before this one anyway
+                self.redis.lpush(self.QUEUE_KEY, json.dumps(job))
+                break
+
+            job["sent_at"] = time.time()
+            self.redis.hset(self.PENDING_KEY, job["tx_hash"], json.dumps(job))
+            sent += 1
+        return sent, abandoned
+
+    def poll_receipts(self) -> list:
+        """
+        Returns [(job, succeeded)] for sent transactions that have been mined. Transactions
+        unmined past BLOCKCHAIN_PENDING_TX_TIMEOUT_SECONDS are re-broadcast; one whose nonce
+        was consumed by another transaction can never mine and is reported as failed.
+        """
+        outcomes, fillers = [], []
+        for tx_hash, raw_job in self.redis.hgetall(self.PENDING_KEY).items():
+            job = json.loads(raw_job)
+            try:
+                receipt = self.service.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                if time.time() - job["sent_at"] >= settings.BLOCKCHAIN_PENDING_TX_TIMEOUT_SECONDS:
+                    if not self._rebroadcast(job):
+                        outcomes.append((job, False))
+                continue  # Still pending
+            if job["kind"] == "filler":
+                fillers.append(job["tx_hash"])
+            else:
+                outcomes.append((job, receipt.status == 1))
+        self.acknowledge(fillers)
+        return outcomes
+
+    def _rebroadcast(self, job: dict) -> bool:
+        """Re-sends a stuck transaction. False when its nonce is already used by another tx."""
+        try:
+            self.service.w3.eth.send_raw_transaction(job["raw"])
+        except Exception as e:
+            message = str(e).lower()
+            if "nonce" in message and "known" not in message:
+                try:
+                    self.service.w3.eth.get_transaction_receipt(job["tx_hash"])
+                    return True  # Mined in the meantime; the next poll picks it up
+                except TransactionNotFound:
+                    logger.error(f"❌ Tx {job['tx_hash']} expired: nonce {job['nonce']} was used by another tx")
+                    return False
+            if "known" not in message:
+                logger.warning(f"Re-broadcast of {job['tx_hash']} failed: {e}")
+        job["sent_at"] = time.time()
+        job["rebroadcasts"] = job.get("rebroadcasts", 0) + 1
+        self.redis.hset(self.PENDING_KEY, job["tx_hash"], json.dumps(job))
+        logger.warning(f"📡 Re-broadcast tx {job['tx_hash']} (nonce {job['nonce']})")
+        return True
+
+    def acknowledge(self, tx_hashes: list):
+        """Forgets transactions once their outcome has been persisted."""
+        if tx_hashes:
+            self.redis.hdel(self.PENDING_KEY, *tx_hashes)
+
+
 class BlockchainService:
     def __init__(self):
         self.w3 = Web3(Web3.HTTPProvider(settings.BLOCKCHAIN_RPC_URL))
@@ -42,10 +242,38 @@ class BlockchainService:
                         "outputs": [{"internalType": "bytes32", "name": "", "type": "bytes32"}],
                         "stateMutability": "view",
                         "type": "function"
+                    },
+                    {
+                        "anonymous": false,
+                        "inputs": [
+                            {"indexed": true, "internalType": "uint256", "name": "batchId", "type": "uint256"},
+                            {"indexed": false, "internalType": "bytes32", "name": "merkleRoot", "type": "bytes32"},
+                            {"indexed": false, "internalType": "uint256", "name": "leafCount", "type": "uint256"}
+                        ],
+                        "name": "BatchRootAnchored",
+                        "type": "event"
+                    },
+                    {
+                        "inputs": [
+                            {"internalType": "bytes32", "name": "_merkleRoot", "type": "bytes32"},
+                            {"internalType": "uint256", "name": "_leafCount", "type": "uint256"}
+                        ],
+                        "name": "anchorBatchRoot",
+                        "outputs": [],
+                        "stateMutability": "nonpayable",
+                        "type": "function"
+                    },
+                    {
+                        "inputs": [{"internalType": "bytes32", "name": "_merkleRoot", "type": "bytes32"}],
+                        "name": "verifyBatchRoot",
+                        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+                        "stateMutability": "view",
+                        "type": "function"
                     }
                 ]
                 """)
         self.contract = self.w3.eth.contract(address=self.contract_address, abi=self.abi)
+        self.submitter = TransactionSubmitter(self, get_redis())
 
     def generate_manifest_hash(self, complaint_data: dict, evidence_hashes: list) -> str:
         """Creates a deterministic fingerprint. Uses UNIX timestamp for 100% consistency."""
@@ -66,7 +294,7 @@ class BlockchainService:
         manifest_string = json.dumps(manifest, sort_keys=True, separators=(',', ':'))
 
         # Debug log to see exactly what we are hashing (Check this in Celery logs)
-        logger.info(f"🧬 Hashing Manifest: {manifest_string}")
+        logger.debug(f"🧬 Hashing Manifest: {manifest_string}")
 
         return self.w3.keccak(text=manifest_string).hex()
 
@@ -92,26 +320,51 @@ class BlockchainService:
             logger.error(f"Verification error: {e}")
             return False
 
+    async def verify_batch_inclusion(self, current_manifest_hash: str, proof: list, merkle_root: str,
+                                     anchored_roots: dict = None) -> bool:
+        """
+        Batch mode: the manifest must hash up to `merkle_root`, and that root must be on-chain.
+        `anchored_roots` memoizes root lookups across calls (audits share a root per batch).
+        """
+        try:
+            if not verify_merkle_proof(current_manifest_hash, proof, merkle_root):
+                logger.error(f"❌ MISMATCH: manifest {current_manifest_hash} is not included in root {merkle_root}")
+                return False
+
+            if anchored_roots is not None and merkle_root in anchored_roots:
+                return anchored_roots[merkle_root]
+            anchored_at = self.contract.functions.verifyBatchRoot(Web3.to_bytes(hexstr=merkle_root)).call()
+            if not anchored_at:
+                logger.error(f"❌ Merkle root {merkle_root} was never anchored on-chain")
+            if anchored_roots is not None:
+                anchored_roots[merkle_root] = anchored_at > 0
+            return anchored_at > 0
+        except Exception as e:
+            logger.error(f"Batch verification error: {e}")
+            return False
+
+    async def anchor_batch_root(self, merkle_root: str, complaint_ids: list):
+        """Queues one anchorBatchRoot transaction covering a whole batch of manifests."""
+        return await asyncio.to_thread(
+            self.submitter.enqueue,
+            "anchorBatchRoot", [merkle_root, len(complaint_ids)], complaint_ids, "batch",
+            200000  # Constant cost regardless of how many complaints the root covers
+        )
+
     async def anchor_to_blockchain(self, complaint_id: int, manifest_hash: str):
-        """Sends the hash to the Smart Contract (keep existing logic)."""
+        """
+        Signs the anchor transaction locally and queues it. Never waits on the chain:
+        the sender task broadcasts it and the receipt poller records the outcome.
+        """
         try:
-            nonce = self.w3.eth.get_transaction_count(self.account.address,
-                                                      'pending')  # Use 'pending' to avoid nonce gaps
-            txn = self.contract.functions.anchorManifest(
-                complaint_id,
-                Web3.to_bytes(hexstr=manifest_hash)
-            ).build_transaction({
-                'chainId': 1337,
-                'gas': 500000,
-                'gasPrice': self.w3.to_wei('50', 'gwei'),
-                'nonce': nonce,
-            })
-            signed_txn = self.w3.eth.account.sign_transaction(txn, private_key=settings.BLOCKCHAIN_PRIVATE_KEY)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            return self.w3.to_hex(tx_hash)
+            return await asyncio.to_thread(
+                self.submitter.enqueue,
+                "anchorManifest", [complaint_id, manifest_hash], [complaint_id], "single", 500000
+            )
         except Exception as e:
             logger.error(f"Anchoring failed: {e}")
             return None
 
 
-blockchain_service = BlockchainService()
\ No newline at end of file
+# Connected on first use, so importing this module never touches the RPC node
+blockchain_service = lazy_service("blockchain", BlockchainService)
\ No newline at end of file
@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(file_path: str) -> str:
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL. Cheap enough to call directly on the event loop."""
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl_seconds: int = None):
+        expires_at = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Evict least recently used
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """Local file cache that survives worker restarts. Evicts expired rows, then the oldest ones."""
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_created ON cache_entries (created_at)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value, ttl_seconds: int = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + (ttl_seconds or self.ttl_seconds), now)
+            )
+            self._writes += 1
+            # Amortize eviction: only sweep every 100 writes
+            if self._writes % 100 == 0:
+                self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN ("
+                    "SELECT key FROM cache_entries ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+
+
+class RedisBackend:
+    """
+    Shared cache for every API/worker process. TTL is enforced by Redis itself;
+    size-based eviction is delegated to the server's maxmemory-policy (allkeys-lru).
+    """
+    blocking = True
+
+    def __init__(self, prefix: str, ttl_seconds: int):
+        self.client = get_redis()
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value, ttl_seconds: int = None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl_seconds or self.ttl_seconds)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class ResultCache:
+    """
+    Content-addressed cache: entries are keyed by (prompt version, model, input hash),
+    so bumping a prompt version or switching models naturally invalidates old results.
+    """
+
+    STATS_FLUSH_SECONDS = 5
+    STATS_FLUSH_LOOKUPS = 100
+
+    def __init__(self, backend, namespace: str, shared_stats: bool = False):
+        self.backend = backend
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        # Shared counters: every process adds its lookups to praja:<namespace>:stats:* in
+        # Redis (batched), so the API reports what the workers actually saw
+        self.stats_prefix = f"praja:{namespace}:stats:" if shared_stats else None
+        self._unflushed = {"hits": 0, "misses": 0}
+        self._last_flush = time.monotonic()
+
+    def make_key(self, prompt_version: str, model: str, input_hash: str) -> str:
+        return f"{self.namespace}:{prompt_version}:{model}:{input_hash}"
+
+    async def get(self, key: str):
+        try:
+            if self.backend.blocking:
+                value = await asyncio.to_thread(self.backend.get, key)
+            else:
+                value = self.backend.get(key)
+        except Exception as e:
+            # A broken cache must never break the analysis pipeline
+            logger.error(f"Cache read failed ({self.namespace}): {e}")
+            value = None
+
+        counter = "misses" if value is None else "hits"
+        setattr(self, counter, getattr(self, counter) + 1)
+        if self.stats_prefix:
+            self._unflushed[counter] += 1
+            if (sum(self._unflushed.values()) >= self.STATS_FLUSH_LOOKUPS
+                    or time.monotonic() - self._last_flush >= self.STATS_FLUSH_SECONDS):
+                await self.flush_stats()
+        return value
+
+    async def flush_stats(self):
+        if not self.stats_prefix or not any(self._unflushed.values()):
+            return
+        pending, self._unflushed = self._unflushed, {"hits": 0, "misses": 0}
+        self._last_flush = time.monotonic()
+
+        def incr():
+            pipe = get_redis().pipeline(transaction=False)
+            for counter, count in pending.items():
+                if count:
+                    pipe.incrby(self.stats_prefix + counter, count)
+            pipe.execute()
+
+        try:
+            await asyncio.to_thread(incr)
+        except Exception as e:
+            logger.error(f"Cache stats flush failed ({self.namespace}): {e}")
+
+    async def set(self, key: str, value, ttl_seconds: int = None):
+        try:
+            if self.backend.blocking:
+                await asyncio.to_thread(self.backend.set, key, value, ttl_seconds)
+            else:
+                self.backend.set(key, value, ttl_seconds)
+        except Exception as e:
+            logger.error(f"Cache write failed ({self.namespace}): {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    async def shared_stats(self) -> dict:
+        """
+        Counters summed over every API/worker process. Each process pushes its counts every
+        STATS_FLUSH_LOOKUPS lookups or STATS_FLUSH_SECONDS (checked on lookup) and on shutdown.
+        """
+        if not self.stats_prefix:
+            return self.stats()
+        await self.flush_stats()
+        hits, misses = await asyncio.to_thread(
+            get_redis().mget, self.stats_prefix + "hits", self.stats_prefix + "misses")
+        hits, misses = int(hits or 0), int(misses or 0)
+        lookups = hits + misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.backend).__name__,
+            "scope": "all processes",
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def build_backend(kind: str, namespace: str, max_entries: int, ttl_seconds: int):
+    if kind == "redis":
+        return RedisBackend(prefix=f"praja:{namespace}:", ttl_seconds=ttl_seconds)
+    if kind == "sqlite":
+        return SQLiteBackend(settings.AI_CACHE_SQLITE_PATH, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    return MemoryBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+
+# Cache for LLM triage + vision verdicts
+ai_cache = ResultCache(
+    build_backend(settings.AI_CACHE_BACKEND, "ai", settings.AI_CACHE_MAX_ENTRIES, settings.AI_CACHE_TTL_SECONDS),
+    namespace="ai",
+    shared_stats=True  # Workers do the lookups, the admin API reports them
+)
@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, update, func, cast, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.cluster import CaseCluster
+from app.models.complaint import Complaint
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ClusterService:
+    """
+    Incremental cluster maintenance:
+      * count / severity_sum / avg_severity / last_seen_at move by deltas in one UPDATE,
+        so joining a cluster never re-counts its members
+      * clusters that turn out to overlap are unioned: the smaller root gets a
+        `parent_id` pointing at the larger one (union by size, persisted in the DB)
+      * members of absorbed clusters are moved in one bulk UPDATE
+    """
+
+    @staticmethod
+    async def find_root(db: AsyncSession, cluster_id: int) -> int:
+        """Follows parent_id to the live cluster, compressing the path it walked."""
+        path = []
+        current = cluster_id
+        while True:
+            parent = (await db.execute(
+                select(CaseCluster.parent_id).filter(CaseCluster.id == current))).scalar()
+            if parent is None:
+                break
+            path.append(current)
+            current = parent
+
+        if len(path) > 1:
+            await db.execute(update(CaseCluster).where(CaseCluster.id.in_(path)).values(parent_id=current))
+        return current
+
+    @staticmethod
+    async def _bump(db: AsyncSession, cluster_id: int, count_delta: int, severity_delta: float):
+        """O(1) aggregate maintenance: every SET reads the pre-update row, so this is one atomic step."""
+        new_count = CaseCluster.complaint_count + count_delta
+        new_sum = CaseCluster.severity_sum + severity_delta
+        await db.execute(
+            update(CaseCluster)
+            .where(CaseCluster.id == cluster_id)
+            .values(
+                complaint_count=new_count,
+                severity_sum=new_sum,
+                avg_severity=cast(func.round(new_sum / func.nullif(new_count, 0)), Integer),
+                last_seen_at=datetime.now(timezone.utc)
+            )
+        )
+
+    async def _union(self, db: AsyncSession, roots: set) -> int:
+        """Merges every root into the largest one and returns the surviving root."""
+        # Lock in id order so two workers merging overlapping sets can't deadlock
+        result = await db.execute(
+            select(CaseCluster).filter(CaseCluster.id.in_(roots)).order_by(CaseCluster.id).with_for_update())
+        clusters = result.scalars().all()
+        survivor = max(clusters, key=lambda c: (c.complaint_count or 0, -c.id))
+        absorbed = [c for c in clusters if c.id != survivor.id]
+        if not absorbed:
+            return survivor.id
+
+        now = datetime.now(timezone.utc)
+        await db.execute(
+            update(CaseCluster)
+            .where(CaseCluster.id.in_([c.id for c in absorbed]))
+            .values(parent_id=survivor.id, merged_at=now)
+        )
+        # One bulk move for every member of every absorbed cluster
+        await db.execute(
+            update(Complaint)
+            .where(Complaint.cluster_id.in_([c.id for c in absorbed]))
+            .values(cluster_id=survivor.id)
+        )
+        await self._bump(db, survivor.id,
+                         sum(c.complaint_count or 0 for c in absorbed),
+                         sum(c.severity_sum or 0 for c in absorbed))
+        logger.warning(f"🔗 Merged clusters {[c.id for c in absorbed]} into {survivor.id}")
+        return survivor.id
+
+    async def assign(self, db: AsyncSession, db_complaint: Complaint, match_ids: list, severity: float,
+                     cluster_name: str, category: str, location_zone: str) -> int:
+        """
+        Puts a complaint and its local matches into one cluster. Existing clusters among the
+        matches are unioned; a new cluster is only created when none of them has one.
+        Returns the id of the cluster the complaint ended up in.
+        """
+        other_ids = [cid for cid in match_ids if cid != db_complaint.id]
+        rows = (await db.execute(
+            select(Complaint.id, Complaint.cluster_id).filter(Complaint.id.in_(other_ids)))).all()
+
+        roots = set()
+        for cluster_id in {row.cluster_id for row in rows if row.cluster_id} | (
+                {db_complaint.cluster_id} if db_complaint.cluster_id else set()):
+            roots.add(await self.find_root(db, cluster_id))
+
+        if roots:
+            root_id = await self._union(db, roots)
+        else:
+            new_cluster = CaseCluster(
+                cluster_name=cluster_name,
+                category=category,
+                location_zone=location_zone,
+                avg_severity=int(round(severity)),
+                complaint_count=0,
+                severity_sum=0
+            )
+            db.add(new_cluster)
+            await db.flush()  # Secure the ID
+            root_id = new_cluster.id
+
+        # Back-link matches that weren't in any cluster yet (one bulk UPDATE)
+        joined = (await db.execute(
+            update(Complaint)
+            .where(Complaint.id.in_([row.id for row in rows if not row.cluster_id]))
+            .where(Complaint.cluster_id == None)
+            .values(cluster_id=root_id)
+            .returning(Complaint.severity_score)
+        )).scalars().all()
+
+        # A re-analysed complaint that was already a member isn't counted twice: its
+        # severity_score is what the cluster holds for it, so only the change moves the sum
+        is_new_member = db_complaint.cluster_id is None
+        counted = int(round(severity))
+        previous = 0 if is_new_member else (db_complaint.severity_score or 0)
+        db_complaint.cluster_id = root_id
+        db_complaint.severity_score = counted
+        await self._bump(db, root_id,
+                         len(joined) + (1 if is_new_member else 0),
+                         sum(s or 0 for s in joined) + counted - previous)
+        return root_id
+
+    async def rescore(self, db: AsyncSession, db_complaint: Complaint, severity: int):
+        """Sets a complaint's severity_score and moves its cluster's severity_sum by the difference."""
+        previous = db_complaint.severity_score or 0
+        db_complaint.severity_score = severity
+        if db_complaint.cluster_id and severity != previous:
+            root_id = await self.find_root(db, db_complaint.cluster_id)
+            await self._bump(db, root_id, 0, severity - previous)
+
+
+cluster_service = ClusterService()
@@ -0,0 +1,78 @@
+import hashlib
+import logging
+import threading
+import numpy as np
+from app.config import settings
+from app.services.ai_service import ai_service
+from app.services.embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+class DepartmentRouter:
+    """
+    Routes a complaint to the nearest department in MiniLM embedding space.
+    The LLM (ai_service.predict_department) is only consulted when the best and
+    second-best departments are within `margin_threshold` cosine similarity.
+    """
+
+    def __init__(self, margin_threshold: float):
+        self.margin_threshold = margin_threshold
+        self.local_routes = 0
+        self.llm_fallbacks = 0
+        self._fingerprint = None
+        self._dept_ids = []
+        self._matrix = None  # (n_departments, dim), L2-normalized
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint_of(departments: list) -> str:
+        rows = sorted((d.id, d.name or "", d.description or "") for d in departments)
+        return hashlib.sha256(repr(rows).encode()).hexdigest()
+
+    @staticmethod
+    async def _encode(texts: list) -> np.ndarray:
+        # Through the embedding service's single model thread, never a second concurrent encode
+        vectors = np.asarray(await embedding_service.embed(texts), dtype=np.float32)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    async def refresh(self, departments: list):
+        """Re-embeds the departments only when their rows have changed since the last call."""
+        fingerprint = self._fingerprint_of(departments)
+        if fingerprint == self._fingerprint:
+            return
+        matrix = await self._encode([f"{d.name}. {d.description or ''}" for d in departments])
+        with self._lock:
+            self._matrix = matrix
+            self._dept_ids = [d.id for d in departments]
+            self._fingerprint = fingerprint
+        logger.info(f"🧭 Department embeddings refreshed ({len(departments)} departments)")
+
+    async def rank(self, text: str, departments: list) -> list:
+        """Returns [(department_id, cosine_similarity), ...] best first."""
+        await self.refresh(departments)
+        query = (await self._encode([text]))[0]
+        with self._lock:
+            scores = self._matrix @ query
+            dept_ids = list(self._dept_ids)
+        order = np.argsort(-scores)
+        return [(dept_ids[i], float(scores[i])) for i in order]
+
+    async def route(self, description_en: str, departments: list):
+        """Returns (department_id, source) where source is 'embedding' or 'llm'."""
+        if not departments:
+            return None, None
+
+        ranked = await self.rank(description_en, departments)
+        margin = ranked[0][1] - ranked[1][1] if len(ranked) > 1 else float("inf")
+
+        if margin >= self.margin_threshold:
+            self.local_routes += 1
+            return ranked[0][0], "embedding"
+
+        # Too close to call locally -> ask the LLM
+        self.llm_fallbacks += 1
+        return await ai_service.predict_department(description_en, departments), "llm"
+
+
+department_router = DepartmentRouter(margin_threshold=settings.DEPARTMENT_ROUTER_MARGIN)
@@ -1,54 +1,141 @@
-import chromadb
-from chromadb.utils import embedding_functions
 from app.config import settings
+from app.core.registry import lazy_service, registry
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import json
 import os
 
 # Ensure the vector store directory exists
 CHROMA_DATA_PATH = "chroma_db"
-os.makedirs(CHROMA_DATA_PATH, exist_ok=True)
 
-# Initialize Persistent Client (Production-grade storage)
-chroma_client = chromadb.PersistentClient(path=CHROMA_DATA_PATH)
 
-# Use a local, free embedding model (No API key required)
-default_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+def _build_chroma_client():
+    # Initialize Persistent Client (Production-grade storage)
+    import chromadb
+    os.makedirs(CHROMA_DATA_PATH, exist_ok=True)
+    return chromadb.PersistentClient(path=CHROMA_DATA_PATH)
 
-# Get or create the 'complaints' collection
-collection = chroma_client.get_or_create_collection(
-    name="corruption_complaints",
-    embedding_function=default_ef,
-    metadata={"hnsw:space": "cosine"}  # Using Cosine similarity for better semantic matching
-)
+
+def _build_embedding_function():
+    # Use a local, free embedding model (No API key required)
+    from chromadb.utils import embedding_functions
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+
+
+def _build_collection():
+    # Get or create the 'complaints' collection
+    return registry.get("chroma").get_or_create_collection(
+        name="corruption_complaints",
+        embedding_function=registry.get("embedding_model"),
+        metadata={"hnsw:space": "cosine"}  # Using Cosine similarity for better semantic matching
+    )
+
+
+# Nothing heavy happens at import: the model and the store load on first use
+chroma_client = lazy_service("chroma", _build_chroma_client)
+default_ef = lazy_service("embedding_model", _build_embedding_function)
+collection = lazy_service("complaint_collection", _build_collection)
+
+
+# One dedicated thread owns model inference + Chroma I/O, so neither ever runs on the event loop
+# (torch releases the GIL while encoding, and parallelizes internally across cores)
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+
+
+async def _off_loop(fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(_executor, partial(fn, *args, **kwargs))
 
 
 class EmbeddingService:
+    @staticmethod
+    async def warm_up():
+        """Runs one tiny encode so the first real complaint doesn't pay model start-up cost."""
+        await _off_loop(default_ef, ["warm-up"])
+
+    @staticmethod
+    async def embed(texts: list) -> list:
+        """Encodes a batch of texts in one forward pass (off the event loop)."""
+        return await _off_loop(default_ef, texts)
+
     @staticmethod
     async def index_complaint(complaint_id: int, text: str, metadata: dict):
         """Stores a complaint in the vector database."""
-        collection.add(
-            ids=[str(complaint_id)],
-            documents=[text],
-            metadatas=[metadata]
-        )
+        await EmbeddingService.index_many([complaint_id], [text], [metadata])
 
     @staticmethod
-    async def find_similar_cases(text: str, limit: int = 5, distance_threshold: float = 0.5):
-        """Searches for semantically similar complaints."""
-        results = collection.query(
-            query_texts=[text],
-            n_results=limit
+    async def index_many(complaint_ids: list, texts: list, metadatas: list, embeddings: list = None) -> list:
+        """
+        Stores many complaints with a single embedding batch and a single Chroma upsert.
+        Returns the vectors so callers can query with them without encoding again.
+        """
+        if embeddings is None:
+            embeddings = await EmbeddingService.embed(texts)
+        await _off_loop(
+            collection.upsert,
+            ids=[str(cid) for cid in complaint_ids],
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=metadatas
         )
+        return embeddings
+
+    @staticmethod
+    async def find_similar_cases(text: str, limit: int = 5, distance_threshold: float = 0.5, where: dict = None):
+        """Searches for semantically similar complaints (optionally inside a metadata filter)."""
+        matches = await EmbeddingService.query_many(texts=[text], limit=limit, distance_threshold=distance_threshold,
+                                                    where=where)
+        return matches[0]
+
+    @staticmethod
+    async def query_many(texts: list = None, embeddings: list = None, limit: int = 5,
+                         distance_threshold: float = 0.5, where=None):
+        """
+        Batched similarity search: one encode pass, one result list per input.
+        `where` is either one Chroma filter for every row or a list with one filter per row;
+        rows sharing a filter go out as a single multi-vector query.
+        """
+        if embeddings is None:
+            embeddings = await EmbeddingService.embed(texts)
+        wheres = where if isinstance(where, list) else [where] * len(embeddings)
 
+        groups = {}
+        for row, row_where in enumerate(wheres):
+            groups.setdefault(json.dumps(row_where, sort_keys=True), []).append(row)
+
+        matches = [None] * len(embeddings)
+        for group_key, rows in groups.items():
+            results = await _off_loop(
+                collection.query,
+                query_embeddings=[embeddings[row] for row in rows],
+                n_results=limit,
+                where=json.loads(group_key)
+            )
+            for position, row in enumerate(rows):
+                matches[row] = EmbeddingService._close_matches(results, position, distance_threshold)
+        return matches
+
+    @staticmethod
+    async def index_and_query(complaint_id: int, text: str, metadata: dict, limit: int = 5,
+                              distance_threshold: float = 0.5, where: dict = None):
+        """Indexes a complaint and finds its neighbours using a single encode of its text."""
+        embeddings = await EmbeddingService.index_many([complaint_id], [text], [metadata])
+        matches = await EmbeddingService.query_many(embeddings=embeddings, limit=limit,
+                                                    distance_threshold=distance_threshold, where=where)
+        return matches[0]
+
+    @staticmethod
+    def _close_matches(results: dict, row: int, distance_threshold: float):
         # Filter results based on distance (closer to 0 is more similar)
         # We only return cases that are 'close enough'
         similar_cases = []
-        if results['ids'][0]:
-            for i in range(len(results['ids'][0])):
-                if results['distances'][0][i] < distance_threshold:
+        if results['ids'][row]:
+            for i in range(len(results['ids'][row])):
+                if results['distances'][row][i] < distance_threshold:
                     similar_cases.append({
-                        "id": results['ids'][0][i],
-                        "distance": results['distances'][0][i],
-                        "metadata": results['metadatas'][0][i]
+                        "id": results['ids'][row][i],
+                        "distance": results['distances'][row][i],
+                        "metadata": results['metadatas'][row][i]
                     })
         return similar_cases
 
@@ -0,0 +1,118 @@
+from itertools import combinations
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.evidence import Evidence
+from app.utils.image_hash import HASH_BITS, hamming
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SUBSTRINGS = 4  # 64-bit hash -> four 16-bit keys
+_SUBSTRING_BITS = HASH_BITS // _SUBSTRINGS
+_SUBSTRING_MASK = (1 << _SUBSTRING_BITS) - 1
+
+
+def _substrings(value: int):
+    return [(value >> (i * _SUBSTRING_BITS)) & _SUBSTRING_MASK for i in range(_SUBSTRINGS)]
+
+
+def _flip_masks(radius: int) -> list:
+    """Every 16-bit mask with at most `radius` bits set (1 + 16 masks for radius 1)."""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(_SUBSTRING_BITS), r):
+            masks.append(sum(1 << b for b in bits))
+    return masks
+
+
+class EvidenceImageIndex:
+    """
+    Near-duplicate lookup over image perceptual hashes (multi-index hashing).
+    Each 64-bit dHash is split into four 16-bit substrings with one hash table each. Two
+    hashes within Hamming distance r agree to within r // 4 bits on at least one
+    substring (pigeonhole), so a query probes a few dozen buckets and verifies only the
+    candidates found there, which stays sub-millisecond at millions of images.
+
+    Loaded from the evidence table on startup; `refresh` then pulls only rows newer than
+    the last one seen, so other API/worker processes' uploads show up too.
+    """
+
+    def __init__(self, radius: int):
+        self.radius = radius
+        self._flips = _flip_masks(radius // _SUBSTRINGS)
+        self._tables = [{} for _ in range(_SUBSTRINGS)]
+        self._hashes = []  # Parallel arrays: position -> hash / evidence id / file hash
+        self._evidence_ids = []
+        self._file_hashes = []
+        self._known_ids = set()
+        self._last_id = 0
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, evidence_id: int, perceptual_hash: str, file_hash: str = None):
+        if evidence_id in self._known_ids or not perceptual_hash:
+            return
+        value = int(perceptual_hash, 16)
+        position = len(self._hashes)
+        self._hashes.append(value)
+        self._evidence_ids.append(evidence_id)
+        self._file_hashes.append(file_hash)
+        self._known_ids.add(evidence_id)
+        for table, key in zip(self._tables, _substrings(value)):
+            table.setdefault(key, []).append(position)
+
+    def near(self, perceptual_hash: str, radius: int = None) -> list:
+        """[(distance, evidence_id, file_hash)] within `radius` bits, closest (then oldest) first."""
+        if not perceptual_hash:
+            return []
+        radius = self.radius if radius is None else min(radius, self.radius)
+        value = int(perceptual_hash, 16)
+
+        seen, matches = set(), []
+        for table, key in zip(self._tables, _substrings(value)):
+            for flip in self._flips:
+                for position in table.get(key ^ flip, ()):
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    distance = hamming(value, self._hashes[position])
+                    if distance <= radius:
+                        matches.append((distance, self._evidence_ids[position], self._file_hashes[position]))
+        matches.sort()
+        return matches
+
+    def canonical_file_hash(self, evidence: Evidence) -> str:
+        """
+        The file hash vision verdicts are cached under: that of the closest earlier
+        near-duplicate, so re-saved or resized copies reuse one Gemini result.
+        """
+        for _, evidence_id, file_hash in self.near(evidence.perceptual_hash):
+            if file_hash and evidence_id != evidence.id:
+                return file_hash
+        return evidence.file_hash
+
+    async def refresh(self, db: AsyncSession, page_size: int = 50000):
+        """Loads every hashed evidence row newer than the last one seen (the whole table on first call)."""
+        loaded = 0
+        while True:
+            result = await db.execute(
+                select(Evidence.id, Evidence.perceptual_hash, Evidence.file_hash)
+                .filter(Evidence.id > self._last_id, Evidence.perceptual_hash != None)
+                .order_by(Evidence.id)
+                .limit(page_size)
+            )
+            rows = result.all()
+            for evidence_id, perceptual_hash, file_hash in rows:
+                self.add(evidence_id, perceptual_hash, file_hash)
+                self._last_id = max(self._last_id, evidence_id)
+            loaded += len(rows)
+            if len(rows) < page_size:
+                break
+        if loaded > 1000:
+            logger.info(f"🖼️ Evidence image index: loaded {loaded} hashes ({len(self)} total)")
+        return loaded
+
+
+evidence_index = EvidenceImageIndex(radius=settings.EVIDENCE_NEAR_DUPLICATE_DISTANCE)
@@ -1,36 +1,36 @@
-import google.generativeai as genai
 from app.config import settings
+from app.core.registry import lazy_service
 from PIL import Image
-from exif import Image as ExifImage
+import asyncio
 import json
 import re
 import logging
 
 logger = logging.getLogger(__name__)
-genai.configure(api_key=settings.GEMINI_API_KEY)
 
-def extract_exif_data(file_path: str):
-    """Extracts GPS and Timestamp from image if available."""
-    try:
-        with open(file_path, 'rb') as f:
-            img = ExifImage(f)
-        if img.has_exif:
-            return {
-                "lat": str(getattr(img, "gps_latitude", "")),
-                "lon": str(getattr(img, "gps_longitude", "")),
-                "time": str(getattr(img, "datetime_original", ""))
-            }
-    except Exception as e:
-        logger.error(f"EXIF Extraction error: {e}")
-        return None
-    return None
+
+def _build_gemini():
+    import google.generativeai as genai
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai
+
+
+# The configured google.generativeai module, imported on first vision call
+genai = lazy_service("gemini", _build_gemini)
+
+# Bump the version whenever the prompt changes so cached vision verdicts are not reused
+VISION_MODEL = "gemini-1.5-flash"
+VISION_PROMPT_VERSION = "vision-v1"
+
+# Returned when Gemini is unreachable; never cached
+VISION_FALLBACK = {"is_relevant": True, "confidence_score": 5, "remarks": "AI analysis unavailable"}
 
 async def analyze_evidence_image(image_path: str, description: str):
     """
     The 'Truth Engine': Analyzes image and cross-references with text description.
     """
     # Use the stable model name
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+    model = genai.GenerativeModel(model_name=VISION_MODEL)
     img = Image.open(image_path)
     
     prompt = f"""
@@ -55,10 +55,11 @@ async def analyze_evidence_image(image_path: str, description: str):
     """
 
     try:
-        response = model.generate_content([prompt, img])
+        # Blocking SDK call (also decodes the image) -> worker thread
+        response = await asyncio.to_thread(model.generate_content, [prompt, img])
         # Clean potential markdown backticks
         clean_json = re.sub(r'```json\s*|```', '', response.text).strip()
         return json.loads(clean_json)
     except Exception as e:
         logger.error(f"Gemini analysis failed: {e}")
-        return {"is_relevant": True, "confidence_score": 5, "remarks": "AI analysis unavailable"}
\ No newline at end of file
+        return dict(VISION_FALLBACK)
\ No newline at end of file
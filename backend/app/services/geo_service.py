@@ -0,0 +1,133 @@
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from app.config import settings
+from app.utils.geo import (
+    GEOHASH_INDEX_PRECISIONS, geohash_encode, haversine_km, cells_within, normalize_place, valid_coordinates
+)
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = Path(__file__).resolve().parents[1] / "data" / "pune_gazetteer.json"
+
+
+class GeoService:
+    """
+    Spatial layer for case clustering:
+      * a local gazetteer resolves free-text locations ("Near FC Road, Pune") to a
+        locality key + centroid, matching whole place names only (never "road"/"nagar")
+      * complaints get numeric coordinates and a geohash, and their vectors carry
+        geohash cells, so "similar cases within R km" is an indexed metadata filter
+        applied inside the vector query
+    """
+
+    def __init__(self, gazetteer_path: Path, radius_km: float):
+        self.gazetteer_path = gazetteer_path
+        self.radius_km = radius_km
+        self._localities = None
+        self._pattern = None
+        self._alias_to_key = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._localities is not None:
+                return
+            data = json.loads(self.gazetteer_path.read_text(encoding="utf-8"))
+            localities = {row["key"]: row for row in data["localities"]}
+
+            for key, row in localities.items():
+                for alias in [row["name"], *row.get("aliases", [])]:
+                    normalized = normalize_place(alias)
+                    self._alias_to_key[normalized] = key
+                    self._alias_to_key[normalized.replace(" ", "")] = key  # "Viman Nagar" == "VimanNagar"
+
+            # One alternation, longest names first, so "Koregaon Park" beats any shorter alias
+            aliases = sorted(self._alias_to_key, key=len, reverse=True)
+            self._pattern = re.compile(r"\b(" + "|".join(re.escape(a) for a in aliases) + r")\b")
+            self._localities = localities
+            logger.info(f"🗺️ Gazetteer loaded: {len(localities)} localities")
+
+    def lookup(self, location_text: str):
+        """Resolves free text to a gazetteer entry (key, name, lat, lon) or None."""
+        self._load()
+        match = self._pattern.search(normalize_place(location_text))
+        if not match:
+            return None
+        return self._localities[self._alias_to_key[match.group(1)]]
+
+    def nearest_locality(self, lat: float, lon: float, max_km: float = 3.0):
+        """Reverse-geocodes a GPS fix to the closest gazetteer centroid within `max_km`."""
+        self._load()
+        best, best_km = None, max_km
+        for row in self._localities.values():
+            distance = haversine_km(lat, lon, row["lat"], row["lon"])
+            if distance <= best_km:
+                best, best_km = row, distance
+        return best
+
+    def locate(self, location_text: str, gps_fixes: list):
+        """
+        Picks the complaint's position: the first valid evidence GPS fix wins, otherwise
+        the gazetteer centroid of its location text. Returns (lat, lon, locality_key).
+        """
+        locality = self.lookup(location_text)
+        for lat, lon in gps_fixes:
+            if valid_coordinates(lat, lon):
+                if locality is None:
+                    locality = self.nearest_locality(lat, lon)
+                return lat, lon, locality["key"] if locality else None
+        if locality:
+            return locality["lat"], locality["lon"], locality["key"]
+        return None, None, None
+
+    @staticmethod
+    def place_key(location_text: str):
+        """
+        Last-resort spatial key for text the gazetteer doesn't know: the normalized location
+        itself, so "Lane 5,  Kharadi Bypass" and "lane 5 kharadi bypass" still meet. None when empty.
+        """
+        normalized = normalize_place(location_text)
+        return normalized[:120] if normalized else None
+
+    def vector_metadata(self, lat: float, lon: float, locality_key: str, location_text: str = None) -> dict:
+        """Spatial keys stored next to each vector (Chroma metadata can't hold None)."""
+        metadata = {}
+        place = self.place_key(location_text)
+        if place:
+            metadata["place"] = place
+        if lat is not None and lon is not None:
+            metadata.update({"lat": lat, "lon": lon})
+            geohash = geohash_encode(lat, lon, max(GEOHASH_INDEX_PRECISIONS))
+            for precision in GEOHASH_INDEX_PRECISIONS:
+                metadata[f"gh{precision}"] = geohash[:precision]
+        if locality_key:
+            metadata["locality"] = locality_key
+        return metadata
+
+    def spatial_filter(self, lat: float, lon: float, locality_key: str, location_text: str = None):
+        """
+        Chroma `where` clause restricting a vector query to the complaint's surroundings:
+        the geohash cells covering `radius_km`, else the same gazetteer locality, else the
+        same normalized location text. Returns None only when the complaint has no location.
+        """
+        if lat is not None and lon is not None:
+            precision, cells = cells_within(lat, lon, self.radius_km)
+            return {f"gh{precision}": {"$in": cells}}
+        if locality_key:
+            return {"locality": locality_key}
+        place = self.place_key(location_text)
+        if place:
+            return {"place": place}
+        return None
+
+    def within_radius(self, lat: float, lon: float, match_metadata: dict) -> bool:
+        """Exact distance check for candidates that came back through the cell filter."""
+        if lat is None or lon is None or "lat" not in match_metadata:
+            return True  # Matched on locality or place text; there is no finer signal to apply
+        return haversine_km(lat, lon, match_metadata["lat"], match_metadata["lon"]) <= self.radius_km
+
+
+geo_service = GeoService(GAZETTEER_PATH, radius_km=settings.CLUSTER_RADIUS_KM)
@@ -1,8 +1,20 @@
-from groq import Groq
 from app.config import settings
+from app.core.registry import lazy_service
+import asyncio
 import json
 
-groq_client = Groq(api_key=settings.GROQ_API_KEY)
+
+def _build_groq_client():
+    from groq import Groq
+    return Groq(api_key=settings.GROQ_API_KEY)
+
+
+# Shared Groq client, created on first use (the API process may never need it)
+groq_client = lazy_service("groq", _build_groq_client)
+
+# Bump the version whenever the prompt changes so cached triage results are not reused
+TRIAGE_MODEL = "llama-3.3-70b-versatile"
+TRIAGE_PROMPT_VERSION = "triage-v1"
 
 async def analyze_complaint_text(text: str):
     """
@@ -33,13 +45,15 @@ async def analyze_complaint_text(text: str):
     }}
     """
     
-    # We can now use the global groq_client here as well:
-    chat_completion = groq_client.chat.completions.create(
+    # We can now use the global groq_client here as well.
+    # The SDK call is blocking, so run it in a thread to let other stages proceed.
+    chat_completion = await asyncio.to_thread(
+        groq_client.chat.completions.create,
         messages=[
             {"role": "system", "content": "You are a corruption triage assistant..."},
             {"role": "user", "content": prompt}
         ],
-        model="llama-3.3-70b-versatile",
+        model=TRIAGE_MODEL,
         response_format={"type": "json_object"}
     )
     
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+from sqlalchemy import select, func, case, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.analytics import MapCell
+from app.models.complaint import Complaint
+from app.services.cache_service import MemoryBackend, ResultCache
+from app.utils.geo import (
+    geohash_bounds, geohash_cells_covering, geohash_decode, geohash_precision_for_zoom
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MapService:
+    """
+    Zoom-aware map tiles. Below MAP_POINTS_MIN_ZOOM a tile is a handful of geohash cells
+    with count, max severity and a type histogram, read by primary key from `map_cells`
+    (pre-aggregated in the background, never a GROUP BY per request); at street level it
+    is the individual points, capped per tile. Anonymous complaints are shown snapped to
+    a coarse cell centre, without id or cluster. Rendered tiles are cached briefly
+    together with their ETag.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.cache = ResultCache(MemoryBackend(max_entries=max_entries, ttl_seconds=ttl_seconds), namespace="map")
+
+    @staticmethod
+    def _in_bbox(bbox: tuple):
+        min_lat, min_lon, max_lat, max_lon = bbox
+        return (
+            Complaint.is_deleted == False,
+            Complaint.latitude.between(min_lat, max_lat),
+            Complaint.longitude.between(min_lon, max_lon),
+        )
+
+    @staticmethod
+    def _max_cell_precision() -> int:
+        return geohash_precision_for_zoom(settings.MAP_POINTS_MIN_ZOOM - 1)
+
+    async def rebuild_cells(self, db: AsyncSession) -> int:
+        """
+        Recomputes `map_cells` for every precision a cell tile can ask for: one GROUP BY at
+        the finest precision, rolled up to the coarser ones in memory, swapped in within
+        one transaction. Returns the number of rows written.
+        """
+        finest = self._max_cell_precision()
+        cell = func.substr(Complaint.geohash, 1, finest)
+        public = Complaint.is_anonymous.isnot(True)
+        result = await db.execute(
+            select(
+                cell,
+                Complaint.complaint_type,
+                func.count(Complaint.id),
+                func.max(Complaint.severity_score),
+                func.count(case((public, Complaint.id))),
+                func.sum(case((public, Complaint.latitude), else_=0.0)),
+                func.sum(case((public, Complaint.longitude), else_=0.0)),
+            )
+            .filter(Complaint.is_deleted == False, Complaint.geohash != None)
+            .group_by(cell, Complaint.complaint_type)
+        )
+
+        rows = {}
+        for cell_key, complaint_type, count, max_severity, public_count, lat_sum, lon_sum in result.all():
+            complaint_type = getattr(complaint_type, "value", complaint_type)
+            for precision in range(1, min(finest, len(cell_key)) + 1):
+                key = (precision, cell_key[:precision], complaint_type)
+                row = rows.setdefault(key, {
+                    "precision": precision, "cell": key[1], "complaint_type": complaint_type,
+                    "complaint_count": 0, "max_severity": 0, "public_count": 0, "lat_sum": 0.0, "lon_sum": 0.0
+                })
+                row["complaint_count"] += count
+                row["max_severity"] = max(row["max_severity"], max_severity or 0)
+                row["public_count"] += public_count
+                row["lat_sum"] += float(lat_sum or 0)
+                row["lon_sum"] += float(lon_sum or 0)
+
+        await db.execute(delete(MapCell))
+        values = list(rows.values())
+        # Insert in slices to stay under the driver's bind-parameter limit
+        for i in range(0, len(values), 1000):
+            await db.execute(MapCell.__table__.insert(), values[i:i + 1000])
+        await db.commit()
+        return len(values)
+
+    async def _cells(self, db: AsyncSession, bbox: tuple, precision: int) -> tuple:
+        """(precision, cells) for the geohash cells covering the bbox, coarser if there are too many."""
+        cell_keys = geohash_cells_covering(*bbox, precision)
+        while len(cell_keys) > settings.MAP_TILE_MAX_CELLS and precision > 1:
+            precision -= 1
+            cell_keys = geohash_cells_covering(*bbox, precision)
+
+        result = await db.execute(
+            select(MapCell).filter(MapCell.precision == precision, MapCell.cell.in_(cell_keys))
+        )
+
+        # One row per (cell, type): fold into one entry per cell
+        cells = {}
+        for row in result.scalars().all():
+            entry = cells.setdefault(row.cell, {
+                "cell": row.cell, "count": 0, "max_severity": 0, "types": {}, "_n": 0, "_lat": 0.0, "_lon": 0.0
+            })
+            entry["count"] += row.complaint_count
+            entry["max_severity"] = max(entry["max_severity"], row.max_severity or 0)
+            entry["types"][row.complaint_type] = row.complaint_count
+            entry["_n"] += row.public_count
+            entry["_lat"] += row.lat_sum
+            entry["_lon"] += row.lon_sum
+
+        for entry in cells.values():
+            n = entry.pop("_n")
+            if n:  # Centroid of the public members
+                entry["lat"], entry["lon"] = entry.pop("_lat") / n, entry.pop("_lon") / n
+            else:  # Only anonymous members: the cell centre, nothing finer
+                entry.pop("_lat"), entry.pop("_lon")
+                entry["lat"], entry["lon"] = geohash_decode(entry["cell"])
+            entry["lat"], entry["lon"] = round(entry["lat"], 6), round(entry["lon"], 6)
+            entry["bounds"] = [round(v, 6) for v in geohash_bounds(entry["cell"])]
+        return precision, sorted(cells.values(), key=lambda e: e["cell"])
+
+    async def _points(self, db: AsyncSession, bbox: tuple) -> tuple:
+        limit = settings.MAP_TILE_MAX_POINTS
+        result = await db.execute(
+            select(Complaint.id, Complaint.latitude, Complaint.longitude, Complaint.severity_score,
+                   Complaint.complaint_type, Complaint.cluster_id, Complaint.is_anonymous, Complaint.geohash)
+            .filter(*self._in_bbox(bbox))
+            .order_by(Complaint.severity_score.desc(), Complaint.id)
+            .limit(limit + 1)
+        )
+        rows = result.all()
+        points = []
+        for r in rows[:limit]:
+            point = {
+                "id": r.id,
+                "lat": r.latitude,
+                "lon": r.longitude,
+                "severity": r.severity_score,
+                "type": getattr(r.complaint_type, "value", r.complaint_type),
+                "cluster_id": r.cluster_id
+            }
+            if r.is_anonymous:
+                # Nothing that leads back to the filer: coarse position, no id, no cluster
+                snapped = geohash_decode((r.geohash or "")[:settings.MAP_ANONYMOUS_SNAP_PRECISION]) \
+                    if r.geohash else (round(r.latitude, 2), round(r.longitude, 2))
+                point.update(id=None, cluster_id=None, lat=round(snapped[0], 6), lon=round(snapped[1], 6))
+            points.append(point)
+        return points, len(rows) > limit
+
+    async def get_tile(self, db: AsyncSession, bbox: tuple, zoom: int) -> tuple:
+        """Returns (tile, etag). Served from the tile cache while it is fresh."""
+        bbox = tuple(round(v, 6) for v in bbox)
+        key = f"{zoom}:{','.join(map(str, bbox))}"
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        tile = {"zoom": zoom, "bbox": list(bbox)}
+        if zoom >= settings.MAP_POINTS_MIN_ZOOM:
+            points, truncated = await self._points(db, bbox)
+            tile.update(mode="points", points=points, truncated=truncated)
+        else:
+            precision, cells = await self._cells(db, bbox, geohash_precision_for_zoom(zoom))
+            tile.update(mode="cells", precision=precision, cells=cells)
+
+        body = json.dumps(tile, separators=(",", ":"), sort_keys=True)
+        etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+        await self.cache.set(key, (tile, etag))
+        return tile, etag
+
+
+map_service = MapService(ttl_seconds=settings.MAP_TILE_CACHE_TTL_SECONDS,
+                         max_entries=settings.MAP_TILE_CACHE_MAX_ENTRIES)
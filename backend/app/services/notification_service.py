@@ -1,23 +1,83 @@
-import smtplib
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+import aiosmtplib
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
+from app.models.notification import NotificationOutbox, OutboxStatus
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class NotificationService:
-    def send_department_alert(self, recipient_email: str, complaint_details: dict):
-        if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
-            logger.warning("SMTP credentials not configured. Skipping email.")
-            return
+class SMTPConnectionPool:
+    """
+    A small pool of persistent, already-authenticated SMTP connections.
+    STARTTLS + login happen once per connection instead of once per email.
+    Works against a local aiosmtpd stand-in with SMTP_STARTTLS=False, SMTP_USE_AUTH=False:
+        python -m aiosmtpd -n -l localhost:8025
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle = None
+        self._loop = None
+
+    def _ensure_queue(self):
+        # The pool lives on the worker runtime loop; rebuild it if that loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                self._idle.put_nowait(None)  # Placeholder slot -> connect lazily
+            self._loop = loop
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            start_tls=settings.SMTP_STARTTLS
+        )
+        await smtp.connect()
+        if settings.SMTP_USE_AUTH:
+            await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        return smtp
+
+    @asynccontextmanager
+    async def connection(self):
+        self._ensure_queue()
+        smtp = await self._idle.get()
+        try:
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            yield smtp
+        except Exception:
+            # Drop a connection that errored; the next user reconnects
+            if smtp is not None and smtp.is_connected:
+                smtp.close()
+            smtp = None
+            raise
+        finally:
+            self._idle.put_nowait(smtp)
 
-        msg = MIMEMultipart()
-        msg['From'] = settings.MAIL_FROM
-        msg['To'] = recipient_email
-        msg['Subject'] = f"🚨 URGENT: New Complaint Assigned - {complaint_details['id']}"
 
+class NotificationService:
+    def __init__(self):
+        self.pool = SMTPConnectionPool(size=settings.SMTP_POOL_SIZE)
+
+    @staticmethod
+    def build_department_alert(complaint_details: dict):
+        subject = f"🚨 URGENT: New Complaint Assigned - {complaint_details['id']}"
+        if complaint_details.get('blockchain_hash'):
+            anchor = complaint_details['blockchain_hash']
+        elif complaint_details.get('pending_tx'):
+            # Not mined yet, and the submitter may re-sign it under another hash
+            anchor = f"pending (queued as {complaint_details['pending_tx']}, not yet on chain)"
+        else:
+            anchor = "pending"
         body = f"""
         <h2>Prajā-Netra Government Alert</h2>
         <p>A new grievance has been automatically routed to your department by the AI Intelligence Engine.</p>
@@ -28,21 +88,145 @@ class NotificationService:
         <b>Location:</b> {complaint_details['location']}<br>
         <hr>
         <p><b>AI Summary:</b> {complaint_details['summary']}</p>
-        <p><b>Blockchain TX:</b> {complaint_details['blockchain_hash']}</p>
+        <p><b>Blockchain TX:</b> {anchor}</p>
         <hr>
         <p><i>This is an automated high-integrity alert. Please log in to the official portal to begin investigation.</i></p>
         """
+        return subject, body
 
+    def queue_department_alert(self, db: AsyncSession, department, complaint_details: dict):
+        """
+        Adds the alert to the outbox inside the caller's transaction, so it is only
+        delivered if the analysis itself commits. Delivery happens in deliver_pending().
+        """
+        subject, body = self.build_department_alert(complaint_details)
+        db.add(NotificationOutbox(
+            complaint_id=complaint_details['id'],
+            department_id=department.id,
+            recipient=department.contact_email,
+            subject=subject,
+            body=body,
+            severity=complaint_details['severity'],
+            is_digest=complaint_details['severity'] <= settings.NOTIFY_DIGEST_MAX_SEVERITY
+        ))
+
+    @staticmethod
+    def _build_message(recipient: str, subject: str, body: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = settings.MAIL_FROM
+        msg['To'] = recipient
+        msg['Subject'] = subject
         msg.attach(MIMEText(body, 'html'))
+        return msg
 
-        try:
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                server.starttls()
-                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                server.send_message(msg)
-                logger.info(f"📧 Notification sent to {recipient_email} for ID {complaint_details['id']}")
-        except Exception as e:
-            logger.error(f"❌ Failed to send email: {e}")
+    async def _send(self, recipient: str, subject: str, body: str):
+        async with self.pool.connection() as smtp:
+            await smtp.send_message(self._build_message(recipient, subject, body))
+
+    @staticmethod
+    def _smtp_configured() -> bool:
+        if settings.SMTP_USE_AUTH and (not settings.SMTP_USER or not settings.SMTP_PASSWORD):
+            logger.warning("SMTP credentials not configured. Skipping email delivery.")
+            return False
+        return True
+
+    @staticmethod
+    def _mark_failed_attempt(row: NotificationOutbox, error: Exception, now: datetime):
+        row.attempts = (row.attempts or 0) + 1
+        row.last_error = str(error)
+        if row.attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+            row.status = OutboxStatus.FAILED
+            logger.error(f"❌ Giving up on notification {row.id} to {row.recipient}: {error}")
+        else:
+            backoff = settings.NOTIFY_RETRY_BASE_SECONDS * (2 ** (row.attempts - 1))
+            row.next_attempt_at = now + timedelta(seconds=backoff)
+            logger.warning(f"Notification {row.id} failed (attempt {row.attempts}), retry in {backoff}s: {error}")
+
+    @staticmethod
+    async def _claim(db: AsyncSession, is_digest: bool, limit: int = None):
+        """Locks due outbox rows; SKIP LOCKED lets several worker processes deliver side by side."""
+        query = (
+            select(NotificationOutbox)
+            .filter(NotificationOutbox.status == OutboxStatus.PENDING,
+                    NotificationOutbox.is_digest == is_digest,
+                    NotificationOutbox.next_attempt_at <= datetime.now(timezone.utc))
+            .order_by(NotificationOutbox.id)
+            .with_for_update(skip_locked=True)
+        )
+        if limit:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    async def deliver_pending(self, db: AsyncSession) -> int:
+        """Sends one batch of due alerts over the pooled connections. Returns how many were sent."""
+        if not self._smtp_configured():
+            return 0
+
+        rows = await self._claim(db, is_digest=False, limit=settings.NOTIFY_BATCH_SIZE)
+        if not rows:
+            return 0
+
+        outcomes = await asyncio.gather(
+            *(self._send(row.recipient, row.subject, row.body) for row in rows),
+            return_exceptions=True
+        )
+
+        now = datetime.now(timezone.utc)
+        sent = 0
+        for row, outcome in zip(rows, outcomes):
+            if isinstance(outcome, Exception):
+                self._mark_failed_attempt(row, outcome, now)
+            else:
+                row.status = OutboxStatus.SENT
+                row.sent_at = now
+                sent += 1
+
+        await db.commit()
+        if sent:
+            logger.info(f"📧 Delivered {sent}/{len(rows)} department alerts")
+        return sent
+
+    async def send_digests(self, db: AsyncSession) -> int:
+        """Rolls pending low-severity alerts into one email per department mailbox."""
+        if not self._smtp_configured():
+            return 0
+
+        rows = await self._claim(db, is_digest=True)
+        if not rows:
+            return 0
+
+        by_recipient = {}
+        for row in rows:
+            by_recipient.setdefault(row.recipient, []).append(row)
+
+        now = datetime.now(timezone.utc)
+        digests_sent = 0
+        for recipient, items in by_recipient.items():
+            listing = "".join(
+                f"<li>{item.subject} (severity {item.severity}/10)</li>" for item in items
+            )
+            body = f"""
+            <h2>Prajā-Netra Department Digest</h2>
+            <p>{len(items)} lower-severity grievance(s) were routed to your department since the last digest.</p>
+            <ul>{listing}</ul>
+            <p><i>Please log in to the official portal to review them.</i></p>
+            """
+            try:
+                await self._send(recipient, f"Prajā-Netra Digest: {len(items)} new complaint(s)", body)
+            except Exception as e:
+                for item in items:
+                    self._mark_failed_attempt(item, e, now)
+                continue
+
+            for item in items:
+                item.status = OutboxStatus.DIGESTED
+                item.sent_at = now
+            digests_sent += 1
+
+        await db.commit()
+        logger.info(f"📬 Sent {digests_sent} department digest(s) covering {len(rows)} alerts")
+        return digests_sent
 
 
-notification_service = NotificationService()
\ No newline at end of file
+notification_service = NotificationService()
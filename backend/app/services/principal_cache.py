@@ -0,0 +1,147 @@
+from dataclasses import dataclass, asdict
+from typing import Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, attributes
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.services.cache_service import MemoryBackend, RedisBackend, ResultCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Changes to these columns must not be served from a stale cached principal
+_AUTH_FIELDS = ("role", "department_id", "is_active", "email")
+_PENDING_KEY = "principal_cache_pending"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What authorization needs about the caller; endpoints read id/email/role/department_id."""
+    id: int
+    email: str
+    role: UserRole
+    department_id: Optional[int]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=UserRole(user.role or UserRole.CITIZEN),
+            department_id=user.department_id,
+            is_active=bool(user.is_active if user.is_active is not None else True),
+        )
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["role"] = self.role.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Principal":
+        return cls(**{**data, "role": UserRole(data["role"])})
+
+
+class PrincipalCache:
+    """
+    Token subject -> Principal, so authenticated requests skip the users-table lookup.
+    Tier 1 is a bounded in-process LRU; with AUTH_CACHE_REDIS the principal is also shared
+    across API workers through Redis. Role/department/activation changes made through the
+    ORM evict the entry once the transaction commits (see the listeners below); writes that
+    bypass the ORM are bounded by the TTL. With Redis on, the local tier uses the short
+    AUTH_CACHE_LOCAL_TTL_SECONDS because another worker's eviction can't reach it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, local_ttl_seconds: int, use_redis: bool):
+        local_ttl = min(local_ttl_seconds, ttl_seconds) if use_redis else ttl_seconds
+        self.local = ResultCache(MemoryBackend(max_entries=max_entries, ttl_seconds=local_ttl), namespace="principal")
+        self.shared = (
+            ResultCache(RedisBackend(prefix="praja:principal:", ttl_seconds=ttl_seconds), namespace="principal")
+            if use_redis else None
+        )
+
+    async def get(self, subject: str) -> Optional[Principal]:
+        principal = await self.local.get(subject)
+        if principal is not None:
+            return principal
+        if self.shared is None:
+            return None
+
+        data = await self.shared.get(subject)
+        if data is None:
+            return None
+        principal = Principal.from_dict(data)
+        await self.local.set(subject, principal)
+        return principal
+
+    async def set(self, principal: Principal):
+        await self.local.set(principal.email, principal)
+        if self.shared is not None:
+            await self.shared.set(principal.email, principal.to_dict())
+
+    async def load(self, subject: str) -> Optional[Principal]:
+        """Cached principal, or one DB lookup on a miss (a session is only opened then)."""
+        principal = await self.get(subject)
+        if principal is not None:
+            return principal
+
+        async with SessionLocal() as db:
+            user = (await db.execute(select(User).filter(User.email == subject))).scalar_one_or_none()
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        await self.set(principal)
+        return principal
+
+    def invalidate(self, subjects):
+        """Synchronous: runs inside the ORM commit hook."""
+        for subject in subjects:
+            self.local.backend.delete(subject)
+            if self.shared is not None:
+                try:
+                    self.shared.backend.delete(subject)
+                except Exception as e:
+                    logger.error(f"Principal cache eviction failed for {subject}: {e}")
+
+    def stats(self) -> dict:
+        return {"local": self.local.stats(), "shared": self.shared.stats() if self.shared else None}
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    local_ttl_seconds=settings.AUTH_CACHE_LOCAL_TTL_SECONDS,
+    use_redis=settings.AUTH_CACHE_REDIS,
+)
+
+
+def _auth_changed(user: User) -> bool:
+    return any(attributes.get_history(user, name).has_changes() for name in _AUTH_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_principal_changes(session, flush_context):
+    """Remembers which subjects this transaction touched (old and new email for renames)."""
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in session.dirty:
+        if isinstance(obj, User) and _auth_changed(obj):
+            pending.update(attributes.get_history(obj, "email").deleted or ())
+            pending.add(obj.email)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            pending.add(obj.email)
+
+
+@event.listens_for(Session, "after_commit")
+def evict_changed_principals(session):
+    # Evicting only after commit keeps a concurrent miss from re-caching the old row
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        principal_cache.invalidate(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_principal_changes(session):
+    session.info.pop(_PENDING_KEY, None)
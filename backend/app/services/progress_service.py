@@ -0,0 +1,192 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from app.config import settings
+from app.core.redis_client import get_redis, get_async_redis
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = "praja:progress:"  # One Redis Stream per complaint: history for Last-Event-ID resume
+CHANNEL_PREFIX = "praja:progress-live:"  # Pub/sub: live fan-out to every API process
+TERMINAL_STAGES = ("completed", "failed")
+
+_RESYNC = object()  # Queue marker: events may have been missed, re-read the stream
+
+
+def _stream_key(complaint_id: int) -> str:
+    return f"{STREAM_PREFIX}{complaint_id}"
+
+
+def _newer(event_id: str, last_id: str) -> bool:
+    if last_id is None:
+        return True
+    try:
+        return tuple(map(int, event_id.split("-"))) > tuple(map(int, last_id.split("-")))
+    except ValueError:
+        return True
+
+
+def _sse(event_id: str, data: str) -> str:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}data: {data}\n\n"
+
+
+class ProgressService:
+    """
+    Stage-level analysis progress (transcribed, triaged, evidence_checked, clustered,
+    routed, anchored, completed/failed).
+
+    Worker side: each event is appended to the complaint's Redis Stream (capped, expiring)
+    and announced on a pub/sub channel with its stream id.
+
+    API side: one pattern subscription per process feeds in-memory queues, one per
+    connected SSE client, so open tabs cost no DB reads and no Redis connection each.
+    A client that reconnects with Last-Event-ID gets the missed events from the stream.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # complaint_id -> set of asyncio.Queue
+        self._listener = None
+
+    # --- Worker side ---
+
+    @staticmethod
+    def _publish_sync(complaint_id: int, data: str):
+        client = get_redis()
+        key = _stream_key(complaint_id)
+        event_id = client.xadd(key, {"data": data}, maxlen=settings.PROGRESS_STREAM_MAXLEN, approximate=True)
+        pipe = client.pipeline(transaction=False)
+        pipe.expire(key, settings.PROGRESS_STREAM_TTL_SECONDS)
+        pipe.publish(f"{CHANNEL_PREFIX}{complaint_id}", json.dumps({"id": event_id, "data": data}))
+        pipe.execute()
+
+    async def publish(self, complaint_id: int, stage: str, **details):
+        """Best effort: progress reporting must never fail an analysis."""
+        data = json.dumps({
+            "complaint_id": complaint_id,
+            "stage": stage,
+            "at": datetime.now(timezone.utc).isoformat(),
+            **details
+        }, default=str)
+        try:
+            await asyncio.to_thread(self._publish_sync, complaint_id, data)
+        except Exception as e:
+            logger.warning(f"Progress event {stage} for complaint {complaint_id} not published: {e}")
+
+    # --- API side ---
+
+    def _subscribe(self, complaint_id: int) -> asyncio.Queue:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        queue = asyncio.Queue(maxsize=64)
+        self._subscribers.setdefault(complaint_id, set()).add(queue)
+        return queue
+
+    def _unsubscribe(self, complaint_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(complaint_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[complaint_id]
+
+    def _deliver(self, queue: asyncio.Queue, item):
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Slow client: drop its backlog and let it catch up from the stream
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_RESYNC)
+
+    async def _listen(self):
+        """Pattern subscription shared by every SSE client of this process; reconnects on errors."""
+        while True:
+            pubsub = get_async_redis().pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                # Anything published while we were (re)connecting is only in the streams
+                for queues in self._subscribers.values():
+                    for queue in queues:
+                        self._deliver(queue, _RESYNC)
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    complaint_id = int(message["channel"][len(CHANNEL_PREFIX):])
+                    event = json.loads(message["data"])
+                    for queue in list(self._subscribers.get(complaint_id, ())):
+                        self._deliver(queue, (event["id"], event["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress subscription lost, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    @staticmethod
+    async def history(complaint_id: int, after_id: str = None) -> list:
+        """[(event_id, data)] from the complaint's stream, strictly after `after_id`."""
+        start = f"({after_id}" if after_id else "-"
+        try:
+            entries = await get_async_redis().xrange(_stream_key(complaint_id), min=start)
+        except Exception as e:
+            logger.error(f"Progress history for complaint {complaint_id} unavailable: {e}")
+            return []
+        return [(event_id, fields["data"]) for event_id, fields in entries]
+
+    @staticmethod
+    async def tail_id(complaint_id: int) -> str:
+        """Id of the newest event in the complaint's stream ("0-0" when there is none yet)."""
+        try:
+            entries = await get_async_redis().xrevrange(_stream_key(complaint_id), count=1)
+        except Exception as e:
+            logger.error(f"Progress stream for complaint {complaint_id} unavailable: {e}")
+            return "0-0"
+        return entries[0][0] if entries else "0-0"
+
+    async def event_stream(self, complaint_id: int, analysis_status: str, last_event_id: str, request):
+        """
+        SSE body: missed events (or a status snapshot for a fresh client), then live events
+        until a terminal stage arrives or the client goes away.
+        """
+        queue = self._subscribe(complaint_id)  # Before reading the stream, so nothing falls in between
+        try:
+            yield f"retry: {settings.PROGRESS_RETRY_MS}\n\n"
+            last_id, done = last_event_id, analysis_status in TERMINAL_STAGES
+            if last_id is None:
+                # A fresh client gets the snapshot instead of the retained history, which can
+                # still end in the previous run's "completed" while a re-analysis is running
+                snapshot = json.dumps({"complaint_id": complaint_id, "stage": "status", "analysis_status": analysis_status})
+                yield _sse(None, snapshot)
+                if done:
+                    return
+                last_id, pending = await self.tail_id(complaint_id), []
+            else:
+                # Resuming: replay what was missed (and close if nothing is running any more)
+                pending = await self.history(complaint_id, last_id)
+
+            while True:
+                for event_id, data in pending:
+                    if not _newer(event_id, last_id):
+                        continue
+                    yield _sse(event_id, data)
+                    last_id = event_id
+                    done = done or json.loads(data).get("stage") in TERMINAL_STAGES
+                if done:
+                    return
+
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    pending = []
+                    continue
+                pending = await self.history(complaint_id, last_id) if item is _RESYNC else [item]
+        finally:
+            self._unsubscribe(complaint_id, queue)
+
+
+progress_service = ProgressService()
@@ -1,31 +1,130 @@
+import asyncio
 import os
-from groq import Groq
-from app.config import settings
+import shutil
+from pathlib import Path
+from app.core.cpu_pool import run_cpu_bound
+from app.services.ai_service import provider_slot
+from app.services.cache_service import ai_cache, hash_file
+from app.services.groq_service import groq_client
+from app.utils.audio_chunks import split_at_silence
 import logging
 
 logger = logging.getLogger(__name__)
 
+STT_MODEL = "whisper-large-v3"
+STT_PROMPT_VERSION = "stt-v1"  # Part of the chunk cache key
+CHUNK_DIR = Path("uploads") / "stt"
+
+
+def _field(segment, name: str):
+    # verbose_json segments arrive as plain dicts or SDK objects depending on the client version
+    return segment[name] if isinstance(segment, dict) else getattr(segment, name)
+
+
 class STTService:
+    """
+    Chunked Whisper transcription: recordings are split at pauses into bounded chunks
+    (in the CPU pool), the chunks are transcribed concurrently under the "groq_stt"
+    provider cap and stitched back in order with timestamps. Each chunk's result is
+    cached by its content hash, so a retry only re-sends the chunks that failed.
+    """
+
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        self.client = groq_client  # Shared, lazily-created client
 
-    async def transcribe_audio(self, file_path: str):
+    def _request(self, path: str) -> dict:
+        with open(path, "rb") as file:
+            transcription = self.client.audio.transcriptions.create(
+                file=(os.path.basename(path), file.read()),
+                model=STT_MODEL,
+                response_format="verbose_json",  # Segment timestamps
+                language=None,  # Auto-detect language (Marathi, Hindi, English)
+                temperature=0.0
+            )
+        return {
+            "text": (transcription.text or "").strip(),
+            "language": getattr(transcription, "language", None),
+            "segments": [
+                {"start": _field(s, "start"), "end": _field(s, "end"), "text": _field(s, "text").strip()}
+                for s in (getattr(transcription, "segments", None) or [])
+            ],
+        }
+
+    async def _transcribe_chunk(self, chunk: dict) -> dict:
+        cache_key = ai_cache.make_key(STT_PROMPT_VERSION, STT_MODEL, chunk["hash"])
+        result = await ai_cache.get(cache_key)
+        if result is None:
+            try:
+                async with provider_slot("groq_stt"):
+                    result = await asyncio.to_thread(self._request, chunk["path"])
+            except Exception as e:
+                logger.error(f"STT Error on chunk {chunk['index']}: {e}")
+                return {**chunk, "error": str(e)}
+            await ai_cache.set(cache_key, result)
+
+        # Chunk-relative timestamps -> recording timestamps
+        segments = [
+            {"start": round(chunk["start"] + s["start"], 2), "end": round(chunk["start"] + s["end"], 2), "text": s["text"]}
+            for s in result["segments"]
+        ]
+        return {**chunk, "text": result["text"], "language": result["language"], "segments": segments}
+
+    async def transcribe_stream(self, file_path: str, file_hash: str = None):
         """
-        Transcribes audio using Groq's Whisper-large-v3.
-        Supports Marathi, Hindi, and English automatically.
+        Yields each chunk's transcript as soon as it completes (not in order), with
+        "completed"/"total" counters. Failed chunks carry an "error" key.
         """
+        source_hash = file_hash or await asyncio.to_thread(hash_file, file_path)
+        chunks = await run_cpu_bound(split_at_silence, file_path, str(CHUNK_DIR / source_hash))
+
+        tasks = [asyncio.create_task(self._transcribe_chunk(chunk)) for chunk in chunks]
         try:
-            with open(file_path, "rb") as file:
-                transcription = self.client.audio.transcriptions.create(
-                    file=(os.path.basename(file_path), file.read()),
-                    model="whisper-large-v3",
-                    response_format="json",
-                    language=None, # Auto-detect language
-                    temperature=0.0
-                )
-            return transcription.text
+            for completed, next_done in enumerate(asyncio.as_completed(tasks), 1):
+                yield {**(await next_done), "completed": completed, "total": len(chunks)}
+        finally:
+            for task in tasks:
+                task.cancel()  # Consumer stopped early
+
+    async def transcribe(self, file_path: str, file_hash: str = None, on_partial=None) -> dict:
+        """
+        Full transcript {"text", "language", "segments", "duration"}, or None on failure.
+        `on_partial` (async) is awaited with every chunk result as it arrives.
+        """
+        try:
+            file_hash = file_hash or await asyncio.to_thread(hash_file, file_path)
+            results = []
+            async for partial in self.transcribe_stream(file_path, file_hash):
+                results.append(partial)
+                if on_partial is not None:
+                    await on_partial(partial)
         except Exception as e:
             logger.error(f"STT Error: {e}")
             return None
 
-stt_service = STTService()
\ No newline at end of file
+        failed = [r["index"] for r in results if "error" in r]
+        if failed:
+            # Finished chunks stay cached, so the retry resumes from here
+            logger.error(f"STT failed for {len(failed)}/{len(results)} chunk(s) of {file_path}")
+            return None
+
+        results.sort(key=lambda r: r["index"])
+        transcript = {
+            "text": " ".join(r["text"] for r in results if r["text"]),
+            "language": next((r["language"] for r in results if r["language"]), None),
+            "segments": [s for r in results for s in r["segments"]],
+            "duration": results[-1]["end"] if results else 0.0,
+        }
+        await self.discard_chunks(file_path, file_hash)
+        return transcript
+
+    @staticmethod
+    async def discard_chunks(file_path: str, file_hash: str = None):
+        """Removes the recording's chunk files (after success, or once no retry is left)."""
+        try:
+            file_hash = file_hash or await asyncio.to_thread(hash_file, file_path)
+            await asyncio.to_thread(shutil.rmtree, CHUNK_DIR / file_hash, True)
+        except OSError as e:
+            logger.warning(f"STT chunks of {file_path} not removed: {e}")
+
+
+stt_service = STTService()
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+from app.config import settings
+
+_SAMPLE_RATE = 16000  # What Whisper resamples to anyway; keeps chunks small
+_SILENCE_BELOW_AVERAGE_DB = 16
+_MIN_SILENCE_MS = 400
+
+
+def _cut_points(audio: AudioSegment, target_ms: int, max_ms: int) -> list:
+    """
+    Chunk boundaries in ms. Each cut goes at the middle of the pause nearest to
+    `target_ms` into the chunk (but no earlier than half of it); with no pause before
+    `max_ms` the chunk is cut hard there.
+    """
+    length = len(audio)
+    if length <= max_ms or audio.dBFS == float("-inf"):
+        return [0, length]
+
+    silences = detect_silence(audio, min_silence_len=_MIN_SILENCE_MS,
+                              silence_thresh=audio.dBFS - _SILENCE_BELOW_AVERAGE_DB, seek_step=10)
+    pauses = [(start + end) // 2 for start, end in silences]
+
+    bounds, pos = [0], 0
+    while length - pos > max_ms:
+        window = [p for p in pauses if pos + target_ms // 2 <= p <= pos + max_ms]
+        cut = min(window, key=lambda p: abs(p - (pos + target_ms))) if window else pos + max_ms
+        bounds.append(cut)
+        pos = cut
+    bounds.append(length)
+    return bounds
+
+
+def _write_atomic(path: Path, writer):
+    temp_path = path.with_name(f".{uuid.uuid4()}.tmp")
+    writer(temp_path)
+    os.replace(temp_path, path)
+
+
+def split_at_silence(source_path: str, out_dir: str) -> list:
+    """
+    Process-pool entry point: splits a recording into mono 16 kHz FLAC chunks at pauses.
+    Returns [{"index", "start", "end", "path", "hash"}] (seconds, chunk SHA-256). The
+    chunk list is saved as out_dir/manifest.json, so a retry reuses the same chunks.
+    """
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / "manifest.json"
+    if manifest_path.exists():
+        chunks = json.loads(manifest_path.read_text())
+        if all(Path(c["path"]).exists() for c in chunks):
+            return chunks
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    audio = AudioSegment.from_file(source_path).set_channels(1).set_frame_rate(_SAMPLE_RATE)
+    bounds = _cut_points(audio, settings.STT_CHUNK_TARGET_SECONDS * 1000, settings.STT_CHUNK_MAX_SECONDS * 1000)
+
+    chunks = []
+    for index, (start, end) in enumerate(zip(bounds, bounds[1:])):
+        path = out_dir / f"{index:04d}.flac"
+        _write_atomic(path, lambda p, s=start, e=end: audio[s:e].export(str(p), format="flac"))
+        chunks.append({
+            "index": index,
+            "start": start / 1000,
+            "end": end / 1000,
+            "path": str(path),
+            "hash": hashlib.sha256(path.read_bytes()).hexdigest(),
+        })
+
+    _write_atomic(manifest_path, lambda p: p.write_text(json.dumps(chunks)))
+    return chunks
@@ -0,0 +1,64 @@
+import os
+import uuid
+from pathlib import Path
+from PIL import Image, ImageOps
+from app.config import settings
+from app.core.cpu_pool import run_cpu_bound
+
+# Content-addressed by the original's file_hash: computed once, shared by every re-analysis
+DERIVED_DIR = Path("uploads") / "derived"
+
+
+def derived_paths(file_hash: str):
+    """(analysis copy, thumbnail) paths for an original with this content hash."""
+    shard = DERIVED_DIR / file_hash[:2]
+    return shard / f"{file_hash}.analysis.jpg", shard / f"{file_hash}.thumb.jpg"
+
+
+def _save_jpeg(img: Image.Image, path: Path):
+    # Write next to the target and rename, so readers never see a half-written file
+    temp_path = path.with_name(f".{uuid.uuid4()}.tmp")
+    img.save(temp_path, "JPEG", quality=settings.EVIDENCE_DERIVED_JPEG_QUALITY, optimize=True)
+    os.replace(temp_path, path)
+
+
+def build_derivatives(source_path: str, file_hash: str) -> tuple:
+    """
+    Process-pool entry point: decodes the original once and writes a bounded-resolution,
+    re-encoded analysis copy plus a thumbnail. Orientation from EXIF is applied; all
+    other metadata is dropped (forensics always read the original). Returns the paths.
+    """
+    analysis_path, thumbnail_path = derived_paths(file_hash)
+    if analysis_path.exists() and thumbnail_path.exists():
+        return str(analysis_path), str(thumbnail_path)
+    analysis_path.parent.mkdir(parents=True, exist_ok=True)
+
+    max_px = settings.EVIDENCE_ANALYSIS_MAX_PX
+    with Image.open(source_path) as img:
+        # JPEG: decode at the smallest power-of-two scale that still covers max_px
+        img.draft("RGB", (max_px, max_px))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            else:
+                img = img.convert("RGB")
+
+        img.thumbnail((max_px, max_px), Image.Resampling.LANCZOS)
+        _save_jpeg(img, analysis_path)
+
+        thumb_px = settings.EVIDENCE_THUMBNAIL_PX
+        img.thumbnail((thumb_px, thumb_px), Image.Resampling.LANCZOS)
+        _save_jpeg(img, thumbnail_path)
+    return str(analysis_path), str(thumbnail_path)
+
+
+async def prepare_derivatives(source_path: str, file_hash: str) -> tuple:
+    """(analysis copy, thumbnail) for an image, building them in the process pool on first use."""
+    analysis_path, thumbnail_path = derived_paths(file_hash)
+    if analysis_path.exists() and thumbnail_path.exists():
+        return str(analysis_path), str(thumbnail_path)
+    return await run_cpu_bound(build_derivatives, source_path, file_hash)
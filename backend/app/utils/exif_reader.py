@@ -0,0 +1,184 @@
+import struct
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from app.config import settings
+from app.utils.geo import dms_to_decimal, valid_coordinates
+
+# Only the JPEG marker segments before the image data are read (a few KB), never the pixels
+_MAX_SEGMENT_SCAN = 64
+_EXIF_HEADER = b"Exif\x00\x00"
+# Bare TIFF files keep their IFDs near the start; offsets past this window read as absent
+_TIFF_MAGIC = (b"II*\x00", b"MM\x00*")
+_TIFF_HEADER_BYTES = 256 * 1024
+
+# TIFF tags
+_EXIF_IFD_POINTER = 0x8769
+_GPS_IFD_POINTER = 0x8825
+_DATETIME = 0x0132
+_DATETIME_ORIGINAL = 0x9003
+_DATETIME_DIGITIZED = 0x9004
+_OFFSET_TIME = 0x9010
+_OFFSET_TIME_ORIGINAL = 0x9011
+_OFFSET_TIME_DIGITIZED = 0x9012
+_GPS_LATITUDE_REF, _GPS_LATITUDE = 0x0001, 0x0002
+_GPS_LONGITUDE_REF, _GPS_LONGITUDE = 0x0003, 0x0004
+_GPS_TIMESTAMP, _GPS_DATESTAMP = 0x0007, 0x001D
+
+# type id -> (struct code, size in bytes)
+_TYPES = {1: ("B", 1), 2: ("s", 1), 3: ("H", 2), 4: ("I", 4), 5: ("II", 8), 7: ("B", 1),
+          9: ("i", 4), 10: ("ii", 8)}
+
+
+def _read_app1(f) -> bytes:
+    """Returns the TIFF payload of the JPEG's Exif APP1 segment, or None."""
+    for _ in range(_MAX_SEGMENT_SCAN):
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        if marker == 0xFF:  # Fill byte before the real marker
+            f.seek(-3, 1)
+            continue
+        if marker in (0xDA, 0xD9):  # Start of scan / end of image: no EXIF before the pixels
+            return None
+        length = struct.unpack(">H", header[2:])[0]
+        if marker == 0xE1:
+            payload = f.read(length - 2)
+            if payload.startswith(_EXIF_HEADER):
+                return payload[len(_EXIF_HEADER):]
+        else:
+            f.seek(length - 2, 1)
+    return None
+
+
+def _read_tiff_payload(f) -> bytes:
+    """TIFF structure of a JPEG (from its APP1 segment) or of a bare TIFF file, or None."""
+    head = f.read(4)
+    if head in _TIFF_MAGIC:
+        return head + f.read(_TIFF_HEADER_BYTES - 4)
+    if head[:2] != b"\xff\xd8":
+        return None
+    f.seek(2)
+    return _read_app1(f)
+
+
+class _Tiff:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.endian = {b"II": "<", b"MM": ">"}[data[:2]]
+
+    def unpack(self, fmt: str, offset: int):
+        return struct.unpack_from(self.endian + fmt, self.data, offset)
+
+    def ifd(self, offset: int) -> dict:
+        """Tag -> value for one IFD (rationals as floats, ASCII as str)."""
+        entries = {}
+        (count,) = self.unpack("H", offset)
+        for i in range(count):
+            entry = offset + 2 + i * 12
+            tag, type_id, n = self.unpack("HHI", entry)
+            if type_id not in _TYPES:
+                continue
+            code, size = _TYPES[type_id]
+            value_offset = entry + 8 if size * n <= 4 else self.unpack("I", entry + 8)[0]
+            if value_offset + size * n > len(self.data):
+                continue
+            if type_id == 2:
+                raw = self.data[value_offset:value_offset + n]
+                entries[tag] = raw.split(b"\x00", 1)[0].decode("ascii", "ignore").strip()
+            elif type_id in (5, 10):
+                pairs = [self.unpack(code, value_offset + k * size) for k in range(n)]
+                entries[tag] = [num / den if den else 0.0 for num, den in pairs]
+            else:
+                values = [self.unpack(code, value_offset + k * size)[0] for k in range(n)]
+                entries[tag] = values[0] if n == 1 else values
+        return entries
+
+
+def _parse_offset(text: str):
+    """'+05:30' -> tzinfo, or None when the tag is absent or malformed."""
+    if not text:
+        return None
+    try:
+        sign = -1 if text[0] == "-" else 1
+        hours, minutes = text.lstrip("+-").split(":")
+        return timezone(sign * timedelta(hours=int(hours), minutes=int(minutes)))
+    except (ValueError, IndexError, AttributeError, TypeError):
+        return None
+
+
+def _capture_time(exif: dict, gps: dict):
+    """
+    Timezone-aware capture time. Uses the EXIF offset tag when the camera wrote one;
+    otherwise the GPS UTC timestamp; otherwise assumes EXIF_DEFAULT_TIMEZONE.
+    """
+    for time_tag, offset_tag in ((_DATETIME_ORIGINAL, _OFFSET_TIME_ORIGINAL),
+                                 (_DATETIME_DIGITIZED, _OFFSET_TIME_DIGITIZED),
+                                 (_DATETIME, _OFFSET_TIME)):
+        text = exif.get(time_tag)
+        if not text:
+            continue
+        try:
+            local = datetime.strptime(text[:19], "%Y:%m:%d %H:%M:%S")
+        except ValueError:
+            continue
+        tz = _parse_offset(exif.get(offset_tag))
+        if tz is not None:
+            return local.replace(tzinfo=tz)
+        gps_time = _gps_time(gps)
+        if gps_time is not None:
+            return gps_time
+        return local.replace(tzinfo=ZoneInfo(settings.EXIF_DEFAULT_TIMEZONE))
+    return _gps_time(gps)
+
+
+def _gps_time(gps: dict):
+    stamp, date = gps.get(_GPS_TIMESTAMP), gps.get(_GPS_DATESTAMP)
+    if not stamp or not date or len(stamp) != 3:
+        return None
+    try:
+        day = datetime.strptime(date, "%Y:%m:%d").replace(tzinfo=timezone.utc)
+        return day + timedelta(hours=stamp[0], minutes=stamp[1], seconds=stamp[2])
+    except ValueError:
+        return None
+
+
+def read_exif(file_path: str):
+    """
+    Header-only EXIF read: {"lat", "lon", "captured_at"} with signed decimal degrees and
+    a timezone-aware datetime (each None when absent), or None when the file carries no
+    EXIF block. Reads JPEG (Exif APP1) and bare TIFF headers. Never raises on malformed input.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            payload = _read_tiff_payload(f)
+        if not payload:
+            return None
+
+        tiff = _Tiff(payload)
+        ifd0 = tiff.ifd(tiff.unpack("I", 4)[0])
+        exif = {**ifd0, **tiff.ifd(ifd0[_EXIF_IFD_POINTER])} if _EXIF_IFD_POINTER in ifd0 else ifd0
+        gps = tiff.ifd(ifd0[_GPS_IFD_POINTER]) if _GPS_IFD_POINTER in ifd0 else {}
+    except (OSError, KeyError, struct.error, IndexError, TypeError):
+        return None
+
+    try:
+        lat = dms_to_decimal(gps.get(_GPS_LATITUDE), gps.get(_GPS_LATITUDE_REF))
+        lon = dms_to_decimal(gps.get(_GPS_LONGITUDE), gps.get(_GPS_LONGITUDE_REF))
+        if not valid_coordinates(lat, lon):
+            lat = lon = None
+        captured_at = _capture_time(exif, gps)
+    except (ValueError, IndexError, TypeError, OverflowError):
+        return None
+    return {"lat": lat, "lon": lon, "captured_at": captured_at}
+
+
+def read_exif_batch(file_paths: list) -> list:
+    """Process-pool entry point: one round trip for every image of a complaint."""
+    results = []
+    for path in file_paths:
+        try:
+            results.append(read_exif(path))
+        except Exception:
+            results.append(None)  # One bad header only loses that image's metadata
+    return results
@@ -1,35 +1,242 @@
+import asyncio
+import hashlib
+import mimetypes
 import os
 import uuid
 from pathlib import Path
-from fastapi import UploadFile
-import hashlib
+import magic
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+from app.config import settings
+from app.models.evidence import FileType
 
 UPLOAD_DIR = Path("uploads")
+INCOMING_DIR = UPLOAD_DIR / ".incoming"  # Same filesystem as UPLOAD_DIR, so the final rename is atomic
+CHUNK_SIZE = 1024 * 1024  # 1 MB reads/writes
+SNIFF_SIZE = 8192  # Bytes libmagic needs to identify the container
+MULTIPART_OVERHEAD = 64 * 1024  # Boundaries and part headers around the file
 
 # Ensure the upload directory exists
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-async def get_file_hash(upload_file: UploadFile) -> str:
-    """Generates an MD5 hash of the file to detect duplicates."""
-    hash_md5 = hashlib.md5()
-    # Read in chunks to handle large videos/images
-    while chunk := await upload_file.read(4096):
-        hash_md5.update(chunk)
-    await upload_file.seek(0) # IMPORTANT: Reset file pointer
-    return hash_md5.hexdigest()
-
-async def save_upload_file(upload_file: UploadFile) -> str:
-    """Saves a file to local disk and returns the relative path."""
-    # Generate a unique filename to prevent overwrites
-    extension = Path(upload_file.filename).suffix
-    unique_filename = f"{uuid.uuid4()}{extension}"
-    file_path = UPLOAD_DIR / unique_filename
-
-    try:
-        with open(file_path, "wb") as buffer:
-            # Read file in chunks to be memory efficient
-            while content := await upload_file.read(1024 * 1024): # 1MB chunks
-                buffer.write(content)
-        return str(file_path)
-    finally:
-        await upload_file.seek(0) # Reset file pointer for later use (e.g. AI analysis)
\ No newline at end of file
+os.makedirs(INCOMING_DIR, exist_ok=True)
+
+EVIDENCE_MIME_PREFIXES = ("image/", "audio/", "video/", "application/pdf")
+# Browser voice notes arrive as WebM/Ogg containers, which libmagic reports as video/ or application/
+VOICE_MIME_PREFIXES = ("audio/", "video/webm", "application/ogg")
+
+
+def file_type_for(mime_type: str) -> FileType:
+    if mime_type.startswith("image/"):
+        return FileType.IMAGE
+    if mime_type.startswith("audio/") or mime_type == "application/ogg":
+        return FileType.AUDIO
+    if mime_type.startswith("video/"):
+        return FileType.VIDEO
+    return FileType.DOCUMENT
+
+
+def max_bytes_for(file_type: FileType) -> int:
+    limits_mb = {
+        FileType.IMAGE: settings.UPLOAD_MAX_IMAGE_MB,
+        FileType.AUDIO: settings.UPLOAD_MAX_AUDIO_MB,
+        FileType.VIDEO: settings.UPLOAD_MAX_VIDEO_MB,
+        FileType.DOCUMENT: settings.UPLOAD_MAX_DOCUMENT_MB,
+    }
+    return limits_mb[file_type] * 1024 * 1024
+
+
+def upload_openapi(field_name: str = "file") -> dict:
+    """openapi_extra for endpoints that stream their multipart body through StagedUpload."""
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "required": [field_name],
+        "properties": {field_name: {"type": "string", "format": "binary"}},
+    }}}}}
+
+
+def _write_chunk(handle, sha, chunk: bytes):
+    sha.update(chunk)
+    handle.write(chunk)
+
+
+class StagedUpload:
+    """
+    Single-pass upload ingestion straight from the request body: the multipart stream is
+    parsed as it arrives and the file part is hashed (SHA-256) and written to a temp file
+    under uploads/.incoming in a worker thread, with no spooled copy in between. The size
+    limit applies before anything is read (Content-Length) and again as bytes arrive; the
+    real type is sniffed from the first bytes. The caller checks `sha256` for duplicates,
+    then `commit()` renames the file into its content-addressed place; otherwise the temp
+    file is removed on exit.
+
+    Endpoints take `request: Request` instead of an UploadFile parameter, so Starlette
+    never reads the body itself:
+
+        async with StagedUpload(request, EVIDENCE_MIME_PREFIXES) as staged:
+            ... duplicate check on staged.sha256 ...
+            file_path = await staged.commit()
+    """
+
+    def __init__(self, request: Request, allowed_mime_prefixes: tuple, field_name: str = "file"):
+        self.request = request
+        self.allowed_mime_prefixes = allowed_mime_prefixes
+        self.field_name = field_name
+        self.temp_path = INCOMING_DIR / f"{uuid.uuid4()}.part"
+        self.sha256 = None
+        self.size = 0
+        self.mime_type = None
+        self.file_type = None
+        self.filename = None
+        self.path = None
+
+        self._sha = hashlib.sha256()
+        self._handle = None
+        self._head = bytearray()  # First bytes of the file, held until there's enough to sniff
+        self._limit = None
+        self._found = False  # Inside (or past) the file part
+        self._pieces = []  # Parser output for the current network chunk
+
+    async def __aenter__(self):
+        try:
+            await self._stream()
+        except BaseException:
+            await self._discard()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.path is None:
+            await self._discard()
+        return False
+
+    def _body_limit(self) -> int:
+        """Largest body any accepted type could need."""
+        types = {file_type_for(prefix) for prefix in self.allowed_mime_prefixes}
+        return max(max_bytes_for(t) for t in types) + MULTIPART_OVERHEAD
+
+    def _too_large(self, limit: int, label: str):
+        return HTTPException(
+            status_code=413,
+            detail=f"File too large: {label} uploads are limited to {limit // (1024 * 1024)} MB"
+        )
+
+    def _parser(self) -> MultipartParser:
+        content_type, params = parse_options_header(self.request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+        part = {"headers": {}, "field": b"", "value": b""}
+
+        def on_part_begin():
+            part["headers"] = {}
+
+        def on_header_field(data, start, end):
+            part["field"] += data[start:end]
+
+        def on_header_value(data, start, end):
+            part["value"] += data[start:end]
+
+        def on_header_end():
+            part["headers"][part["field"].lower()] = part["value"]
+            part["field"], part["value"] = b"", b""
+
+        def on_headers_finished():
+            _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+            is_file = (disposition.get(b"name", b"").decode("latin-1") == self.field_name
+                       and not self._found)
+            part["is_file"] = is_file
+            if is_file:
+                self._found = True
+                self.filename = disposition.get(b"filename", b"").decode("utf-8", "ignore")
+
+        def on_part_data(data, start, end):
+            if part.get("is_file"):
+                self._pieces.append(data[start:end])
+
+        def on_part_end():
+            if part.get("is_file"):
+                self._pieces.append(None)  # End of the file part
+                part["is_file"] = False
+
+        return MultipartParser(params[b"boundary"], {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        })
+
+    async def _stream(self):
+        # 1. Reject oversized bodies before a single byte is read
+        body_limit = self._body_limit()
+        declared = self.request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > body_limit:
+            raise self._too_large(body_limit - MULTIPART_OVERHEAD, "file")
+
+        parser = self._parser()
+        self._handle = await asyncio.to_thread(open, self.temp_path, "wb")
+        try:
+            received = 0
+            async for chunk in self.request.stream():
+                received += len(chunk)
+                if received > body_limit:  # Chunked bodies, or a lying Content-Length
+                    raise self._too_large(body_limit - MULTIPART_OVERHEAD, "file")
+                parser.write(chunk)
+                await self._consume()
+            parser.finalize()
+            await self._consume()
+        finally:
+            await asyncio.to_thread(self._handle.close)
+
+        if not self._found:
+            raise HTTPException(status_code=400, detail=f"Missing '{self.field_name}' file field")
+        if self.mime_type is None:
+            raise HTTPException(status_code=400, detail="Empty file")
+        self.sha256 = self._sha.hexdigest()
+
+    async def _consume(self):
+        pieces, self._pieces = self._pieces, []
+        for piece in pieces:  # Bytes of the file part; None marks its end
+            if self.mime_type is None:
+                if piece is not None:
+                    self._head += piece
+                    if len(self._head) < SNIFF_SIZE:
+                        continue
+                elif not self._head:
+                    continue  # Empty file part
+                self._sniff()
+                head, self._head = bytes(self._head), bytearray()
+                await self._write(head)
+            elif piece is not None:
+                await self._write(piece)
+
+    def _sniff(self):
+        self.mime_type = magic.from_buffer(bytes(self._head[:SNIFF_SIZE]), mime=True)
+        if not self.mime_type.startswith(self.allowed_mime_prefixes):
+            raise HTTPException(status_code=415, detail=f"Unsupported file type: {self.mime_type}")
+        self.file_type = file_type_for(self.mime_type)
+        self._limit = max_bytes_for(self.file_type)
+
+    async def _write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self._limit:
+            raise self._too_large(self._limit, self.file_type.value)
+        await asyncio.to_thread(_write_chunk, self._handle, self._sha, data)
+
+    def _extension(self) -> str:
+        extension = mimetypes.guess_extension(self.mime_type or "")
+        if not extension:
+            extension = Path(self.filename or "").suffix.lower()
+        return extension or ""
+
+    async def commit(self) -> str:
+        """Moves the staged file to uploads/<sha256><ext> and returns that path."""
+        final_path = UPLOAD_DIR / f"{self.sha256}{self._extension()}"
+        # Identical content always lands on the same path, so replacing an existing copy is harmless
+        await asyncio.to_thread(os.replace, self.temp_path, final_path)
+        self.path = str(final_path)
+        return self.path
+
+    async def _discard(self):
+        await asyncio.to_thread(self.temp_path.unlink, True)
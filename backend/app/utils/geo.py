@@ -0,0 +1,176 @@
+import math
+import re
+
+# Geohash cells are stored at these precisions (Chroma metadata keys gh4..gh7, roughly
+# 39 km down to 150 m cells) so any search radius maps onto one indexed equality lookup.
+GEOHASH_INDEX_PRECISIONS = (4, 5, 6, 7)
+GEOHASH_PRECISION = 9  # Stored on the complaint row (~5 m), prefixes give every coarser cell
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+_EARTH_RADIUS_KM = 6371.0088
+_KM_PER_DEGREE = 111.32
+
+
+def dms_to_decimal(dms, ref: str = None):
+    """
+    Converts an EXIF (degrees, minutes, seconds) tuple into signed decimal degrees.
+    Also accepts the stringified tuples older rows stored, e.g. "(18.0, 31.0, 12.6)".
+    Returns None when the value can't be parsed.
+    """
+    if dms is None:
+        return None
+    if isinstance(dms, str):
+        parts = [float(p) for p in re.findall(r"-?\d+(?:\.\d+)?", dms)]
+    else:
+        try:
+            parts = [float(p) for p in dms]
+        except TypeError:
+            parts = [float(dms)]
+    if not parts:
+        return None
+
+    degrees = parts[0]
+    minutes = parts[1] if len(parts) > 1 else 0.0
+    seconds = parts[2] if len(parts) > 2 else 0.0
+    value = abs(degrees) + minutes / 60 + seconds / 3600
+    if degrees < 0 or (ref and ref.strip().upper() in ("S", "W")):
+        value = -value
+    return round(value, 7)
+
+
+def valid_coordinates(lat, lon) -> bool:
+    return (lat is not None and lon is not None
+            and -90 <= lat <= 90 and -180 <= lon <= 180
+            and not (lat == 0 and lon == 0))  # Null Island = missing GPS fix
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str):
+    """Returns (min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def geohash_decode(geohash: str):
+    """Returns the (lat, lon) centre of a geohash cell."""
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+
+def geohash_neighbors(geohash: str) -> list:
+    """The cell itself plus its 8 neighbours (same precision)."""
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(geohash)
+    lat, lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    d_lat, d_lon = max_lat - min_lat, max_lon - min_lon
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            n_lat = max(-89.999999, min(89.999999, lat + i * d_lat))
+            n_lon = (lon + j * d_lon + 180) % 360 - 180
+            cells.add(geohash_encode(n_lat, n_lon, len(geohash)))
+    return sorted(cells)
+
+
+def geohash_cells_covering(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                           precision: int) -> list:
+    """Every geohash cell of `precision` that intersects the bounding box, row by row."""
+    south, west, north, east = geohash_bounds(geohash_encode(min_lat, min_lon, precision))
+    lat_step, lon_step = north - south, east - west
+    cells = []
+    lat = south + lat_step / 2
+    while lat - lat_step / 2 < max_lat and lat < 90:
+        lon = west + lon_step / 2
+        while lon - lon_step / 2 < max_lon and lon < 180:
+            cells.append(geohash_encode(lat, lon, precision))
+            lon += lon_step
+        lat += lat_step
+    return cells
+
+
+def _cell_size_km(precision: int, lat: float):
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 - lon_bits
+    height = 180 / (2 ** lat_bits) * _KM_PER_DEGREE
+    width = 360 / (2 ** lon_bits) * _KM_PER_DEGREE * math.cos(math.radians(lat))
+    return height, width
+
+
+def precision_for_radius(radius_km: float, lat: float) -> int:
+    """Finest indexed precision whose cells are at least `radius_km` on each side."""
+    chosen = GEOHASH_INDEX_PRECISIONS[0]
+    for precision in GEOHASH_INDEX_PRECISIONS:
+        if min(_cell_size_km(precision, lat)) >= radius_km:
+            chosen = precision
+    return chosen
+
+
+def cells_within(lat: float, lon: float, radius_km: float):
+    """
+    Geohash cells that together cover the circle of `radius_km` around a point:
+    the point's cell and its neighbours at a precision no smaller than the radius.
+    Returns (precision, cells); candidates still need an exact haversine check.
+    """
+    precision = precision_for_radius(radius_km, lat)
+    return precision, geohash_neighbors(geohash_encode(lat, lon, precision))
+
+
+def normalize_place(text: str) -> str:
+    """Lower-case, punctuation-free, single-spaced form used for gazetteer matching."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(text or "").lower()).split())
+
+
+def tile_bounds(z: int, x: int, y: int):
+    """Slippy-map (Web Mercator) tile -> (min_lat, min_lon, max_lat, max_lon)."""
+    n = 2 ** z
+
+    def lat_at(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return lat_at(y + 1), x / n * 360 - 180, lat_at(y), (x + 1) / n * 360 - 180
+
+
+def geohash_precision_for_zoom(zoom: int) -> int:
+    """Aggregation cell size per map zoom: about 4-16 geohash cells across one tile."""
+    for max_zoom, precision in ((1, 1), (3, 2), (5, 3), (8, 4), (10, 5), (12, 6)):
+        if zoom <= max_zoom:
+            return precision
+    return 7
@@ -0,0 +1,29 @@
+from PIL import Image, ImageOps
+
+HASH_BITS = 64
+_HASH_SIZE = 8  # 8x8 gradient bits
+
+
+def dhash(file_path: str) -> str:
+    """
+    64-bit difference hash as 16 hex chars: the image is shrunk to 9x8 grey pixels and
+    each bit records whether a pixel is brighter than its right neighbour. Survives
+    re-encoding, resizing and mild colour edits; a few bits flip for crops/screenshots.
+    """
+    with Image.open(file_path) as img:
+        # JPEG: let the decoder downscale by up to 8x instead of decoding every pixel
+        img.draft("L", (_HASH_SIZE * 8, _HASH_SIZE * 8))
+        img = ImageOps.exif_transpose(img).convert("L").resize(
+            (_HASH_SIZE + 1, _HASH_SIZE), Image.Resampling.LANCZOS)
+        pixels = list(img.getdata())
+
+    value = 0
+    for row in range(_HASH_SIZE):
+        offset = row * (_HASH_SIZE + 1)
+        for col in range(_HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:016x}"
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
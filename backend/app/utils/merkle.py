@@ -0,0 +1,58 @@
+from eth_utils import keccak
+
+# Sorted-pair keccak tree (same convention as OpenZeppelin's MerkleProof), so proofs
+# need no left/right flags and can also be checked inside a contract later.
+
+
+def _to_bytes(hex_str: str) -> bytes:
+    return bytes.fromhex(hex_str[2:] if hex_str.startswith("0x") else hex_str)
+
+
+def _to_hex(value: bytes) -> str:
+    return "0x" + value.hex()
+
+
+def merkle_leaf(manifest_hash: str) -> bytes:
+    """Leaves are double-hashed so an inner node can never be passed off as a manifest."""
+    return keccak(_to_bytes(manifest_hash))
+
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    return keccak(a + b) if a <= b else keccak(b + a)
+
+
+def build_merkle_tree(manifest_hashes: list) -> list:
+    """Returns every level of the tree, leaves first and the root level last."""
+    if not manifest_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [[merkle_leaf(h) for h in manifest_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2 == 1:
+            parents.append(level[-1])  # Odd node is carried up unchanged
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(levels: list) -> str:
+    return _to_hex(levels[-1][0])
+
+
+def merkle_proof(levels: list, index: int) -> list:
+    """Sibling hashes from the leaf at `index` up to (but excluding) the root."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(_to_hex(level[sibling]))
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(manifest_hash: str, proof: list, root: str) -> bool:
+    node = merkle_leaf(manifest_hash)
+    for sibling in proof:
+        node = _hash_pair(node, _to_bytes(sibling))
+    return _to_hex(node) == root.lower()
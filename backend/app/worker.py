@@ -1,39 +1,495 @@
-from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_shutdown, worker_process_shutdown
 from app.config import settings
-from app.database import SessionLocal
+from app.core.queue import celery_app
+from app.core.registry import registry
+from app.core.runtime import AsyncRuntime
+from app.core.cpu_pool import run_cpu_bound, shutdown_cpu_pool
+from app.database import SessionLocal, engine
+from app.jobs.recluster import build_job as build_recluster_job
 from app.models.complaint import Complaint
 from app.models.evidence import Evidence
-from app.models.cluster import CaseCluster
 from app.models.department import Department
 from app.services.ai_service import ai_service
-from app.services.gemini_service import extract_exif_data
+from app.services.analytics_service import analytics_service
+from app.services.cluster_service import cluster_service
+from app.services.department_router import department_router
 from app.services.embedding_service import embedding_service
+from app.services.evidence_index import evidence_index
+from app.services.geo_service import geo_service
+from app.services.map_service import map_service
 from app.services.blockchain_service import blockchain_service
+from app.services.cache_service import ai_cache
 from app.services.notification_service import notification_service
-from sqlalchemy import select, update, func
-from datetime import datetime
+from app.services.progress_service import progress_service
+from app.services.stt_service import stt_service
+from app.utils.geo import geohash_encode
+from app.utils.merkle import build_merkle_tree, merkle_root, merkle_proof
+from app.utils.image_hash import dhash
+from app.utils.derived_images import prepare_derivatives
+from app.utils.exif_reader import read_exif_batch
+from sqlalchemy import select, update, text
+from datetime import datetime, timezone
 import asyncio
+import json
 import logging
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-celery_app = Celery(
-    "worker",
-    broker="redis://127.0.0.1:6379/0",
-    backend="redis://127.0.0.1:6379/0"
+# The pipeline is I/O-bound, so one process runs many of them on a single event loop.
+# Pool threads only hand coroutines over to the runtime and wait for them.
+celery_app.conf.update(
+    worker_pool="threads",
+    worker_concurrency=settings.WORKER_CONCURRENCY,
+    worker_prefetch_multiplier=1
 )
 
+# Periodic jobs; requires a beat process: celery -A app.worker.celery_app beat
+celery_app.conf.beat_schedule = {
+    "drain-transaction-queue": {
+        "task": "drain_transaction_queue",
+        "schedule": settings.BLOCKCHAIN_SENDER_INTERVAL_SECONDS,
+    },
+    "poll-transaction-receipts": {
+        "task": "poll_transaction_receipts",
+        "schedule": settings.BLOCKCHAIN_RECEIPT_POLL_SECONDS,
+    },
+    "deliver-notifications": {
+        "task": "deliver_notifications",
+        "schedule": settings.NOTIFY_DELIVERY_INTERVAL_SECONDS,
+    },
+    "refresh-map-cells": {
+        "task": "refresh_map_cells",
+        "schedule": settings.MAP_CELLS_REFRESH_SECONDS,
+    },
+    "reconcile-analytics-rollups": {
+        "task": "reconcile_analytics_rollups",
+        "schedule": crontab(hour=settings.ANALYTICS_RECONCILE_HOUR, minute=0),
+    },
+}
+if settings.NOTIFY_DIGEST_MAX_SEVERITY > 0:
+    celery_app.conf.beat_schedule["send-notification-digests"] = {
+        "task": "send_notification_digests",
+        "schedule": settings.NOTIFY_DIGEST_INTERVAL_SECONDS,
+    }
+if settings.BLOCKCHAIN_ANCHOR_MODE == "batch":
+    celery_app.conf.beat_schedule["anchor-pending-manifests"] = {
+        "task": "anchor_pending_manifests",
+        "schedule": settings.BLOCKCHAIN_BATCH_INTERVAL_SECONDS,
+    }
+
+runtime = AsyncRuntime(concurrency=settings.WORKER_CONCURRENCY)
+
+
+@runtime.on_startup
+async def warm_up_clients():
+    """Opens a DB connection and builds every lazy client before the first task arrives."""
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await asyncio.to_thread(registry.build_all)
+    await embedding_service.warm_up()
+    async with SessionLocal() as db:
+        await evidence_index.refresh(db)
+
+
+@runtime.on_shutdown
+async def dispose_clients():
+    await ai_cache.flush_stats()  # Last lookups into the shared counters
+    await asyncio.to_thread(shutdown_cpu_pool)
+    await engine.dispose()
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def stop_runtime(**kwargs):
+    runtime.stop()
+
 
 def run_async(coro):
-    loop = asyncio.get_event_loop()
-    return loop.run_until_complete(coro)
+    return runtime.run(coro)
+
+
+async def mark_analysis_failed(complaint_id: int, error: str):
+    """Crash path of a pipeline task: the complaint must not stay "processing"/"transcribing" forever."""
+    try:
+        async with SessionLocal() as db:
+            await db.execute(update(Complaint).where(Complaint.id == complaint_id).values(analysis_status="failed"))
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Could not mark complaint {complaint_id} as failed: {e}")
+    await progress_service.publish(complaint_id, "failed", error=error)
 
 
 @celery_app.task(name="analyze_complaint_task")
 def analyze_complaint_task(complaint_id: int):
-    run_async(process_analysis(complaint_id))
+    try:
+        run_async(process_analysis(complaint_id))
+    except Exception as e:
+        run_async(mark_analysis_failed(complaint_id, type(e).__name__))
+        raise
+
+
+@celery_app.task(name="transcribe_voice_complaint", bind=True, max_retries=settings.STT_MAX_RETRIES)
+def transcribe_voice_complaint(self, complaint_id: int, audio_path: str, file_hash: str):
+    final_attempt = self.request.retries >= self.max_retries
+    try:
+        transcribed = run_async(process_voice_complaint(complaint_id, audio_path, file_hash, final_attempt))
+    except Exception as e:
+        run_async(mark_analysis_failed(complaint_id, type(e).__name__))
+        run_async(stt_service.discard_chunks(audio_path, file_hash))  # Errors aren't retried
+        raise
+    if transcribed:
+        analyze_complaint_task.delay(complaint_id)
+    elif not final_attempt:
+        # Chunks that already succeeded are cached, so the retry only re-sends the rest
+        raise self.retry(countdown=settings.STT_RETRY_DELAY_SECONDS * (self.request.retries + 1))
+    else:
+        run_async(stt_service.discard_chunks(audio_path, file_hash))  # No retry is left to resume them
+
+
+@celery_app.task(name="analyze_complaints_batch")
+def analyze_complaints_batch(complaint_ids: list):
+    run_async(process_analysis_batch(complaint_ids))
+
+
+@celery_app.task(name="anchor_pending_manifests")
+def anchor_pending_manifests():
+    run_async(anchor_manifest_batch())
+
+
+@celery_app.task(name="recluster_corpus")
+def recluster_corpus(distance_threshold: float = None):
+    # Matrix work runs in this pool thread; only the DB phases go through the runtime loop
+    return build_recluster_job(distance_threshold).run(run_coroutine=run_async)
+
+
+@celery_app.task(name="drain_transaction_queue")
+def drain_transaction_queue():
+    submitter = blockchain_service.submitter
+    with submitter.exclusive("sender") as is_sender:
+        if is_sender:
+            sent, abandoned = submitter.drain()
+            if sent:
+                logger.info(f"📡 Broadcast {sent} queued transaction(s)")
+            if abandoned:
+                run_async(record_anchor_outcomes([(job, False) for job in abandoned]))
+
+
+@celery_app.task(name="deliver_notifications")
+def deliver_notifications():
+    run_async(deliver_outbox())
+
+
+@celery_app.task(name="reconcile_analytics_rollups")
+def reconcile_analytics_rollups():
+    run_async(reconcile_rollups())
+
+
+@celery_app.task(name="refresh_map_cells")
+def refresh_map_cells():
+    run_async(rebuild_map_cells())
+
+
+@celery_app.task(name="send_notification_digests")
+def send_notification_digests():
+    run_async(deliver_digests())
+
+
+@celery_app.task(name="poll_transaction_receipts")
+def poll_transaction_receipts():
+    submitter = blockchain_service.submitter
+    with submitter.exclusive("receipts") as is_poller:
+        if not is_poller:
+            return
+        outcomes = submitter.poll_receipts()
+        if outcomes:
+            run_async(record_anchor_outcomes(outcomes))
+            submitter.acknowledge([job["tx_hash"] for job, _ in outcomes])
+
+
+async def verify_evidence(ev: Evidence, description: str, limiter: asyncio.Semaphore, metadata: dict) -> float:
+    """Forensic metadata check + Vision Truth Engine for one image. Returns its evidence score."""
+    async with limiter:
+        if ev.perceptual_hash is None:
+            # Evidence uploaded before perceptual hashing: backfill it on first analysis
+            try:
+                ev.perceptual_hash = await run_cpu_bound(dhash, ev.file_url)
+                evidence_index.add(ev.id, ev.perceptual_hash, ev.file_hash)
+            except Exception as e:
+                logger.warning(f"Perceptual hash failed for evidence {ev.id}: {e}")
+
+        # The vision model gets the bounded-resolution analysis copy (built once per file hash)
+        vision_path = ev.file_url
+        try:
+            vision_path, _ = await prepare_derivatives(ev.file_url, ev.file_hash or f"evidence-{ev.id}")
+        except Exception as e:
+            logger.warning(f"Analysis copy failed for evidence {ev.id}, sending the original: {e}")
+
+        # Near-identical copies of an already judged photo share its cached verdict
+        vision_result = await ai_service.process_evidence(
+            vision_path, description, file_hash=evidence_index.canonical_file_hash(ev))
+
+    metadata_penalty = 0
+    if metadata:
+        if metadata["lat"] is not None:
+            ev.latitude = metadata["lat"]
+            ev.longitude = metadata["lon"]
+        if metadata["captured_at"] is not None:
+            ev.captured_at = metadata["captured_at"]
+            if (datetime.now(timezone.utc) - ev.captured_at).days > 30:
+                metadata_penalty = 3.0  # Stale evidence penalty
+
+    ev.is_valid_evidence = vision_result.get("is_relevant", False)
+    ev.validation_remarks = vision_result.get("remarks", "")
+
+    conf_score = float(vision_result.get("confidence_score", 1))
+    if ev.is_valid_evidence:
+        return max(1, conf_score - metadata_penalty)
+    return 1  # Base score for irrelevant/spam
+
+
+async def verify_evidences(evidences: list, description: str) -> list:
+    """Verifies a complaint's images; their EXIF headers are read in one process-pool round trip."""
+    if not evidences:
+        return []
+    # Header-only reads (from the originals: the analysis copies carry no metadata)
+    try:
+        metadata = await run_cpu_bound(read_exif_batch, [ev.file_url for ev in evidences])
+    except Exception as e:
+        logger.warning(f"EXIF read failed, verifying without metadata: {e}")
+        metadata = [None] * len(evidences)
+    limiter = asyncio.Semaphore(settings.ANALYSIS_EVIDENCE_CONCURRENCY)
+    return await asyncio.gather(
+        *(verify_evidence(ev, description, limiter, md) for ev, md in zip(evidences, metadata))
+    )
+
+
+async def score_complaint(db_complaint: Complaint, evidences: list):
+    """
+    Stages 2-4: multilingual triage + evidence verification -> base score.
+    Fills in the English title/summary and returns (final_score, text_analysis).
+    """
+    # Text triage (Groq, 60% weight) and evidence verification (EXIF + Gemini, 40% weight)
+    # are independent of each other, so they run at the same time.
+    image_evidences = [ev for ev in evidences if ev.file_type == "image"]
+
+    full_text = f"Title: {db_complaint.title}. Description: {db_complaint.description}"
+    text_analysis, evidence_scores = await asyncio.gather(
+        ai_service.triage_complaint(full_text),
+        verify_evidences(image_evidences, db_complaint.description)
+    )
+
+    await progress_service.publish(db_complaint.id, "triaged", category=text_analysis.get("category"),
+                                   severity=text_analysis.get("severity"))
+    await progress_service.publish(db_complaint.id, "evidence_checked", images=len(image_evidences))
+
+    base_severity = float(text_analysis.get("severity", 1))
+    db_complaint.title_en = text_analysis.get("translated_title_en")
+    db_complaint.summary_en = text_analysis.get("summary_en")
+
+    # Scores come back in evidence order, so the sum matches the sequential loop exactly
+    evidence_score_sum = sum(evidence_scores)
+    evidence_count = len(evidence_scores)
+
+    # Final Base Score Calculation
+    if evidence_count > 0:
+        avg_evidence_score = evidence_score_sum / evidence_count
+        final_score = (base_severity * 0.6) + (avg_evidence_score * 0.4)
+    else:
+        final_score = base_severity
+
+    return final_score, text_analysis
+
+
+def locate_complaint(db_complaint: Complaint, evidences: list):
+    """Stage 5 prep: numeric position, geohash and gazetteer locality for the complaint."""
+    gps_fixes = [(ev.latitude, ev.longitude) for ev in evidences]
+    lat, lon, locality_key = geo_service.locate(db_complaint.location, gps_fixes)
+    db_complaint.latitude = lat
+    db_complaint.longitude = lon
+    db_complaint.locality_key = locality_key
+    db_complaint.geohash = geohash_encode(lat, lon) if lat is not None else None
+
+
+def vector_metadata(db_complaint: Complaint, text_analysis: dict) -> dict:
+    return {
+        "location": str(db_complaint.location),
+        "category": text_analysis.get("category"),
+        **geo_service.vector_metadata(db_complaint.latitude, db_complaint.longitude, db_complaint.locality_key,
+                                     db_complaint.location)
+    }
+
+
+def spatial_filter(db_complaint: Complaint):
+    return geo_service.spatial_filter(db_complaint.latitude, db_complaint.longitude, db_complaint.locality_key,
+                                      db_complaint.location)
+
+
+async def apply_case_clustering(db, db_complaint: Complaint, similar_cases: list, final_score: float,
+                                text_analysis: dict) -> float:
+    """Stage 5 C/D: exact radius check + cluster back-linking. Returns the density-boosted score."""
+    # C. SPATIAL FILTER: the vector query was already restricted to the surrounding
+    # geohash cells (or locality); drop the candidates in cell corners beyond the radius
+    local_matches = [
+        c for c in similar_cases
+        if geo_service.within_radius(db_complaint.latitude, db_complaint.longitude, c['metadata'])
+    ]
+
+    # D. CLUSTERING & BACK-LINKING
+    if len(local_matches) >= 2:
+        logger.warning(f"⚠️ SYSTEMIC CLUSTER IDENTIFIED IN {db_complaint.location}")
+
+        # Feature 3: Sliding Scale Boost
+        avg_dist = sum(c['distance'] for c in local_matches) / len(local_matches)
+        density_boost = len(local_matches) * (1.0 - avg_dist)
+        final_score += min(3.0, density_boost)
+
+        # Feature 2: Persistent Back-linking & Group Management
+        # (overlapping clusters are unioned, aggregates move by deltas)
+        await cluster_service.assign(
+            db, db_complaint,
+            match_ids=[int(m['id']) for m in local_matches],
+            severity=max(1.0, min(10.0, final_score)),
+            cluster_name=f"Hotspot: {db_complaint.location} - {text_analysis.get('category', 'General')}",
+            category=text_analysis.get("category"),
+            location_zone=db_complaint.locality_key or db_complaint.location
+        )
+
+    await progress_service.publish(db_complaint.id, "clustered", cluster_id=db_complaint.cluster_id,
+                                   local_matches=len(local_matches))
+    return final_score
+
+
+async def finalize_complaint(db, db_complaint: Complaint, evidences: list, final_score: float,
+                             text_analysis: dict, all_departments: list):
+    """Module 8 + stages 6-8: department routing, final triage, anchoring and notification."""
+    complaint_id = db_complaint.id
+
+    # 🚀 NEW: MODULE 8 - DEPARTMENT AUTO-ASSIGNMENT
+    logger.info(f"📂 Categorizing Department for ID {complaint_id}...")
+
+    # Nearest department by embedding; the LLM is only asked for close calls
+    assigned_dept_id, route_source = await department_router.route(
+        description_en=db_complaint.summary_en or db_complaint.description,
+        departments=all_departments
+    )
+
+    if assigned_dept_id:
+        db_complaint.department_id = assigned_dept_id
+        logger.info(f"📍 Automatically assigned to Department ID: {assigned_dept_id} (via {route_source})")
+    await progress_service.publish(complaint_id, "routed", department_id=db_complaint.department_id)
+
+    # 6. Persistence & Final Triage
+    if text_analysis.get("is_urgent", False): final_score = max(final_score, 8.5)
+    await cluster_service.rescore(db, db_complaint, int(round(max(1, min(10, final_score)))))
+    db_complaint.analysis_status = "completed"
+
+    # 7. BLOCKCHAIN ANCHORING (Feature: Immutable Proof of Stake)
+    anchor_tx = None
+    evidence_hashes = [ev.file_hash for ev in evidences if ev.file_hash]
+
+    manifest_hash = blockchain_service.generate_manifest_hash(
+        complaint_data={
+            "id": db_complaint.id,
+            "description": db_complaint.description,
+            "severity": db_complaint.severity_score,
+            "filed_at": db_complaint.filed_at
+        },
+        evidence_hashes=evidence_hashes
+    )
+
+    if settings.BLOCKCHAIN_ANCHOR_MODE == "batch":
+        # anchor_pending_manifests seals it together with the other pending manifests.
+        # A complaint already covered by an on-chain root keeps its original proof.
+        if db_complaint.merkle_root is None:
+            db_complaint.manifest_hash = manifest_hash
+            logger.info(f"🧾 Manifest queued for batch anchoring (ID {complaint_id})")
+    else:
+        db_complaint.manifest_hash = manifest_hash
+        logger.info(f"🔗 Anchoring Manifest to Blockchain for ID {complaint_id}...")
+        # Only signs + queues; blockchain_hash is written by the receipt poller once mined
+        anchor_tx = await blockchain_service.anchor_to_blockchain(db_complaint.id, manifest_hash)
+
+        if anchor_tx:
+            logger.info(f"📤 Anchor queued for ID {complaint_id}. TXID: {anchor_tx}")
+    await progress_service.publish(complaint_id, "anchored", mode=settings.BLOCKCHAIN_ANCHOR_MODE,
+                                   manifest_hash=db_complaint.manifest_hash,
+                                   blockchain_hash=db_complaint.blockchain_hash,  # Mined only
+                                   pending_tx=anchor_tx)  # Queued; may be re-signed under a new hash
+
+    # 🚀 STEP 8: AUTOMATED DEPARTMENT NOTIFICATION
+    if db_complaint.department_id:
+        # The department rows are already loaded for routing
+        dept_obj = next((d for d in all_departments if d.id == db_complaint.department_id), None)
+
+        if dept_obj and dept_obj.contact_email:
+            logger.info(f"📧 Queueing notification for {dept_obj.name}...")
+
+            complaint_data_for_mail = {
+                "id": db_complaint.id,
+                "title": db_complaint.title_en or db_complaint.title,
+                "severity": db_complaint.severity_score,
+                "location": db_complaint.location,
+                "summary": db_complaint.summary_en or db_complaint.description,
+                "blockchain_hash": db_complaint.blockchain_hash,
+                "pending_tx": None if db_complaint.blockchain_hash else anchor_tx
+            }
+
+            # Written to the outbox in this same transaction; delivered by deliver_notifications
+            notification_service.queue_department_alert(db, dept_obj, complaint_data_for_mail)
+
+
+async def publish_transcript_chunk(complaint_id: int, partial: dict):
+    """Streams one finished chunk (in completion order) with its text and offsets in the recording."""
+    failed = "error" in partial
+    await progress_service.publish(
+        complaint_id, "transcribing",
+        completed=partial["completed"], total=partial["total"], failed=failed,
+        index=partial["index"], start=partial["start"], end=partial["end"],
+        text=None if failed else partial["text"]
+    )
+
+
+async def process_voice_complaint(complaint_id: int, audio_path: str, file_hash: str, final_attempt: bool) -> bool:
+    """
+    Voice stage before analysis: transcribes the recording (already stored as the
+    complaint's audio evidence by the endpoint), derives the title and hands the
+    complaint on (analysis_status -> "processing").
+    Returns False when transcription failed; on the last attempt the complaint is marked "failed".
+    """
+    async def report_chunk(partial: dict):
+        await publish_transcript_chunk(complaint_id, partial)
+
+    transcript = await stt_service.transcribe(audio_path, file_hash=file_hash, on_partial=report_chunk)
+
+    async with SessionLocal() as db:
+        db_complaint = (await db.execute(select(Complaint).filter(Complaint.id == complaint_id))).scalar_one_or_none()
+        if not db_complaint:
+            logger.error(f"Voice complaint {complaint_id} not found.")
+            return False
+
+        if not transcript or not transcript["text"]:
+            if final_attempt:
+                db_complaint.title = "Voice Report (transcription failed)"
+                db_complaint.analysis_status = "failed"
+                await db.commit()
+                await progress_service.publish(complaint_id, "failed", error="transcription")
+            logger.error(f"🎙️ Transcription failed for complaint {complaint_id} (final attempt: {final_attempt})")
+            return False
+
+        transcript_text = transcript["text"]
+        generated_title = transcript_text[:50] + "..." if len(transcript_text) > 50 else transcript_text
+        db_complaint.title = f"Voice Report: {generated_title}"
+        db_complaint.description = transcript_text
+        db_complaint.analysis_status = "processing"
+        await db.commit()
+
+    await progress_service.publish(complaint_id, "transcribed", title=generated_title,
+                                   language=transcript["language"], duration=transcript["duration"])
+    logger.info(f"🎙️ Transcribed voice complaint {complaint_id} ({transcript['duration']:.0f}s, {transcript['language']})")
+    return True
 
 
 async def process_analysis(complaint_id: int):
@@ -47,187 +503,209 @@ async def process_analysis(complaint_id: int):
 
         logger.info(f"🚀 Starting Intelligence Orchestration for ID: {complaint_id}")
 
-        # 2. Multilingual Text Analysis (Groq) - 60% Weight
-        full_text = f"Title: {db_complaint.title}. Description: {db_complaint.description}"
-        text_analysis = await ai_service.triage_complaint(full_text)
-
-        base_severity = float(text_analysis.get("severity", 1))
-        db_complaint.title_en = text_analysis.get("translated_title_en")
-        db_complaint.summary_en = text_analysis.get("summary_en")
-        is_urgent_text = text_analysis.get("is_urgent", False)
-
-        # 3. Evidence & Metadata Verification - 40% Weight
+        # 2-4. Triage + Evidence Verification -> Base Score
         ev_result = await db.execute(select(Evidence).filter(Evidence.complaint_id == complaint_id))
         evidences = ev_result.scalars().all()
-
-        evidence_score_sum = 0
-        evidence_count = 0
-
-        for ev in evidences:
-            if ev.file_type == "image":
-                # Metadata extraction
-                metadata = extract_exif_data(ev.file_url)
-                metadata_penalty = 0
-                if metadata:
-                    ev.latitude = str(metadata.get("lat"))
-                    ev.longitude = str(metadata.get("lon"))
-                    if metadata.get("time"):
-                        try:
-                            captured_dt = datetime.strptime(metadata['time'], '%Y:%m:%d %H:%M:%S')
-                            ev.captured_at = captured_dt
-                            if (datetime.now() - captured_dt).days > 30:
-                                metadata_penalty = 3.0  # Stale evidence penalty
-                        except:
-                            pass
-
-                # Vision Truth Engine
-                vision_result = await ai_service.process_evidence(ev.file_url, db_complaint.description)
-                ev.is_valid_evidence = vision_result.get("is_relevant", False)
-                ev.validation_remarks = vision_result.get("remarks", "")
-
-                conf_score = float(vision_result.get("confidence_score", 1))
-                if ev.is_valid_evidence:
-                    evidence_score_sum += max(1, conf_score - metadata_penalty)
-                else:
-                    evidence_score_sum += 1  # Base score for irrelevant/spam
-                evidence_count += 1
-
-        # 4. Final Base Score Calculation
-        if evidence_count > 0:
-            avg_evidence_score = evidence_score_sum / evidence_count
-            final_score = (base_severity * 0.6) + (avg_evidence_score * 0.4)
-        else:
-            final_score = base_severity
+        await evidence_index.refresh(db)
+        final_score, text_analysis = await score_complaint(db_complaint, evidences)
 
         # 5. VECTOR DB: INDEXING & REFINED CASE CLUSTERING
         analysis_txt = db_complaint.summary_en or db_complaint.description
-        current_loc_parts = set(str(db_complaint.location).lower().replace(',', '').split())
 
-        # A. Indexing
-        await embedding_service.index_complaint(
-            complaint_id=db_complaint.id,
-            text=analysis_txt,
-            metadata={"location": str(db_complaint.location), "category": text_analysis.get("category")}
-        )
+        locate_complaint(db_complaint, evidences)
+        where = spatial_filter(db_complaint)
 
-        # B. Finding Matches
-        similar_cases = await embedding_service.find_similar_cases(analysis_txt, distance_threshold=0.45)
-
-        # C. SPATIAL FILTER: Handles variations like "Baner" vs "Baner, Pune"
-        local_matches = []
-        for c in similar_cases:
-            match_loc_parts = set(str(c['metadata'].get('location', '')).lower().replace(',', '').split())
-            if current_loc_parts & match_loc_parts:  # Intersection check
-                local_matches.append(c)
-
-        # D. CLUSTERING & BACK-LINKING
-        if len(local_matches) >= 2:
-            logger.warning(f"⚠️ SYSTEMIC CLUSTER IDENTIFIED IN {db_complaint.location}")
-
-            # Feature 3: Sliding Scale Boost
-            avg_dist = sum(c['distance'] for c in local_matches) / len(local_matches)
-            density_boost = len(local_matches) * (1.0 - avg_dist)
-            final_score += min(3.0, density_boost)
-
-            # Feature 2: Persistent Back-linking & Group Management
-            match_ids = [int(m['id']) for m in local_matches]
-
-            # Check if anyone in this group already belongs to a cluster
-            res = await db.execute(
-                select(Complaint.cluster_id).filter(Complaint.id.in_(match_ids), Complaint.cluster_id != None))
-            existing_cluster_id = res.scalar()
-
-            if existing_cluster_id:
-                # Add current to existing file
-                db_complaint.cluster_id = existing_cluster_id
-                # Atomic Count Update: Count all linked to this cluster + this new one
-                res_count = await db.execute(
-                    select(func.count(Complaint.id)).filter(Complaint.cluster_id == existing_cluster_id))
-                actual_total = (res_count.scalar() or 0) + 1
-                await db.execute(update(CaseCluster).where(CaseCluster.id == existing_cluster_id).values(
-                    complaint_count=actual_total))
-            else:
-                # Create NEW Cluster and link ALL existing matches to it
-                new_cluster = CaseCluster(
-                    cluster_name=f"Hotspot: {db_complaint.location} - {text_analysis.get('category', 'General')}",
-                    category=text_analysis.get("category"),
-                    location_zone=db_complaint.location,
-                    avg_severity=int(final_score),
-                    complaint_count=len(match_ids)
-                )
-                db.add(new_cluster)
-                await db.flush()  # Secure the ID
+        # A + B. Indexing & Finding Matches (one encode of the text serves both); the
+        # neighbourhood search only sees vectors inside the complaint's spatial cells
+        metadata = vector_metadata(db_complaint, text_analysis)
+        if where is None:
+            # No location text at all: index it, but it can't be "local" to anything
+            await embedding_service.index_complaint(db_complaint.id, analysis_txt, metadata)
+            similar_cases = []
+        else:
+            similar_cases = await embedding_service.index_and_query(
+                complaint_id=db_complaint.id,
+                text=analysis_txt,
+                metadata=metadata,
+                distance_threshold=settings.CLUSTER_DISTANCE_THRESHOLD,
+                where=where
+            )
+        final_score = await apply_case_clustering(db, db_complaint, similar_cases, final_score, text_analysis)
+
+        # 6-8. Routing, Final Triage, Anchoring & Notification
+        dept_result = await db.execute(select(Department))
+        all_departments = dept_result.scalars().all()
+        await finalize_complaint(db, db_complaint, evidences, final_score, text_analysis, all_departments)
 
-                # CRITICAL: BACK-LINK PREVIOUS COMPLAINTS (Ensures ID 1 gets the ID too)
-                await db.execute(
-                    update(Complaint)
-                    .where(Complaint.id.in_(match_ids))
-                    .values(cluster_id=new_cluster.id)
-                )
-                db_complaint.cluster_id = new_cluster.id
+        await db.commit()
+        await progress_service.publish(complaint_id, "completed", severity=db_complaint.severity_score,
+                                       cluster_id=db_complaint.cluster_id)
+        logger.info(f"✅ Full Intelligence Loop Complete for ID {complaint_id}. Cluster ID: {db_complaint.cluster_id}")
+
+
+async def process_analysis_batch(complaint_ids: list):
+    """
+    Backlog drain: analyzes many complaints with a handful of bulk round trips.
+    Complaints and evidence are loaded in two queries, all texts are embedded in one
+    batch / one Chroma add, and every result is written back in a single commit.
+    """
+    async with SessionLocal() as db:
+        # 1. Bulk Fetch (complaints + evidence + departments)
+        result = await db.execute(
+            select(Complaint).filter(Complaint.id.in_(complaint_ids)).order_by(Complaint.id))
+        complaints = result.scalars().all()
+        if not complaints:
+            logger.error(f"Batch analysis: none of {len(complaint_ids)} complaints found.")
+            return
 
-        # 🚀 NEW: MODULE 8 - DEPARTMENT AUTO-ASSIGNMENT
-        logger.info(f"📂 Categorizing Department for ID {complaint_id}...")
+        logger.info(f"🚀 Starting Batch Orchestration for {len(complaints)} complaints")
+
+        ev_result = await db.execute(
+            select(Evidence).filter(Evidence.complaint_id.in_([c.id for c in complaints])))
+        evidences_by_complaint = {}
+        for ev in ev_result.scalars().all():
+            evidences_by_complaint.setdefault(ev.complaint_id, []).append(ev)
 
-        # 1. Fetch all available departments
         dept_result = await db.execute(select(Department))
         all_departments = dept_result.scalars().all()
+        await evidence_index.refresh(db)
 
-        # 2. Ask AI to pick the best ID
-        assigned_dept_id = await ai_service.predict_department(
-            description_en=db_complaint.summary_en or db_complaint.description,
-            departments=all_departments
+        # 2-4. Score everything at once; the per-provider caps in ai_service bound the fan-out
+        scored = await asyncio.gather(
+            *(score_complaint(c, evidences_by_complaint.get(c.id, [])) for c in complaints),
+            return_exceptions=True
         )
 
-        if assigned_dept_id:
-            db_complaint.department_id = assigned_dept_id
-            logger.info(f"📍 Automatically assigned to Department ID: {assigned_dept_id}")
+        analyzed = []
+        for db_complaint, outcome in zip(complaints, scored):
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch analysis failed for ID {db_complaint.id}: {outcome}")
+                db_complaint.analysis_status = "failed"
+            else:
+                analyzed.append((db_complaint, *outcome))
+
+        if analyzed:
+            for db_complaint, _, _ in analyzed:
+                locate_complaint(db_complaint, evidences_by_complaint.get(db_complaint.id, []))
+
+            # 5A. One embedding batch + one Chroma upsert for the whole batch
+            texts = [c.summary_en or c.description for c, _, _ in analyzed]
+            embeddings = await embedding_service.index_many(
+                complaint_ids=[c.id for c, _, _ in analyzed],
+                texts=texts,
+                metadatas=[vector_metadata(c, analysis) for c, _, analysis in analyzed]
+            )
+
+            # 5B. Neighbourhood queries reusing the same vectors, one per distinct spatial
+            # filter; only complaints without any location skip the search
+            wheres = [spatial_filter(c) for c, _, _ in analyzed]
+            placed = [row for row, where in enumerate(wheres) if where is not None]
+            similar_per_complaint = [[] for _ in analyzed]
+            if placed:
+                matches = await embedding_service.query_many(
+                    embeddings=[embeddings[row] for row in placed],
+                    distance_threshold=settings.CLUSTER_DISTANCE_THRESHOLD,
+                    where=[wheres[row] for row in placed]
+                )
+                for row, similar_cases in zip(placed, matches):
+                    similar_per_complaint[row] = similar_cases
+
+            # 5C/D + 6-8. Clustering touches shared cluster rows, so it runs in order
+            for (db_complaint, final_score, text_analysis), similar_cases in zip(analyzed, similar_per_complaint):
+                final_score = await apply_case_clustering(db, db_complaint, similar_cases, final_score,
+                                                          text_analysis)
+                if db_complaint.cluster_id:
+                    await db.flush()  # Make the assignment visible to later members of this batch
+                await finalize_complaint(db, db_complaint, evidences_by_complaint.get(db_complaint.id, []),
+                                         final_score, text_analysis, all_departments)
+
+        # Single bulk write-back for the whole batch
+        await db.commit()
+        await asyncio.gather(*(
+            progress_service.publish(c.id, c.analysis_status, severity=c.severity_score, cluster_id=c.cluster_id)
+            for c in complaints if c.analysis_status in ("completed", "failed")
+        ))
+        logger.info(f"✅ Batch Intelligence Loop Complete: {len(analyzed)}/{len(complaints)} analyzed")
+
+
+async def anchor_manifest_batch():
+    """
+    Merkle batch anchoring: one transaction seals every manifest that is still pending,
+    and each complaint stores the inclusion proof that links it to the anchored root.
+    """
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(Complaint.id, Complaint.manifest_hash)
+            .filter(Complaint.manifest_hash != None, Complaint.merkle_root == None,
+                    Complaint.blockchain_hash == None)
+            .order_by(Complaint.id)
+            .limit(settings.BLOCKCHAIN_BATCH_MAX_SIZE)
+        )
+        pending = result.all()
+        if not pending:
+            return
 
-        # 6. Persistence & Final Triage
-        if is_urgent_text: final_score = max(final_score, 8.5)
-        db_complaint.severity_score = int(round(max(1, min(10, final_score))))
-        db_complaint.analysis_status = "completed"
+        levels = build_merkle_tree([row.manifest_hash for row in pending])
+        root = merkle_root(levels)
 
-        # 7. BLOCKCHAIN ANCHORING (Feature: Immutable Proof of Stake)
-        evidence_hashes = [ev.file_hash for ev in evidences if ev.file_hash]
+        logger.info(f"🌳 Anchoring Merkle root {root} covering {len(pending)} manifests...")
+        try:
+            tx_id = await blockchain_service.anchor_batch_root(root, [row.id for row in pending])
+        except Exception as e:
+            logger.error(f"Batch anchoring failed: {e}")
+            return
 
-        manifest_hash = blockchain_service.generate_manifest_hash(
-            complaint_data={
-                "id": db_complaint.id,
-                "description": db_complaint.description,
-                "severity": db_complaint.severity_score,
-                "filed_at": db_complaint.filed_at
-            },
-            evidence_hashes=evidence_hashes
-        )
+        # One bulk UPDATE (by primary key) for the whole batch.
+        # blockchain_hash follows from the receipt poller once the root is mined.
+        await db.execute(update(Complaint), [
+            {
+                "id": row.id,
+                "merkle_root": root,
+                "merkle_proof": json.dumps(merkle_proof(levels, index))
+            }
+            for index, row in enumerate(pending)
+        ])
+        await db.commit()
+        logger.info(f"📤 Batch root queued for {len(pending)} complaints. TXID: {tx_id}")
 
-        logger.info(f"🔗 Anchoring Manifest to Blockchain for ID {complaint_id}...")
-        tx_id = await blockchain_service.anchor_to_blockchain(db_complaint.id, manifest_hash)
 
-        if tx_id:
-            db_complaint.blockchain_hash = tx_id
-            logger.info(f"🔒 Case Sealed! TXID: {tx_id}")
+async def record_anchor_outcomes(outcomes: list):
+    """Writes mined, reverted or abandoned anchor transactions back to their complaints."""
+    async with SessionLocal() as db:
+        for job, succeeded in outcomes:
+            complaint_ids = job["complaint_ids"]
+            if succeeded:
+                await db.execute(
+                    update(Complaint).where(Complaint.id.in_(complaint_ids)).values(blockchain_hash=job["tx_hash"]))
+                logger.info(f"🔒 Case Sealed! {len(complaint_ids)} complaint(s), TXID: {job['tx_hash']}")
+            else:
+                logger.error(f"❌ Anchor tx {job['tx_hash']} failed for complaints {complaint_ids[:5]}")
+                if job["kind"] == "batch":
+                    # Release the manifests so the next batch picks them up again
+                    await db.execute(
+                        update(Complaint).where(Complaint.id.in_(complaint_ids))
+                        .values(merkle_root=None, merkle_proof=None))
+        await db.commit()
 
-        # 🚀 STEP 8: AUTOMATED DEPARTMENT NOTIFICATION
-        if db_complaint.department_id:
-            # Fetch the department's email
-            dept_res = await db.execute(select(Department).filter(Department.id == db_complaint.department_id))
-            dept_obj = dept_res.scalar_one_or_none()
 
-            if dept_obj and dept_obj.contact_email:
-                logger.info(f"📧 Sending notification to {dept_obj.name}...")
+async def deliver_outbox():
+    """Drains due outbox rows in batches; the SMTP pool persists on the runtime loop between runs."""
+    async with SessionLocal() as db:
+        while await notification_service.deliver_pending(db) >= settings.NOTIFY_BATCH_SIZE:
+            pass
 
-                complaint_data_for_mail = {
-                    "id": db_complaint.id,
-                    "title": db_complaint.title_en or db_complaint.title,
-                    "severity": db_complaint.severity_score,
-                    "location": db_complaint.location,
-                    "summary": db_complaint.summary_en or db_complaint.description,
-                    "blockchain_hash": db_complaint.blockchain_hash
-                }
 
-                # We call this synchronously inside the worker as it's already a background task
-                notification_service.send_department_alert(dept_obj.contact_email, complaint_data_for_mail)
+async def deliver_digests():
+    async with SessionLocal() as db:
+        await notification_service.send_digests(db)
 
-        await db.commit()
-        logger.info(f"✅ Full Intelligence Loop Complete for ID {complaint_id}. Cluster ID: {db_complaint.cluster_id}")
+
+async def rebuild_map_cells():
+    async with SessionLocal() as db:
+        written = await map_service.rebuild_cells(db)
+    logger.info(f"🗺️ Map cells rebuilt: {written} row(s)")
+
+
+async def reconcile_rollups():
+    async with SessionLocal() as db:
+        return await analytics_service.reconcile(db)
@@ -0,0 +1,64 @@
+"""
+API import time and memory: lazy services vs eagerly built ones.
+
+Each measurement runs in a fresh interpreter so nothing is shared between runs:
+  * lazy : `import app.main` exactly as a uvicorn worker does
+  * eager: the same import followed by registry.build_all(), i.e. what every API
+           worker paid before services were built on first use (model, Chroma,
+           web3, Groq/Gemini SDKs)
+Reports the median wall time, peak RSS and which heavy modules ended up loaded.
+
+Usage (from backend/):
+    python -m benchmarks.api_startup --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "chromadb", "web3", "groq", "google.generativeai", "app.worker"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+if {eager}:
+    from app.core.registry import registry
+    registry.build_all()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(eager: bool, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(eager=eager, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds": statistics.median(s["seconds"] for s in samples),
+        "rss_mb": statistics.median(s["rss_mb"] for s in samples),
+        "loaded": samples[-1]["loaded"],
+    }
+
+
+def main(runs: int):
+    for label, eager in (("eager", True), ("lazy", False)):
+        result = measure(eager, runs)
+        print(f"{label:<5}: {result['seconds']:>6.2f}s | peak RSS {result['rss_mb']:>7.1f} MB | "
+              f"heavy modules: {', '.join(result['loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode")
+    args = parser.parse_args()
+    main(args.runs)
@@ -0,0 +1,69 @@
+"""
+Department router vs LLM labels.
+
+Labels a sample of analyzed complaints with the LLM (ai_service.predict_department),
+ranks the same complaints with the embedding router, and reports for each margin
+threshold how often routing agrees with the LLM and how many LLM calls it still needs.
+
+Usage (from backend/):
+    python -m benchmarks.department_router_accuracy --limit 300
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models.complaint import Complaint
+from app.models.department import Department
+from app.services.ai_service import ai_service
+from app.services.department_router import department_router
+
+THRESHOLDS = [0.0, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2]
+
+
+async def main(limit: int):
+    async with SessionLocal() as db:
+        departments = (await db.execute(select(Department))).scalars().all()
+        result = await db.execute(
+            select(Complaint.summary_en)
+            .filter(Complaint.summary_en != None, Complaint.is_deleted == False)
+            .order_by(Complaint.id.desc())
+            .limit(limit)
+        )
+        summaries = result.scalars().all()
+
+    if len(departments) < 2 or not summaries:
+        print("Need at least 2 departments and some analyzed complaints (summary_en).")
+        return
+
+    print(f"Labelling {len(summaries)} complaints with the LLM...")
+    labels = await asyncio.gather(*(ai_service.predict_department(s, departments) for s in summaries))
+
+    start = time.perf_counter()
+    rankings = [await department_router.rank(s, departments) for s in summaries]
+    per_route_ms = (time.perf_counter() - start) * 1000 / len(summaries)
+
+    samples = [(label, ranked) for label, ranked in zip(labels, rankings) if label is not None]
+    if not samples:
+        print("The LLM returned no department for any complaint; nothing to compare against.")
+        return
+    top1 = sum(1 for label, ranked in samples if ranked[0][0] == label) / len(samples)
+    print(f"Embedding-only top-1 agreement: {top1:.1%} ({per_route_ms:.2f} ms/route)\n")
+
+    print(f"{'margin':>8} | {'agreement':>9} | {'LLM calls':>9} | {'local accuracy':>14}")
+    for threshold in THRESHOLDS:
+        local = [(label, ranked) for label, ranked in samples
+                 if len(ranked) < 2 or ranked[0][1] - ranked[1][1] >= threshold]
+        local_correct = sum(1 for label, ranked in local if ranked[0][0] == label)
+        llm_calls = len(samples) - len(local)
+        # Complaints that fall back to the LLM agree with the LLM label by construction
+        agreement = (local_correct + llm_calls) / len(samples)
+        local_acc = f"{local_correct / len(local):>14.1%}" if local else f"{'-':>14}"  # Everything fell back
+        print(f"{threshold:>8.3f} | {agreement:>9.1%} | {llm_calls / len(samples):>9.1%} | {local_acc}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.limit))
@@ -0,0 +1,90 @@
+"""
+Per-call vs batched embedding throughput.
+
+Runs the same synthetic complaints through EmbeddingService two ways against a
+throw-away in-memory Chroma collection (the persistent store is never touched):
+  * per-call: index_and_query() once per complaint (one encode each)
+  * batched:  embed() once for all texts, then index_many() + query_many() with those vectors
+and also times a bare encode loop vs one batched encode to isolate model cost.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_throughput --n 500
+"""
+import argparse
+import asyncio
+import random
+import time
+import chromadb
+from app.services import embedding_service as embedding_module
+from app.core.registry import registry
+from app.services.embedding_service import embedding_service
+
+ISSUES = ["pothole", "garbage pile", "broken streetlight", "water leakage", "open drain", "illegal dumping"]
+PLACES = ["Kothrud", "Hadapsar", "Baner", "Shivajinagar", "Wakad", "Aundh", "Viman Nagar"]
+
+
+def synthetic_texts(n: int) -> list:
+    rng = random.Random(42)
+    return [
+        f"{rng.choice(ISSUES).capitalize()} near {rng.choice(PLACES)} lane {rng.randint(1, 60)}, "
+        f"reported for {rng.randint(1, 30)} days and getting worse."
+        for _ in range(n)
+    ]
+
+
+def use_scratch_collection(name: str):
+    client = chromadb.EphemeralClient()
+    embedding_module.collection = client.get_or_create_collection(
+        name=name, embedding_function=registry.get("embedding_model"), metadata={"hnsw:space": "cosine"}
+    )
+
+
+async def bench_per_call(texts: list) -> float:
+    use_scratch_collection("bench_per_call")
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        await embedding_service.index_and_query(i, text, {"category": "bench"})
+    return len(texts) / (time.perf_counter() - start)
+
+
+async def bench_batched(texts: list) -> float:
+    use_scratch_collection("bench_batched")
+    start = time.perf_counter()
+    embeddings = await embedding_service.index_many(
+        list(range(len(texts))), texts, [{"category": "bench"}] * len(texts)
+    )
+    await embedding_service.query_many(embeddings=embeddings)
+    return len(texts) / (time.perf_counter() - start)
+
+
+async def bench_encode_only(texts: list):
+    start = time.perf_counter()
+    for text in texts:
+        await embedding_service.embed([text])
+    per_call = len(texts) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await embedding_service.embed(texts)
+    batched = len(texts) / (time.perf_counter() - start)
+    return per_call, batched
+
+
+async def main(n: int):
+    texts = synthetic_texts(n)
+    await embedding_service.warm_up()
+
+    encode_single, encode_batch = await bench_encode_only(texts)
+    print(f"encode only : per-call {encode_single:>8.1f} texts/s | batched {encode_batch:>8.1f} texts/s "
+          f"({encode_batch / encode_single:.1f}x)")
+
+    per_call = await bench_per_call(texts)
+    batched = await bench_batched(texts)
+    print(f"index+query : per-call {per_call:>8.1f} texts/s | batched {batched:>8.1f} texts/s "
+          f"({batched / per_call:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=500, help="Number of synthetic complaints")
+    args = parser.parse_args()
+    asyncio.run(main(args.n))
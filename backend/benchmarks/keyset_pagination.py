@@ -0,0 +1,108 @@
+"""
+OFFSET vs keyset (filed_at, id) pagination over a large complaints-shaped table.
+
+Builds a scratch table `bench_complaints` (5M rows by default, generate_series) with
+the same partial (filed_at, id) index the list endpoints rely on, then times the
+newest-first query for page 1 and a deep page (10,000 by default) both ways:
+  * offset: ORDER BY filed_at DESC, id DESC OFFSET page*size LIMIT size
+  * keyset: WHERE (filed_at, id) < (cursor) ORDER BY ... LIMIT size+1, with the cursor
+            taken from the last row of the previous page (as X-Next-Cursor does)
+Reports the median latency per query; keyset should stay flat while OFFSET grows
+with the page number. The table is dropped afterwards unless --keep is given.
+
+Usage (from backend/, against a scratch Postgres in DATABASE_URL):
+    python -m benchmarks.keyset_pagination
+    python -m benchmarks.keyset_pagination --rows 1000000 --pages 1 100 10000 --keep
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.config import settings
+
+TABLE = "bench_complaints"
+
+SETUP = [
+    f"DROP TABLE IF EXISTS {TABLE}",
+    f"""
+    CREATE UNLOGGED TABLE {TABLE} AS
+    SELECT g AS id,
+           now() - (g * interval '7 seconds') - (random() * interval '5 seconds') AS filed_at,
+           (random() < 0.02) AS is_deleted,
+           (random() < 0.1) AS is_anonymous,
+           md5(g::text) AS title
+    FROM generate_series(1, :rows) AS g
+    """,
+    f"CREATE INDEX ix_{TABLE}_live_filed ON {TABLE} (filed_at, id) WHERE is_deleted = false",
+    f"ANALYZE {TABLE}",
+]
+
+OFFSET_QUERY = text(f"""
+    SELECT id, filed_at FROM {TABLE} WHERE is_deleted = false
+    ORDER BY filed_at DESC, id DESC OFFSET :offset LIMIT :size
+""")
+FIRST_QUERY = text(f"""
+    SELECT id, filed_at FROM {TABLE} WHERE is_deleted = false
+    ORDER BY filed_at DESC, id DESC LIMIT :size
+""")
+KEYSET_QUERY = text(f"""
+    SELECT id, filed_at FROM {TABLE} WHERE is_deleted = false AND (filed_at, id) < (:filed_at, :id)
+    ORDER BY filed_at DESC, id DESC LIMIT :size
+""")
+
+
+async def timed(conn, query, params: dict, runs: int):
+    samples, rows = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = (await conn.execute(query, params)).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), rows
+
+
+async def main(rows: int, pages: list, size: int, runs: int, keep: bool):
+    engine = create_async_engine(settings.DATABASE_URL)
+    try:
+        async with engine.begin() as conn:
+            print(f"🧱 Building {TABLE} with {rows:,} rows...")
+            start = time.perf_counter()
+            for statement in SETUP:
+                await conn.execute(text(statement), {"rows": rows} if ":rows" in statement else {})
+            print(f"   done in {time.perf_counter() - start:.1f}s")
+
+        async with engine.connect() as conn:
+            print(f"\n{'page':>8} | {'offset ms':>10} | {'keyset ms':>10}")
+            for page in pages:
+                offset_ms, offset_rows = await timed(conn, OFFSET_QUERY, {"offset": (page - 1) * size, "size": size}, runs)
+                if page == 1:
+                    keyset_ms, keyset_rows = await timed(conn, FIRST_QUERY, {"size": size}, runs)
+                else:
+                    # The cursor a client holds for this page: the last row of the page before it
+                    previous = (await conn.execute(OFFSET_QUERY, {"offset": (page - 2) * size, "size": size})).all()
+                    if not previous:
+                        print(f"{page:>8} | past the end of the table")
+                        continue
+                    last = previous[-1]
+                    keyset_ms, keyset_rows = await timed(
+                        conn, KEYSET_QUERY, {"filed_at": last.filed_at, "id": last.id, "size": size}, runs
+                    )
+                assert [r.id for r in offset_rows] == [r.id for r in keyset_rows], "pages differ"
+                print(f"{page:>8} | {offset_ms:>10.2f} | {keyset_ms:>10.2f}")
+    finally:
+        if not keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10_000])
+    parser.add_argument("--size", type=int, default=20, help="Rows per page")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch table")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.pages, args.size, args.runs, args.keep))
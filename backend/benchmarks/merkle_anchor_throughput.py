@@ -0,0 +1,117 @@
+"""
+Per-complaint anchoring vs Merkle batch anchoring on a local chain.
+
+Deploys PrajaNetraIntegrity to an in-process eth-tester chain (or to Ganache with
+--rpc), then measures:
+  * single mode: one anchorManifest transaction per complaint (sampled, extrapolated)
+  * batch mode:  tree build + one anchorBatchRoot transaction + proof generation,
+                 and verification of every proof against the on-chain root
+for batches of 1k and 10k complaints.
+
+Usage (from backend/):
+    pip install "web3[tester]"
+    python -m benchmarks.merkle_anchor_throughput
+    python -m benchmarks.merkle_anchor_throughput --rpc http://127.0.0.1:7545 --key 0x...
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+from solcx import compile_standard, install_solc
+from web3 import Web3
+from app.utils.merkle import build_merkle_tree, merkle_root, merkle_proof, verify_merkle_proof
+
+CONTRACT_PATH = Path(__file__).resolve().parents[2] / "blockchain" / "contracts" / "Integrity.sol"
+BATCH_SIZES = [1000, 10000]
+SINGLE_SAMPLE = 200
+
+
+def deploy(w3: Web3, sender: str, private_key: str = None):
+    install_solc("0.8.0")
+    compiled = compile_standard(
+        {
+            "language": "Solidity",
+            "sources": {"Integrity.sol": {"content": CONTRACT_PATH.read_text()}},
+            "settings": {"outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}},
+        },
+        solc_version="0.8.0",
+    )
+    artifact = compiled["contracts"]["Integrity.sol"]["PrajaNetraIntegrity"]
+    factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["evm"]["bytecode"]["object"])
+    receipt = transact(w3, factory.constructor(), sender, private_key)
+    return w3.eth.contract(address=receipt.contractAddress, abi=artifact["abi"])
+
+
+def transact(w3: Web3, call, sender: str, private_key: str = None):
+    if private_key is None:
+        # eth-tester accounts are unlocked
+        tx_hash = call.transact({"from": sender})
+    else:
+        txn = call.build_transaction({
+            "from": sender,
+            "nonce": w3.eth.get_transaction_count(sender, "pending"),
+            "gasPrice": w3.eth.gas_price,
+        })
+        signed = w3.eth.account.sign_transaction(txn, private_key=private_key)
+        tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+    return w3.eth.wait_for_transaction_receipt(tx_hash)
+
+
+def random_manifests(n: int) -> list:
+    return ["0x" + os.urandom(32).hex() for _ in range(n)]
+
+
+def bench_single(w3, contract, sender, private_key, first_id: int):
+    gas = 0
+    start = time.perf_counter()
+    for offset, manifest in enumerate(random_manifests(SINGLE_SAMPLE)):
+        call = contract.functions.anchorManifest(first_id + offset, Web3.to_bytes(hexstr=manifest))
+        gas += transact(w3, call, sender, private_key).gasUsed
+    elapsed = time.perf_counter() - start
+    return SINGLE_SAMPLE / elapsed, gas / SINGLE_SAMPLE
+
+
+def bench_batch(w3, contract, sender, private_key, size: int):
+    manifests = random_manifests(size)
+
+    start = time.perf_counter()
+    levels = build_merkle_tree(manifests)
+    root = merkle_root(levels)
+    receipt = transact(w3, contract.functions.anchorBatchRoot(Web3.to_bytes(hexstr=root), size), sender, private_key)
+    proofs = [merkle_proof(levels, i) for i in range(size)]
+    anchor_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert contract.functions.verifyBatchRoot(Web3.to_bytes(hexstr=root)).call() > 0
+    assert all(verify_merkle_proof(m, p, root) for m, p in zip(manifests, proofs))
+    verify_elapsed = time.perf_counter() - start
+
+    return size / anchor_elapsed, receipt.gasUsed / size, size / verify_elapsed, len(proofs[0])
+
+
+def main(rpc: str, private_key: str):
+    if rpc:
+        w3 = Web3(Web3.HTTPProvider(rpc))
+        sender = w3.eth.account.from_key(private_key).address
+    else:
+        w3 = Web3(Web3.EthereumTesterProvider())
+        sender, private_key = w3.eth.accounts[0], None
+
+    contract = deploy(w3, sender, private_key)
+
+    single_tps, single_gas = bench_single(w3, contract, sender, private_key, first_id=int(time.time()))
+    print(f"single : {single_tps:>10.1f} complaints/s | {single_gas:>9.0f} gas/complaint "
+          f"(sample of {SINGLE_SAMPLE} txs)")
+
+    for size in BATCH_SIZES:
+        tps, gas, verify_rate, depth = bench_batch(w3, contract, sender, private_key, size)
+        print(f"batch {size:>5}: {tps:>10.1f} complaints/s | {gas:>9.1f} gas/complaint | "
+              f"verify {verify_rate:>9.1f} proofs/s | proof length {depth}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc", default=None, help="Ganache RPC URL (default: in-process eth-tester)")
+    parser.add_argument("--key", default=None, help="Private key of a funded account when using --rpc")
+    args = parser.parse_args()
+    main(args.rpc, args.key)
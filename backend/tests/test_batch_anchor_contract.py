@@ -0,0 +1,77 @@
+from pathlib import Path
+import pytest
+
+pytest.importorskip("eth_tester")
+solcx = pytest.importorskip("solcx")
+
+from web3 import Web3  # noqa: E402
+from web3.exceptions import ContractLogicError  # noqa: E402
+from app.utils.merkle import build_merkle_tree, merkle_proof, merkle_root, verify_merkle_proof  # noqa: E402
+
+CONTRACT_SOURCE = Path(__file__).resolve().parents[2] / "blockchain" / "contracts" / "Integrity.sol"
+SOLC_VERSION = "0.8.0"  # Same compiler as blockchain/deploy.py
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    try:
+        solcx.install_solc(SOLC_VERSION)
+        output = solcx.compile_standard(
+            {
+                "language": "Solidity",
+                "sources": {"Integrity.sol": {"content": CONTRACT_SOURCE.read_text()}},
+                "settings": {"outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}},
+            },
+            solc_version=SOLC_VERSION,
+        )
+    except Exception as e:
+        pytest.skip(f"solc {SOLC_VERSION} unavailable: {e}")
+    contract = output["contracts"]["Integrity.sol"]["PrajaNetraIntegrity"]
+    return contract["abi"], contract["evm"]["bytecode"]["object"]
+
+
+@pytest.fixture
+def chain(compiled):
+    abi, bytecode = compiled
+    w3 = Web3(Web3.EthereumTesterProvider())
+    admin, other = w3.eth.accounts[:2]
+    tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor().transact({"from": admin})
+    address = w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+    return w3, w3.eth.contract(address=address, abi=abi), admin, other
+
+
+def _manifests(count: int) -> list:
+    return [Web3.to_hex(Web3.keccak(text=f"complaint-{i}")) for i in range(count)]
+
+
+def test_anchored_root_verifies_with_every_proof(chain):
+    w3, contract, admin, _ = chain
+    hashes = _manifests(9)
+    levels = build_merkle_tree(hashes)
+    root = merkle_root(levels)
+
+    assert contract.functions.verifyBatchRoot(root).call() == 0
+    tx_hash = contract.functions.anchorBatchRoot(root, len(hashes)).transact({"from": admin})
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    event = contract.events.BatchRootAnchored().process_receipt(receipt)[0]["args"]
+    assert (event["batchId"], Web3.to_hex(event["merkleRoot"]), event["leafCount"]) == (1, root, len(hashes))
+    assert contract.functions.verifyBatchRoot(root).call() == w3.eth.get_block(receipt.blockNumber).timestamp
+    assert contract.functions.batchCount().call() == 1
+    for index, manifest_hash in enumerate(hashes):
+        assert verify_merkle_proof(manifest_hash, merkle_proof(levels, index), root)
+
+
+def test_only_admin_can_anchor(chain):
+    _, contract, _, other = chain
+    root = merkle_root(build_merkle_tree(_manifests(2)))
+    with pytest.raises(ContractLogicError, match="Only admin"):
+        contract.functions.anchorBatchRoot(root, 2).transact({"from": other})
+
+
+def test_root_cannot_be_anchored_twice(chain):
+    w3, contract, admin, _ = chain
+    root = merkle_root(build_merkle_tree(_manifests(3)))
+    w3.eth.wait_for_transaction_receipt(contract.functions.anchorBatchRoot(root, 3).transact({"from": admin}))
+    with pytest.raises(ContractLogicError, match="already anchored"):
+        contract.functions.anchorBatchRoot(root, 3).transact({"from": admin})
@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.services.notification_service import NotificationService  # noqa: E402
+
+DETAILS = {"id": 12, "title": "Open drain", "severity": 7, "location": "Kharadi", "summary": "Drain overflowing"}
+
+
+def test_mined_hash_is_shown_as_the_blockchain_tx():
+    _, body = NotificationService.build_department_alert({**DETAILS, "blockchain_hash": "0xmined", "pending_tx": None})
+    assert "<b>Blockchain TX:</b> 0xmined</p>" in body
+
+
+def test_queued_hash_is_labelled_pending():
+    _, body = NotificationService.build_department_alert({**DETAILS, "blockchain_hash": None, "pending_tx": "0xqueued"})
+    assert "<b>Blockchain TX:</b> pending (queued as 0xqueued, not yet on chain)</p>" in body
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("httpx")
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from app.api import deps  # noqa: E402
+from app.models.user import UserRole  # noqa: E402
+from app.services.auth_service import auth_service  # noqa: E402
+from app.services.principal_cache import Principal  # noqa: E402
+
+EMAIL = "citizen@example.org"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def load(email):
+        return Principal(id=7, email=email, role=UserRole.CITIZEN, department_id=None, is_active=True)
+
+    monkeypatch.setattr(deps.principal_cache, "load", load)
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(current_user: Principal = Depends(deps.get_current_user)):
+        return {"id": current_user.id}
+
+    @app.get("/complaints/{complaint_id}/events")
+    async def events(complaint_id: int, current_user: Principal = Depends(deps.get_events_user)):
+        return {"id": current_user.id}
+
+    return TestClient(app)
+
+
+def test_events_token_is_refused_as_a_bearer_token(client):
+    token = auth_service.create_events_token(EMAIL, 42)
+    assert client.get("/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert client.get("/complaints/42/events", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+
+def test_events_token_only_opens_its_own_stream(client):
+    token = auth_service.create_events_token(EMAIL, 42)
+    assert client.get("/complaints/42/events", params={"token": token}).status_code == 200
+    assert client.get("/complaints/43/events", params={"token": token}).status_code == 401
+
+
+def test_access_token_still_works(client):
+    token = auth_service.create_access_token({"sub": EMAIL})
+    assert client.get("/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert client.get("/complaints/42/events", params={"token": token}).status_code == 401
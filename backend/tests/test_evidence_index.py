@@ -0,0 +1,65 @@
+import random
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("PIL")
+
+from app.models.evidence import Evidence  # noqa: E402
+from app.services.evidence_index import EvidenceImageIndex  # noqa: E402
+from app.utils.image_hash import hamming  # noqa: E402
+
+
+def _hex(value: int) -> str:
+    return f"{value:016x}"
+
+
+def _flip(value: int, bits) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_near_matches_brute_force():
+    rng = random.Random(7)
+    index = EvidenceImageIndex(radius=6)
+    hashes = [rng.getrandbits(64) for _ in range(300)]
+    # Plant near-duplicates of the first few hashes at every distance up to 8
+    for distance in range(9):
+        hashes.append(_flip(hashes[distance], rng.sample(range(64), distance)))
+    for evidence_id, value in enumerate(hashes, 1):
+        index.add(evidence_id, _hex(value), f"file-{evidence_id}")
+
+    for query in hashes[:12]:
+        expected = sorted(
+            (hamming(query, value), evidence_id, f"file-{evidence_id}")
+            for evidence_id, value in enumerate(hashes, 1) if hamming(query, value) <= 6
+        )
+        assert index.near(_hex(query)) == expected
+
+
+def test_radius_argument_only_narrows():
+    index = EvidenceImageIndex(radius=4)
+    base = 0x0123456789ABCDEF
+    index.add(1, _hex(base), "a")
+    index.add(2, _hex(_flip(base, (0, 20, 40))), "b")
+    assert [m[1] for m in index.near(_hex(base), radius=2)] == [1]
+    assert [m[1] for m in index.near(_hex(base), radius=10)] == [1, 2]
+
+
+def test_duplicate_and_unhashed_rows_are_ignored():
+    index = EvidenceImageIndex(radius=6)
+    index.add(1, "00000000000000ff", "a")
+    index.add(1, "00000000000000ff", "a")
+    index.add(2, None, "b")
+    assert len(index) == 1
+    assert index.near(None) == []
+
+
+def test_canonical_file_hash_prefers_earlier_near_duplicate():
+    index = EvidenceImageIndex(radius=6)
+    index.add(1, "f0f0f0f0f0f0f0f0", "original")
+    resized = Evidence(id=2, perceptual_hash="f0f0f0f0f0f0f0f1", file_hash="resized")
+    unrelated = Evidence(id=3, perceptual_hash="0f0f0f0f0f0f0f0f", file_hash="other")
+    index.add(resized.id, resized.perceptual_hash, resized.file_hash)
+    assert index.canonical_file_hash(resized) == "original"
+    assert index.canonical_file_hash(unrelated) == "other"
@@ -0,0 +1,72 @@
+import struct
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.utils.exif_reader import read_exif, read_exif_batch  # noqa: E402
+
+
+def _ascii(tag: int, value: str):
+    raw = value.encode("ascii") + b"\x00"
+    return tag, 2, len(raw), raw
+
+
+def _tiff(ifd0_entries: list, exif_entries: list) -> bytes:
+    """Little-endian TIFF: IFD0 pointing at an Exif IFD, out-of-line values after each IFD."""
+    def ifd(entries, offset, extra=()):
+        all_entries = sorted(list(entries) + list(extra))
+        data_offset = offset + 2 + 12 * len(all_entries) + 4
+        table, blob = struct.pack("<H", len(all_entries)), b""
+        for tag, type_id, count, raw in all_entries:
+            if len(raw) <= 4:
+                table += struct.pack("<HHI", tag, type_id, count) + raw.ljust(4, b"\x00")
+            else:
+                table += struct.pack("<HHII", tag, type_id, count, data_offset + len(blob))
+                blob += raw
+        return table + struct.pack("<I", 0) + blob
+
+    placeholder = ifd(ifd0_entries, 8, [(0x8769, 4, 1, struct.pack("<I", 0))])
+    exif_offset = 8 + len(placeholder)
+    ifd0 = ifd(ifd0_entries, 8, [(0x8769, 4, 1, struct.pack("<I", exif_offset))])
+    return b"II*\x00" + struct.pack("<I", 8) + ifd0 + ifd(exif_entries, exif_offset)
+
+
+def _jpeg(tiff: bytes) -> bytes:
+    app1 = b"Exif\x00\x00" + tiff
+    return b"\xff\xd8" + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + b"\xff\xda\x00\x02" + b"\xff\xd9"
+
+
+def _write(tmp_path, name: str, data: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_capture_time_uses_offset_tag(tmp_path):
+    tiff = _tiff([], [_ascii(0x9003, "2024:03:01 10:15:00"), _ascii(0x9011, "+05:30")])
+    result = read_exif(_write(tmp_path, "a.jpg", _jpeg(tiff)))
+    assert result["captured_at"] == datetime(2024, 3, 1, 10, 15, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    assert result["lat"] is None and result["lon"] is None
+
+
+def test_capture_time_without_offset_tag_falls_back_to_default_zone(tmp_path):
+    tiff = _tiff([], [_ascii(0x9003, "2024:03:01 10:15:00")])
+    result = read_exif(_write(tmp_path, "b.jpg", _jpeg(tiff)))
+    captured_at = result["captured_at"]
+    assert captured_at.tzinfo is not None
+    assert captured_at.replace(tzinfo=None) == datetime(2024, 3, 1, 10, 15)
+
+
+def test_bare_tiff_header(tmp_path):
+    tiff = _tiff([], [_ascii(0x9003, "2024:03:01 10:15:00"), _ascii(0x9011, "-04:00")])
+    result = read_exif(_write(tmp_path, "c.tif", tiff))
+    assert result["captured_at"].utcoffset() == timedelta(hours=-4)
+
+
+def test_batch_keeps_going_past_bad_files(tmp_path):
+    good = _write(tmp_path, "d.jpg", _jpeg(_tiff([], [_ascii(0x9003, "2024:03:01 10:15:00")])))
+    garbage = _write(tmp_path, "e.jpg", b"\xff\xd8\xff\xe1\x00\x10Exif\x00\x00II*\x00\xff\xff")
+    results = read_exif_batch([garbage, str(tmp_path / "missing.jpg"), good])
+    assert results[0] is None and results[1] is None
+    assert results[2]["captured_at"] is not None
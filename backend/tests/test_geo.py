@@ -0,0 +1,68 @@
+import pytest
+
+from app.utils.geo import (
+    cells_within, dms_to_decimal, geohash_bounds, geohash_cells_covering, geohash_decode,
+    geohash_encode, geohash_neighbors, geohash_precision_for_zoom, haversine_km,
+    normalize_place, tile_bounds, valid_coordinates,
+)
+
+
+def test_dms_tuple_and_legacy_string():
+    assert dms_to_decimal((18, 31, 12.6), "N") == pytest.approx(18.5201667)
+    assert dms_to_decimal("(73.0, 51.0, 24.0)", "W") == pytest.approx(-73.8566667)
+    assert dms_to_decimal(None) is None
+    assert dms_to_decimal("unknown") is None
+
+
+def test_null_island_and_out_of_range_are_invalid():
+    assert valid_coordinates(18.52, 73.85)
+    assert not valid_coordinates(0, 0)
+    assert not valid_coordinates(91, 10)
+    assert not valid_coordinates(None, 10)
+
+
+def test_haversine_pune_to_mumbai():
+    assert haversine_km(18.5204, 73.8567, 19.0760, 72.8777) == pytest.approx(120, abs=2)
+
+
+def test_geohash_known_value_and_round_trip():
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    lat, lon = geohash_decode(geohash_encode(18.5204, 73.8567))
+    assert (lat, lon) == (pytest.approx(18.5204, abs=1e-4), pytest.approx(73.8567, abs=1e-4))
+
+
+def test_neighbors_surround_the_cell():
+    cell = geohash_encode(18.5204, 73.8567, 6)
+    neighbors = geohash_neighbors(cell)
+    assert len(neighbors) == 9 and cell in neighbors
+    assert all(len(n) == 6 for n in neighbors)
+
+
+def test_cells_within_cover_the_radius():
+    precision, cells = cells_within(18.5204, 73.8567, 2.0)
+    # Any point 2 km away in a cardinal direction still lands in one of the cells
+    for lat, lon in ((18.5384, 73.8567), (18.5024, 73.8567), (18.5204, 73.8757), (18.5204, 73.8377)):
+        assert geohash_encode(lat, lon, precision) in cells
+
+
+def test_cells_covering_spans_the_box_exactly():
+    box = (18.40, 73.70, 18.65, 74.00)
+    cells = geohash_cells_covering(*box, precision=5)
+    assert len(cells) == len(set(cells))
+    for cell in cells:
+        south, west, north, east = geohash_bounds(cell)
+        assert south < box[2] and north > box[0] and west < box[3] and east > box[1]
+    for lat, lon in ((18.40, 73.70), (18.65, 74.00), (18.52, 73.85)):
+        assert geohash_encode(lat, lon, 5) in cells
+
+
+def test_normalize_place():
+    assert normalize_place("  Shivaji-Nagar,  PUNE! ") == "shivaji nagar pune"
+    assert normalize_place(None) == ""
+
+
+def test_tile_bounds_and_zoom_precision():
+    assert tile_bounds(0, 0, 0) == (pytest.approx(-85.0511, abs=1e-4), -180, pytest.approx(85.0511, abs=1e-4), 180)
+    assert geohash_precision_for_zoom(0) == 1
+    assert geohash_precision_for_zoom(12) == 6
+    assert geohash_precision_for_zoom(18) == 7
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("eth_utils")
+
+from eth_utils import keccak  # noqa: E402
+from app.utils.merkle import build_merkle_tree, merkle_proof, merkle_root, verify_merkle_proof  # noqa: E402
+
+
+def _manifests(count: int) -> list:
+    return ["0x" + keccak(text=f"manifest-{i}").hex() for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 7, 16, 33])
+def test_every_leaf_proves_against_the_root(count):
+    hashes = _manifests(count)
+    levels = build_merkle_tree(hashes)
+    root = merkle_root(levels)
+    for index, manifest_hash in enumerate(hashes):
+        assert verify_merkle_proof(manifest_hash, merkle_proof(levels, index), root)
+
+
+def test_single_leaf_root_is_the_hashed_leaf():
+    [manifest_hash] = _manifests(1)
+    levels = build_merkle_tree([manifest_hash])
+    assert merkle_root(levels) == "0x" + keccak(bytes.fromhex(manifest_hash[2:])).hex()
+    assert merkle_proof(levels, 0) == []
+
+
+def test_tampered_manifest_or_wrong_root_fails():
+    hashes = _manifests(5)
+    levels = build_merkle_tree(hashes)
+    root = merkle_root(levels)
+    proof = merkle_proof(levels, 2)
+    assert not verify_merkle_proof(hashes[3], proof, root)
+    assert not verify_merkle_proof(hashes[2], proof, merkle_root(build_merkle_tree(hashes[:4])))
+
+
+def test_inner_node_is_not_a_valid_leaf():
+    levels = build_merkle_tree(_manifests(4))
+    inner = "0x" + levels[1][0].hex()
+    assert not verify_merkle_proof(inner, merkle_proof(levels[1:], 0), merkle_root(levels))
+
+
+def test_root_checks_are_case_insensitive():
+    hashes = _manifests(3)
+    levels = build_merkle_tree(hashes)
+    assert verify_merkle_proof(hashes[0], merkle_proof(levels, 0), merkle_root(levels).upper().replace("0X", "0x"))
+
+
+def test_empty_batch_is_rejected():
+    with pytest.raises(ValueError):
+        build_merkle_tree([])
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException  # noqa: E402
+from app.api.pagination import decode_cursor, encode_cursor  # noqa: E402
+
+
+def test_cursor_round_trip():
+    filed_at = datetime(2026, 3, 14, 9, 26, 53, 589793, tzinfo=timezone.utc)
+    cursor = encode_cursor(filed_at, 4821)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (filed_at, 4821)
+
+
+def test_naive_timestamp_round_trip():
+    filed_at = datetime(2025, 12, 31, 23, 59, 59)
+    assert decode_cursor(encode_cursor(filed_at, 1)) == (filed_at, 1)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "WyJ4Il0", encode_cursor(datetime(2026, 1, 1), 1)[:-3]])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
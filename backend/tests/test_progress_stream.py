@@ -0,0 +1,72 @@
+import asyncio
+import json
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("redis")
+
+from app.services.progress_service import ProgressService  # noqa: E402
+
+PREVIOUS_RUN = [
+    ("100-0", json.dumps({"stage": "triaged"})),
+    ("101-0", json.dumps({"stage": "completed"})),
+]
+
+
+class Connected:
+    async def is_disconnected(self):
+        return False
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = ProgressService()
+
+    async def listen():
+        await asyncio.Event().wait()  # No Redis subscription; events are delivered by hand
+
+    async def history(complaint_id, after_id=None):
+        return [(i, d) for i, d in PREVIOUS_RUN if after_id is None or i > after_id]
+
+    async def tail_id(complaint_id):
+        return PREVIOUS_RUN[-1][0]
+
+    monkeypatch.setattr(service, "_listen", listen)
+    monkeypatch.setattr(service, "history", history)
+    monkeypatch.setattr(service, "tail_id", tail_id)
+    return service
+
+
+def _collect(service, analysis_status, last_event_id, live=()):
+    async def run():
+        stream = service.event_stream(7, analysis_status, last_event_id, Connected())
+        frames = [await stream.__anext__(), await stream.__anext__()]  # retry + snapshot/first event
+        for queue in service._subscribers.get(7, ()):
+            for event in live:
+                queue.put_nowait(event)
+        async for frame in stream:
+            frames.append(frame)
+        return frames
+
+    return asyncio.run(asyncio.wait_for(run(), 5))
+
+
+def test_fresh_client_during_reanalysis_ignores_previous_run(service):
+    live = [("102-0", json.dumps({"stage": "triaged"})), ("103-0", json.dumps({"stage": "completed"}))]
+    frames = _collect(service, "processing", None, live)
+    assert '"analysis_status": "processing"' in frames[1]
+    assert [f.split("\n")[0] for f in frames[2:]] == ["id: 102-0", "id: 103-0"]
+
+
+def test_fresh_client_of_finished_complaint_gets_only_the_snapshot(service):
+    async def run():
+        return [frame async for frame in service.event_stream(7, "completed", None, Connected())]
+
+    frames = asyncio.run(run())
+    assert len(frames) == 2 and '"analysis_status": "completed"' in frames[1]
+
+
+def test_resuming_client_replays_what_it_missed(service):
+    frames = _collect(service, "completed", "100-0")
+    assert frames[1].startswith("id: 101-0")
+    assert len(frames) == 2
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.jobs.recluster import EMBEDDING_DIM, Corpus, ReclusterJob  # noqa: E402
+from app.utils.geo import geohash_encode  # noqa: E402
+
+
+def _job() -> ReclusterJob:
+    return ReclusterJob(distance_threshold=0.2, radius_km=2.0, min_samples=2,
+                        block_size=4, workers=2, page_size=100)
+
+
+def _corpus(tmp_path, vectors, lats, lons, groups) -> Corpus:
+    path = str(tmp_path / "vectors.f16")
+    matrix = np.memmap(path, dtype=np.float16, mode="w+", shape=(len(vectors), EMBEDDING_DIM))
+    matrix[:] = np.asarray(vectors, dtype=np.float16)
+    matrix.flush()
+    del matrix
+    return Corpus(path, np.arange(1, len(vectors) + 1, dtype=np.int64), np.asarray(lats, dtype=np.float64),
+                  np.asarray(lons, dtype=np.float64), groups, [None] * len(vectors))
+
+
+def _unit(axis: int, wobble: float = 0.0):
+    vector = np.zeros(EMBEDDING_DIM)
+    vector[axis], vector[axis + 1] = 1.0, wobble
+    return vector / np.linalg.norm(vector)
+
+
+def test_place_only_rows_cluster_within_their_place(tmp_path):
+    nan = float("nan")
+    cell = "gh5:" + geohash_encode(18.5204, 73.8567, 5)
+    corpus = _corpus(
+        tmp_path,
+        [_unit(0), _unit(0, 0.1), _unit(0, 0.2),   # Same issue, same named place, no coordinates
+         _unit(0), _unit(10),                      # Same text in another place / unrelated
+         _unit(20), _unit(20, 0.1)],               # Geohashed pair
+        [nan, nan, nan, nan, nan, 18.5204, 18.5210],
+        [nan, nan, nan, nan, nan, 73.8567, 73.8570],
+        ["place:lane 5 kharadi bypass"] * 3 + ["place:baner road", "place:lane 5 kharadi bypass", cell, cell],
+    )
+    try:
+        labels = _job().cluster(corpus)
+    finally:
+        corpus.close()
+
+    assert labels[0] >= 0 and labels[0] == labels[1] == labels[2]
+    assert labels[3] == -1 and labels[4] == -1
+    assert labels[5] >= 0 and labels[5] == labels[6] != labels[0]
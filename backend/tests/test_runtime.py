@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import pytest
+
+from app.core.runtime import AsyncRuntime
+
+
+def test_run_waits_for_startup_hooks():
+    runtime = AsyncRuntime(concurrency=4)
+    hook_entered, release_hook = threading.Event(), threading.Event()
+    warmed = []
+
+    @runtime.on_startup
+    async def warm_up():
+        hook_entered.set()
+        await asyncio.get_running_loop().run_in_executor(None, release_hook.wait)
+        warmed.append(True)
+
+    async def uses_warm_clients():
+        return list(warmed)
+
+    results = []
+    starter = threading.Thread(target=lambda: results.append(runtime.run(uses_warm_clients())))
+    starter.start()
+    assert hook_entered.wait(5)
+
+    # A second pool thread arriving mid-startup must not run ahead of the hooks
+    late = threading.Thread(target=lambda: results.append(runtime.run(uses_warm_clients())))
+    late.start()
+    late.join(0.2)
+    assert late.is_alive()
+
+    release_hook.set()
+    starter.join(5)
+    late.join(5)
+    runtime.stop()
+    assert results == [[True], [True]]
+
+
+def test_failed_startup_is_retried():
+    runtime = AsyncRuntime(concurrency=1)
+    attempts = []
+
+    @runtime.on_startup
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("redis not up yet")
+
+    async def ping():
+        return "pong"
+
+    with pytest.raises(ConnectionError):
+        runtime.run(ping())
+    assert runtime.loop is None
+    assert runtime.run(ping()) == "pong"
+    runtime.stop()
+    assert len(attempts) == 2
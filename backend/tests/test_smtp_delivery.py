@@ -0,0 +1,83 @@
+import asyncio
+import socket
+from email import message_from_bytes
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.notification_service import NotificationService, SMTPConnectionPool  # noqa: E402
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, message_from_bytes(envelope.content)))
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    inbox = Inbox()
+    controller = Controller(inbox, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "SMTP_HOST", controller.hostname)
+    monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(settings, "SMTP_USE_AUTH", False)
+    yield inbox
+    controller.stop()
+
+
+def test_send_delivers_html_message(smtp_server):
+    service = NotificationService()
+    asyncio.run(service._send("ward-office@example.org", "Pothole on MG Road", "<p>Severity 8</p>"))
+
+    [(recipients, message)] = smtp_server.messages
+    assert recipients == ["ward-office@example.org"]
+    assert message["Subject"] == "Pothole on MG Road"
+    assert message["From"] == settings.MAIL_FROM
+    assert message.get_payload()[0].get_content_type() == "text/html"
+
+
+def test_pool_reuses_the_connection(smtp_server):
+    pool = SMTPConnectionPool(size=1)
+
+    async def send_two():
+        used = []
+        for i in range(2):
+            async with pool.connection() as smtp:
+                used.append(smtp)
+                await smtp.send_message(NotificationService._build_message("a@example.org", f"#{i}", "body"))
+        return used
+
+    first, second = asyncio.run(send_two())
+    assert first is second
+    assert [m["Subject"] for _, m in smtp_server.messages] == ["#0", "#1"]
+
+
+def test_errored_connection_is_replaced(smtp_server):
+    pool = SMTPConnectionPool(size=1)
+
+    async def fail_then_send():
+        with pytest.raises(RuntimeError):
+            async with pool.connection() as broken:
+                raise RuntimeError("send failed")
+        async with pool.connection() as smtp:
+            await smtp.send_message(NotificationService._build_message("b@example.org", "retry", "body"))
+        return broken, smtp
+
+    broken, smtp = asyncio.run(fail_then_send())
+    assert smtp is not broken
+    assert not broken.is_connected
+    assert [m["Subject"] for _, m in smtp_server.messages] == ["retry"]
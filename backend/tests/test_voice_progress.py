@@ -0,0 +1,30 @@
+import asyncio
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("celery")
+pytest.importorskip("pydub")
+
+from app import worker  # noqa: E402
+
+
+def test_transcript_chunks_are_published_with_text_and_offsets(monkeypatch):
+    published = []
+
+    async def publish(complaint_id, stage, **details):
+        published.append((complaint_id, stage, details))
+
+    monkeypatch.setattr(worker.progress_service, "publish", publish)
+    chunks = [
+        {"index": 1, "start": 61.2, "end": 118.0, "text": "the drain near the school", "completed": 1, "total": 2},
+        {"index": 0, "start": 0.0, "end": 61.2, "error": "timeout", "completed": 2, "total": 2},
+    ]
+    for chunk in chunks:
+        asyncio.run(worker.publish_transcript_chunk(9, chunk))
+
+    assert published == [
+        (9, "transcribing", {"completed": 1, "total": 2, "failed": False, "index": 1,
+                             "start": 61.2, "end": 118.0, "text": "the drain near the school"}),
+        (9, "transcribing", {"completed": 2, "total": 2, "failed": True, "index": 0,
+                             "start": 0.0, "end": 61.2, "text": None}),
+    ]
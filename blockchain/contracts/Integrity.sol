@@ -8,10 +8,19 @@ contract PrajaNetraIntegrity {
         bool exists;
     }
 
+    struct BatchRoot {
+        uint256 leafCount;
+        uint256 timestamp;
+        bool exists;
+    }
+
     mapping(uint256 => ComplaintManifest) public registry;
+    mapping(bytes32 => BatchRoot) public batchRoots;
+    uint256 public batchCount;
     address public admin;
 
     event ManifestAnchored(uint256 indexed complaintId, bytes32 manifestHash);
+    event BatchRootAnchored(uint256 indexed batchId, bytes32 merkleRoot, uint256 leafCount);
 
     constructor() {
         admin = msg.sender;
@@ -32,4 +41,24 @@ contract PrajaNetraIntegrity {
     function verifyManifest(uint256 _complaintId) public view returns (bytes32) {
         return registry[_complaintId].manifestHash;
     }
+
+    // Batch mode: one transaction anchors the Merkle root of many manifests.
+    // Each complaint keeps its own inclusion proof off-chain.
+    function anchorBatchRoot(bytes32 _merkleRoot, uint256 _leafCount) public {
+        require(msg.sender == admin, "Only admin can anchor batches");
+        require(!batchRoots[_merkleRoot].exists, "Root already anchored");
+
+        batchRoots[_merkleRoot] = BatchRoot({
+            leafCount: _leafCount,
+            timestamp: block.timestamp,
+            exists: true
+        });
+        batchCount += 1;
+
+        emit BatchRootAnchored(batchCount, _merkleRoot, _leafCount);
+    }
+
+    function verifyBatchRoot(bytes32 _merkleRoot) public view returns (uint256) {
+        return batchRoots[_merkleRoot].timestamp;
+    }
 }
\ No newline at end of file
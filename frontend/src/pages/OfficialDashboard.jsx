@@ -9,20 +9,31 @@ const OfficialDashboard = () => {
   const [complaints, setComplaints] = useState([]);
   const [selectedCase, setSelectedCase] = useState(null);
   const [note, setNote] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Assigned cases, newest first; the API returns one page and an X-Next-Cursor header
+  const fetchCases = async (cursor = null) => {
+    try {
+      const { data, headers } = await api.get('/official/complaints', { params: cursor ? { cursor } : {} });
+      setComplaints(prev => cursor ? [...prev, ...data] : data);
+      setNextCursor(headers['x-next-cursor'] || null);
+    } catch (err) { console.error(err); }
+  };
 
   useEffect(() => {
-    const fetchCases = async () => {
-      try {
-        const { data } = await api.get('/official/complaints'); // Assigned cases
-        setComplaints(data);
-      } catch (err) { console.error(err); }
-    };
     fetchCases();
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchCases(nextCursor);
+    setLoadingMore(false);
+  };
+
   const updateStatus = async (id, status) => {
     await api.patch(`/official/complaints/${id}/status`, { status });
-    setComplaints(complaints.map(c => c.id === id ? { ...c, status } : c));
+    setComplaints(prev => prev.map(c => c.id === id ? { ...c, status } : c));
   };
 
   const addNote = async (id) => {
@@ -59,6 +70,15 @@ const OfficialDashboard = () => {
               <h4 className="font-semibold text-sm truncate">{c.title}</h4>
             </div>
           ))}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full py-3 rounded-2xl text-sm font-bold bg-white/5 hover:bg-white/10 text-gray-400 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more cases'}
+            </button>
+          )}
         </div>
       </div>
 